@@ -1,12 +1,15 @@
 import os
-import base64
-import uuid
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 from flask import Flask, request, jsonify
 from dateutil import parser
 import boto3
 from decimal import Decimal
 
+from dynamo_writer import DynamoWriter
+
 # ================= DYNAMODB SETUP =================
 dynamodb = boto3.resource(
     "dynamodb",
@@ -14,6 +17,14 @@ dynamodb = boto3.resource(
 )
 
 table = dynamodb.Table("CLAIM-DATA")
+dynamo_writer = DynamoWriter.for_table(table, key=("Claim_ID", "Invoice_No"))
+
+# ================= CONCURRENCY =================
+# Attachments of one claim are extracted on a shared, bounded pool
+CLAIM_WORKERS = int(os.environ.get("CLAIM_WORKERS", "4"))
+
+_claim_executor = None
+_claim_executor_lock = threading.Lock()
 
 # ================= USER AUTH =================
 VALID_USERNAME = "UATUser"
@@ -21,9 +32,16 @@ VALID_PASSWORD = "Admin"
 
 # Rohit
 # external extractors
-from total import extract_total, extract_text_full
-from invoice import extract_invoice
-from date import extract_date_from_text
+from fields import extract_fields
+from refine import refine_fields
+from layout import roi_fields
+from incremental import incremental_text
+from document import DocumentContext
+from jobs import JobQueue, WorkerPool, QueueFull
+from dup_index import get_claim_index
+from claim_store import get_store
+from uploads import Upload
+from metrics import stage, track_request, metrics_view
 
 
 # ================= DATE NORMALIZER =================
@@ -36,70 +54,88 @@ def normalize_date(date_str):
         return None
 
 
-# ================= BASE64 DECODER =================
-def decode_base64_file(base64_string):
-    if "base64," in base64_string:
-        base64_string = base64_string.split("base64,")[1]
+# ================= ATTACHMENT BYTES =================
+# Attachments are held in memory (uploads.Upload spills only very large
+# ones to a self-deleting temp file). Only async uploads are parked on
+# disk, in UPLOAD_JOB_DIR, until their job has run.
+UPLOAD_JOB_DIR = os.environ.get("UPLOAD_JOB_DIR", "temp_files")
 
-    file_bytes = base64.b64decode(base64_string.strip())
 
-    os.makedirs("temp_files", exist_ok=True)
+def load_attachment(att):
+    """Upload for an attachment: pre-read part, parked job file or base64 string."""
+    if att.get("upload") is not None:
+        return att["upload"]
+    if att.get("path"):
+        return Upload.from_path(att["path"])
+    return Upload.from_base64(att.get("base64File"))
 
-    if file_bytes.startswith(b"%PDF"):
-        ext = ".pdf"
-    elif file_bytes[:2] == b"PK":
-        ext = ".xlsx"
-    else:
-        ext = ".jpg"
 
-    path = os.path.join("temp_files", f"{uuid.uuid4()}{ext}")
+def claim_from_upload(req, persist=False):
+    """
+    Claim JSON for a binary upload plus the Uploads it refers to.
 
-    with open(path, "wb") as f:
-        f.write(file_bytes)
+    The claim comes from the "claim" form field or the X-Claim-Metadata
+    header. multipart/form-data: an attachment's "file" names its part.
+    Any other body is a single raw file, used by attachments without one.
+    With persist=True the files are parked in UPLOAD_JOB_DIR so the
+    claim can be queued as JSON.
+    """
+    raw = req.form.get("claim") if req.mimetype == "multipart/form-data" else None
+    raw = raw or req.headers.get("X-Claim-Metadata")
+    if not raw:
+        raise ValueError("Claim metadata missing: send a 'claim' form field or X-Claim-Metadata header")
 
-    return path
+    data = json.loads(raw)
+    uploads = {}
 
+    try:
+        for v in data.get("Claim", {}).get("Vouchers", []):
+            for att in v.get("Attachments", []) or []:
+                if att.get("base64File"):
+                    continue
+
+                part = att.get("file")
+                if req.mimetype == "multipart/form-data":
+                    if part not in req.files:
+                        raise ValueError(f"No uploaded part named {part!r}")
+                    stream = req.files[part].stream
+                else:
+                    part, stream = "body", req.stream
+
+                if part not in uploads:
+                    uploads[part] = Upload.from_stream(stream)
+                    if persist:
+                        uploads[part].detach(UPLOAD_JOB_DIR)
+
+                if persist:
+                    att["path"] = uploads[part].path
+                else:
+                    att["upload"] = uploads[part]
+    except Exception:
+        for upload in uploads.values():
+            upload.close()
+        raise
+
+    return data, list(uploads.values())
 
-# ================= DUPLICATE CHECK =================
-def check_duplicate(df, emp, inv, date, amt):
-    if df.empty:
-        return False
-
-    dup = df[
-        (df["Employee_Code"] == emp) &
-        (df["Invoice_No"] == inv) &
-        (df["Date"] == date) &
-        (abs(df["Total_Amount"] - amt) <= 5)
-    ]
-    return not dup.empty
 
+# ================= DUPLICATE CHECK =================
+def check_duplicate(index, emp, inv, date, amt):
+    return index.contains(emp, inv, date, amt)
 
-# ================= SAVE TO EXCEL =================
-def insert_into_excel(records):
-    DB = "claim.xlsx"
 
-    if os.path.exists(DB):
-        df = pd.read_excel(DB)
-    else:
-        df = pd.DataFrame(columns=[
-            "Employee_Code",
-            "Invoice_No",
-            "Date",
-            "Total_Amount",
-            "Claim_Type",
-            "Claim_ID",
-            "Status"
-        ])
+# ================= SAVE TO CLAIM STORE =================
+def insert_into_store(records):
+    get_store().append_claims(records)
 
-    df = pd.concat([df, pd.DataFrame(records)], ignore_index=True)
-    df.to_excel(DB, index=False)
+    # pull the new rows into the duplicate index right away
+    get_claim_index()
 
 # ================= SAVE TO dynamodb =================
 def insert_into_dynamodb(records):
 
-    for rec in records:
-
-        item = {
+    items = [
+        {
             "Claim_ID": str(rec["Claim_ID"]),
             "Invoice_No": str(rec["Invoice_No"]),
             "Employee_Code": str(rec["Employee_Code"]),
@@ -108,13 +144,58 @@ def insert_into_dynamodb(records):
             "Status": str(rec["Status"]),
             "Total_Amount": Decimal(str(rec["Total_Amount"]))
         }
+        for rec in records
+    ]
 
-        table.put_item(Item=item)
+    return dynamo_writer.put_items(items)
 
 # ================= DAILY EXPENSE (EXCEL) =================
-def process_daily_expense_excel(path, emp, ctype, voucher, db_df,c_id):
-    df = pd.read_excel(path)
+def first_duplicate(index, emp, invs, dates, amounts):
+    """
+    Position of the first sheet row that duplicates claim history, or None.
+
+    One pass for the whole sheet: the sheet's keys are hash-joined
+    against the index, then merge_asof matches each amount to the
+    nearest claimed amount of its key within the tolerance.
+    """
+    keys = [index.key(emp, inv, date) for inv, date in zip(invs, dates)]
+
+    history = index.amounts_for(set(keys))
+    if not history:
+        return None
+
+    sheet = pd.DataFrame({
+        "key": ["\x1f".join(k) for k in keys],
+        "amount": pd.Series(amounts, dtype=float),
+        "row": range(len(keys)),
+    }).dropna(subset=["amount"])
+
+    claimed = pd.DataFrame(
+        [("\x1f".join(key), float(amt)) for key, amts in history.items() for amt in amts],
+        columns=["key", "claimed"],
+    )
+
+    matched = pd.merge_asof(
+        sheet.sort_values("amount"),
+        claimed.sort_values("claimed"),
+        left_on="amount",
+        right_on="claimed",
+        by="key",
+        direction="nearest",
+        tolerance=index.tolerance,
+    )
+    hits = matched.loc[matched["claimed"].notna(), "row"]
+    return int(hits.min()) if len(hits) else None
+
+
+def process_daily_expense_excel(upload, emp, ctype, voucher, dup_index,c_id):
+    with stage("decode"), upload.open() as f:
+        df = pd.read_excel(f)
+
+    return validate_daily_expense(df, emp, ctype, voucher, dup_index, c_id)
+
 
+def validate_daily_expense(df, emp, ctype, voucher, dup_index, c_id):
     required_cols = ["Invoice_No", "Date", "Total_Amount"]
     for col in required_cols:
         if col not in df.columns:
@@ -123,39 +204,54 @@ def process_daily_expense_excel(path, emp, ctype, voucher, db_df,c_id):
     daily_limit = float(voucher.get("Daily_Limit", 0))
     voucher_amount = float(voucher.get("Bill_Amount", 0))
 
-    total_excel_amount = 0
-    records = []
+    invs = df["Invoice_No"].astype(str).tolist()
 
-    for _, row in df.iterrows():
-        inv = str(row["Invoice_No"])
-        date_obj = normalize_date(row["Date"])
-        amt = float(row["Total_Amount"])
+    # a sheet repeats a handful of dates: parse each distinct value once
+    codes, uniques = pd.factorize(df["Date"])
+    parsed = [str(normalize_date(d)) for d in uniques]
+    dates = [parsed[c] if c >= 0 else str(normalize_date(None)) for c in codes]
 
-        if check_duplicate(db_df, emp, inv, str(date_obj), amt):
-            return {
-                "status": "DUPLICATE_CLAIM",
-                "invoice_number": inv
-            }
+    amounts = pd.to_numeric(df["Total_Amount"], errors="coerce").astype(float)
+    bad = amounts.isna() & df["Total_Amount"].notna()
+    amounts = amounts.tolist()
+
+    with stage("dedupe"):
+        dup = first_duplicate(dup_index, emp, invs, dates, amounts)
+    first_bad = int(bad.values.argmax()) if bad.any() else None
+
+    # rows were checked in order before: an unparseable amount only
+    # matters if no duplicate comes before it
+    if first_bad is not None and (dup is None or first_bad < dup):
+        float(df["Total_Amount"].iloc[first_bad])  # raises the usual ValueError
+
+    if dup is not None:
+        return {
+            "status": "DUPLICATE_CLAIM",
+            "invoice_number": invs[dup]
+        }
 
-        #if amt > daily_limit:
-         #   return {
-         #       "status": "DAILY_LIMIT_EXCEEDED",
-         #       "invoice_number": inv,
-         #       "amount": amt,
-         #       "daily_limit": daily_limit
-          #  }
+    #if amt > daily_limit:
+     #   return {
+     #       "status": "DAILY_LIMIT_EXCEEDED",
+     #       "invoice_number": inv,
+     #       "amount": amt,
+     #       "daily_limit": daily_limit
+      #  }
 
-        total_excel_amount += amt
+    total_excel_amount = sum(amounts)
 
-        records.append({
+    records = [
+        {
             "Employee_Code": emp,
             "Invoice_No": inv,
-            "Date": str(date_obj),
+            "Date": date,
             "Total_Amount": amt,
             "Claim_Type": ctype,
             "Claim_ID":c_id,
             "Status":"Approved"
-        })
+        }
+        for inv, date, amt in zip(invs, dates, amounts)
+    ]
 
     if total_excel_amount > voucher_amount:
         return {
@@ -167,89 +263,168 @@ def process_daily_expense_excel(path, emp, ctype, voucher, db_df,c_id):
     return {"records": records, "total": total_excel_amount}
 
 
-# ================= CLAIM PROCESSOR =================
-def process_claim(data):
+# ================= BILL FIELDS =================
+def claim_fields(ctx):
+    """
+    Invoice date, number and total of a bill. Cached per file under
+    "claim_fields": vali.py caches its own set, with the image-based vendor.
+    """
+    fields = ctx.cached("claim_fields") or {}
+    if not {"invoice_date", "invoice_number", "total"} <= fields.keys():
+        with stage("roi"):
+            fields = roi_fields(ctx)
+        if fields is None:
+            with stage("ocr"):
+                text = incremental_text(ctx)
+            with stage("extract"):
+                fields = extract_fields(text)
+            fields = refine_fields(ctx, fields)
+        ctx.remember(claim_fields=fields)
+    return fields
+
+
+# ================= ATTACHMENT PROCESSOR =================
+def process_attachment(att, v, emp, c_id, dup_index):
+    """Extract one attachment; returns a terminal status dict or {"records", "total"}."""
+
+    subtype = v.get("Sub_Type")
+    ctype = v.get("Sub_Type")
+
+    with stage("decode"):
+        upload = load_attachment(att)
+    try:
+        return extract_attachment(upload, subtype, ctype, emp, c_id, v, dup_index)
+    finally:
+        if upload is not att.get("upload"):
+            upload.close()
 
-    claim = data.get("Claim", {})
-    emp = claim.get("Employee_Code")
-    c_id = claim.get("Claim_ID")
-    total_expected = float(claim.get("Total_Bill_Amount", 0))
 
-    vouchers = claim.get("Vouchers", [])
-    db_df = pd.read_excel("claim.xlsx") if os.path.exists("claim.xlsx") else pd.DataFrame()
+def extract_attachment(upload, subtype, ctype, emp, c_id, v, dup_index):
 
-    grand_total = 0
-    all_records = []
+    # DAILY EXPENSE
+    if subtype == "Daily_Expense":
 
-    for v in vouchers:
+        if upload.kind != "excel":
+            return {
+                "status": "INVALID_ATTACHMENT",
+                "message": "Daily_Expense requires Excel attachment"
+            }
 
-        subtype = v.get("Sub_Type")
-        ctype = v.get("Sub_Type")
-        voucher_total = 0
+        return process_daily_expense_excel(
+            upload, emp, ctype, v, dup_index,c_id
+        )
 
-        attachments = v.get("Attachments", [])
-        if not attachments:
-            continue
+    # INDIVIDUAL EXPENSE
+    if subtype == "Individual_Expense":
 
-        for att in attachments:
+        if upload.kind == "excel":
+            return {
+                "status": "INVALID_ATTACHMENT",
+                "message": "Individual_Expense requires PDF or Image"
+            }
 
-            path = decode_base64_file(att.get("base64File"))
+        fields = claim_fields(DocumentContext.from_upload(upload))
 
-            # DAILY EXPENSE
-            if subtype == "Daily_Expense":
+        inv = fields["invoice_number"]
+        date_text = fields["invoice_date"]
+        invoice_date = normalize_date(date_text)
+        total = float(fields["total"] or 0)
 
-                if not path.endswith(".xlsx"):
-                    return {
-                        "status": "INVALID_ATTACHMENT",
-                        "message": "Daily_Expense requires Excel attachment"
-                    }
+        with stage("dedupe"):
+            duplicate = check_duplicate(dup_index, emp, inv, str(invoice_date), total)
+        if duplicate:
+            return {
+                "status": "DUPLICATE_CLAIM",
+                "invoice_number": inv
+            }
 
-                result = process_daily_expense_excel(
-                    path, emp, ctype, v, db_df,c_id
-                )
+        return {
+            "records": [{
+                "Employee_Code": emp,
+                "Invoice_No": inv,
+                "Date": str(invoice_date),
+                "Total_Amount": total,
+                "Claim_Type": ctype,
+                "Claim_ID":c_id,
+                "Status":"Approved"
+            }],
+            "total": total
+        }
 
-                if "status" in result and result["status"] != "OK":
-                    return result
+    return {"records": [], "total": 0}
 
-                all_records.extend(result["records"])
-                voucher_total += result["total"]
-                continue
 
-            # INDIVIDUAL EXPENSE
-            if subtype == "Individual_Expense":
+def is_terminal(result):
+    return "status" in result and result["status"] != "OK"
+
+
+def get_claim_executor():
+    global _claim_executor
+
+    with _claim_executor_lock:
+        if _claim_executor is None:
+            _claim_executor = ThreadPoolExecutor(
+                max_workers=CLAIM_WORKERS, thread_name_prefix="attachment"
+            )
+    return _claim_executor
 
-                if path.endswith(".xlsx"):
-                    return {
-                        "status": "INVALID_ATTACHMENT",
-                        "message": "Individual_Expense requires PDF or Image"
-                    }
 
-                text = extract_text_full(path)
+# ================= CLAIM PROCESSOR =================
+def process_claim(data):
 
-                inv = extract_invoice(text)
-                date_text = extract_date_from_text(text)
-                invoice_date = normalize_date(date_text)
-                total = float(extract_total(text) or 0)
+    claim = data.get("Claim", {})
+    emp = claim.get("Employee_Code")
+    c_id = claim.get("Claim_ID")
+    total_expected = float(claim.get("Total_Bill_Amount", 0))
 
-                if check_duplicate(db_df, emp, inv, str(invoice_date), total):
-                    return {
-                        "status": "DUPLICATE_CLAIM",
-                        "invoice_number": inv
-                    }
+    vouchers = claim.get("Vouchers", [])
+    dup_index = get_claim_index()
+
+    # Attachments are extracted concurrently, but results are merged in
+    # voucher/attachment order so totals and error precedence match a
+    # sequential walk. Once attachment i is terminal, nothing after it
+    # can change the outcome, so later work is cancelled.
+    executor = get_claim_executor()
+    futures = {}
+    for v in vouchers:
+        for att in v.get("Attachments", []) or []:
+            futures[executor.submit(process_attachment, att, v, emp, c_id, dup_index)] = len(futures)
 
-                voucher_total += total
+    outcomes = [None] * len(futures)
+    first_terminal = len(futures)
 
-                all_records.append({
-                    "Employee_Code": emp,
-                    "Invoice_No": inv,
-                    "Date": str(invoice_date),
-                    "Total_Amount": total,
-                    "Claim_Type": ctype,
-                    "Claim_ID":c_id,
-                    "Status":"Approved"
-                })
+    try:
+        for future in as_completed(futures):
+            i = futures[future]
+            if i > first_terminal:
+                continue
 
-        grand_total += voucher_total
+            try:
+                outcomes[i] = (future.result(), None)
+            except Exception as e:
+                outcomes[i] = (None, e)
+
+            result, error = outcomes[i]
+            if error is not None or is_terminal(result):
+                first_terminal = i
+                for other, j in futures.items():
+                    if j > i:
+                        other.cancel()
+    finally:
+        for future in futures:
+            future.cancel()
+
+    grand_total = 0
+    all_records = []
+
+    for result, error in outcomes[:first_terminal + 1]:
+        if error is not None:
+            raise error
+        if is_terminal(result):
+            return result
+
+        all_records.extend(result["records"])
+        grand_total += result["total"]
 
     if grand_total > total_expected:
         return {
@@ -257,8 +432,9 @@ def process_claim(data):
             "total_attachments_amount": grand_total
         }
 
-    insert_into_excel(all_records)
-    insert_into_dynamodb(all_records)
+    with stage("persist"):
+        insert_into_store(all_records)
+        insert_into_dynamodb(all_records)
 
     return {
         "status": "NEW_CLAIM",
@@ -287,64 +463,99 @@ def reject_claim(body):
         }
     # ====================================================
 
-    DB = "claim.xlsx"
+    # Update status on every row of the claim
+    rows = get_store().update_claim_status(claim_id, updated_status)
 
-    if not os.path.exists(DB):
-        return {
-            "status": "ERROR",
-            "message": "Database file not found"
-        }
-
-    df = pd.read_excel(DB)
-
-    if "Claim_ID" not in df.columns:
-        return {
-            "status": "ERROR",
-            "message": "Claim_ID column missing in database"
-        }
-
-    # Find matching claim rows
-    mask = df["Claim_ID"] == claim_id
-
-    if not mask.any():
+    if not rows:
         return {
             "status": "NOT_FOUND",
             "message": f"No records found for Claim_ID {claim_id}"
         }
 
-    # Update status
-    df.loc[mask, "Status"] = updated_status
-
-    # Save back to Excel
-    df.to_excel(DB, index=False)
-
     # Update status in DynamoDB
-    for _, row in df[mask].iterrows():
-    
-        table.update_item(
-            Key={
-                "Claim_ID": str(row["Claim_ID"]),
-                "Invoice_No": str(row["Invoice_No"])
-            },
-            UpdateExpression="SET #s = :val",
-            ExpressionAttributeNames={
-                "#s": "Status"
-            },
-            ExpressionAttributeValues={
-                ":val": updated_status
+    dynamo_writer.update_items(
+        [
+            {
+                "Claim_ID": str(row_claim_id),
+                "Invoice_No": str(row_invoice_no)
             }
-        )
+            for row_claim_id, row_invoice_no in rows
+        ],
+        UpdateExpression="SET #s = :val",
+        ExpressionAttributeNames={
+            "#s": "Status"
+        },
+        ExpressionAttributeValues={
+            ":val": updated_status
+        }
+    )
 
     return {
         "status": "SUCCESS",
         "message": f"Claim {claim_id} updated to {updated_status}",
-        "rows_updated": int(mask.sum())
+        "rows_updated": len(rows)
     }
 
+def discard_parked_files(data):
+    """Delete the attachment files parked on disk for an async claim."""
+    for v in data.get("Claim", {}).get("Vouchers", []):
+        for att in v.get("Attachments", []) or []:
+            if att.get("path") and os.path.exists(att["path"]):
+                os.remove(att["path"])
+
+
+def process_claim_job(data):
+    """Job handler: process_claim, then drop the files parked for it."""
+    try:
+        return process_claim(data)
+    finally:
+        discard_parked_files(data)
+
+# ================= ASYNC JOBS =================
+# One job pool per host. Under serve.py it runs in its own process
+# (start_job_pool) and the HTTP workers only submit to and read the
+# queue; serve.py sets JOB_POOL_EMBEDDED=0 for them. A standalone
+# `python app.py` starts the pool itself on the first async submit.
+JOB_POOL_EMBEDDED = os.environ.get("JOB_POOL_EMBEDDED", "1") == "1"
+
+_job_queue = None
+_job_pool = None
+_job_pool_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _job_queue
+
+    with _job_pool_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+    return _job_queue
+
+
+def start_job_pool():
+    # jobs whose workers kept dying are failed by the queue; their files go too
+    return WorkerPool(JobQueue(), "app:process_claim_job", cleanup="app:discard_parked_files").start()
+
+
+def submit_job(data):
+    """Queue a claim for the job pool; raises jobs.QueueFull when the queue is full."""
+    global _job_pool
+
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a claim JSON object")
+
+    if JOB_POOL_EMBEDDED:
+        with _job_pool_lock:
+            if _job_pool is None:
+                _job_pool = start_job_pool()
+    return get_job_queue().submit(data)
+
+
 # ================= FLASK API =================
 app = Flask(__name__)
 
 @app.route("/process-invoice", methods=["POST"])
+@track_request("/process-invoice")
 def api():
 
     # ================= AUTH VALIDATION =================
@@ -359,12 +570,80 @@ def api():
     # ===================================================
 
     try:
+        if request.args.get("async") == "1":
+            job_id = submit_job(request.get_json())
+            return jsonify({"status": "QUEUED", "job_id": job_id}), 202
+
         return jsonify(process_claim(request.get_json()))
+    except QueueFull as e:
+        return jsonify({"status": "BUSY", "message": str(e)}), 503
+    except Exception as e:
+        return jsonify({"status": "ERROR1", "message": str(e)})
+
+#==============Binary Upload ===============
+@app.route("/process-invoice/upload", methods=["POST"])
+@track_request("/process-invoice/upload")
+def upload_api():
+    # ================= AUTH VALIDATION =================
+    username = request.headers.get("X-Username")
+    password = request.headers.get("X-Password")
+
+    if not username or not password:
+        return jsonify({"error": "Authentication headers missing"}), 401
+
+    if username != VALID_USERNAME or password != VALID_PASSWORD:
+        return jsonify({"error": "Invalid username or password"}), 401
+    # ===================================================
+
+    persist = request.args.get("async") == "1"
+
+    try:
+        data, uploads = claim_from_upload(request, persist=persist)
+    except ValueError as e:
+        return jsonify({"status": "ERROR", "message": str(e)}), 400
+
+    if persist:
+        try:
+            job_id = submit_job(data)
+        except QueueFull as e:
+            discard_parked_files(data)
+            return jsonify({"status": "BUSY", "message": str(e)}), 503
+        except Exception as e:
+            discard_parked_files(data)
+            return jsonify({"status": "ERROR1", "message": str(e)})
+        return jsonify({"status": "QUEUED", "job_id": job_id}), 202
+
+    try:
+        return jsonify(process_claim(data))
     except Exception as e:
         return jsonify({"status": "ERROR1", "message": str(e)})
+    finally:
+        for upload in uploads:
+            upload.close()
+
+#==============Async Job Status ===============
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_api(job_id):
+    # ================= AUTH VALIDATION =================
+    username = request.headers.get("X-Username")
+    password = request.headers.get("X-Password")
+
+    if not username or not password:
+        return jsonify({"error": "Authentication headers missing"}), 401
+
+    if username != VALID_USERNAME or password != VALID_PASSWORD:
+        return jsonify({"error": "Invalid username or password"}), 401
+    # ===================================================
+
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"status": "NOT_FOUND", "message": f"No job {job_id}"}), 404
+
+    return jsonify(job)
 
 #==============Status Reject System ===============
 @app.route("/reject",methods=["POST"])
+@track_request("/reject")
 def reject_api():
     # ================= AUTH VALIDATION =================
     username = request.headers.get("X-Username")
@@ -382,6 +661,12 @@ def reject_api():
     except Exception as e:
         return jsonify({"status": "ERROR1", "message": str(e)})
 
+#==============Metrics ===============
+# Prometheus text format, per process. Async jobs run in the job
+# worker processes and are not counted here.
+@app.route("/metrics", methods=["GET"])
+def metrics_api():
+    return metrics_view()
 
 
 if __name__ == "__main__":
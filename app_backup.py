@@ -2,10 +2,12 @@ from flask import Flask, request, jsonify
 from vali import process_invoice
 from valiex import process_daily_expense_excel
 import os
-import base64
-import uuid
 import magic
 
+from document import DocumentContext
+from uploads import Upload
+from metrics import stage, track_request, metrics_view
+
 
 app = Flask(__name__)
 
@@ -37,6 +39,7 @@ def process_test():
 # MAIN API
 # -------------------------
 @app.route("/process-invoice", methods=["POST"])
+@track_request("/process-invoice")
 def process_invoice_api():
 
     # 1️⃣ AUTH HEADERS
@@ -50,7 +53,10 @@ def process_invoice_api():
         return jsonify({"error": "Invalid username or password"}), 401
 
     # 2️⃣ REQUEST BODY
-    data = request.get_json(silent=True)
+    # multipart/form-data: fields as form values, the file as part "file"
+    # (no base64 inflation); otherwise the legacy JSON body.
+    part = request.files.get("file") if request.mimetype == "multipart/form-data" else None
+    data = request.form if part is not None else request.get_json(silent=True)
 
     if not data:
         return jsonify({"error": "Invalid JSON body"}), 400
@@ -62,23 +68,32 @@ def process_invoice_api():
     emp_code = data.get("emp_code")
     known_date = data.get("known_date")
     known_total = data.get("known_total")
-    if not base64_string:
+    if part is None and not base64_string:
         return jsonify({"error": "base64File is required"}), 400
 
     claim_type = normalize_claim_type(claim_type_raw)
 
     # 3️⃣ DECODE FILE
+    # Held in memory (only very large files spill to a temp file), and
+    # always released when the request is done.
     try:
-        file_bytes = base64.b64decode(base64_string)
+        with stage("decode"):
+            if part is not None:
+                upload = Upload.from_stream(part.stream)
+            else:
+                upload = Upload.from_base64(base64_string)
     except Exception:
         return jsonify({"error": "Invalid base64 data"}), 400
 
-    # TEMP FILE (extension decided later)
-    temp_path = f"/tmp/{uuid.uuid4()}"
-    with open(temp_path, "wb") as f:
-        f.write(file_bytes)
+    with upload:
+        return process_upload(
+            upload, claim_type, processed_by, limit, emp_code, known_date, known_total
+        )
+
 
-    mime = magic.from_buffer(file_bytes, mime=True)
+def process_upload(upload, claim_type, processed_by, limit, emp_code, known_date, known_total):
+
+    mime = magic.from_buffer(upload.head, mime=True)
 
     if mime == "application/pdf":
         ext = ".pdf"
@@ -116,15 +131,12 @@ def process_invoice_api():
 		"ExtType":f"{ext} filepath"
             }), 400
 
-        file_path = f"{temp_path}{ext}"
-        os.rename(temp_path, file_path)
-
      #   df = load_or_create_excel()
       #  before_count = len(df)
 
 #        df = process_invoice(file_path, df,known_date, known_total, claim_type)
         result = process_invoice(
-            file_path=file_path,
+            file_path=DocumentContext.from_upload(upload),
             known_date=known_date,
             known_total=known_total,
             claim_type="Individual Expense",
@@ -162,10 +174,7 @@ def process_invoice_api():
                 "reason": "LIMIT_REQUIRED"
             }), 400
 
-        file_path = f"{temp_path}{ext}"
-        os.rename(temp_path, file_path)
-
-        result = process_daily_expense_excel(file_path, limit)
+        result = process_daily_expense_excel(upload, limit)
 
         return jsonify({
             "status": result["status"],
@@ -186,5 +195,13 @@ def process_invoice_api():
         }), 400
 
 
+# -------------------------
+# METRICS (Prometheus text format, this process only)
+# -------------------------
+@app.route("/metrics", methods=["GET"])
+def metrics_api():
+    return metrics_view()
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
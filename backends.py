@@ -0,0 +1,76 @@
+import os
+import time
+import logging
+import importlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# LAZY BACKENDS
+# -------------------------------------------------------------
+# OCR / PDF libraries are imported the first time a request needs them,
+# not when app.py is imported: a worker that only ever sees Excel
+# uploads never loads them, and cold start is a plain Flask import.
+#
+#     pytesseract = backends.get("pytesseract")
+#
+# Names map to a loader; modules that need no setup map to a module path.
+BACKENDS = {
+    "pytesseract": "pytesseract",
+    "pdfplumber": "pdfplumber",
+    "pdf2image": "pdf2image",
+    "pypdfium2": "pypdfium2",
+    "fitz": "fitz",
+    "easyocr": "easyocr",
+}
+
+# comma-separated backends to load eagerly, e.g. by a preforking server
+# before it forks: BACKEND_PRELOAD=pytesseract,pypdfium2,fitz
+BACKEND_PRELOAD = [n for n in os.environ.get("BACKEND_PRELOAD", "").split(",") if n]
+
+_loaded = {}
+_lock = threading.Lock()
+
+# Neither PDFium nor MuPDF (as PyMuPDF drives it) may be called from two
+# threads at once, even on different documents, and request threads (and
+# the attachment pool) do render and read text layers concurrently. Hold
+# this around every pypdfium2/fitz call: render.py, textlayer.py.
+pdf_lock = threading.Lock()
+
+
+def register(name, loader):
+    """Add or replace a backend; loader is a module path or a zero-argument callable."""
+    with _lock:
+        BACKENDS[name] = loader
+        _loaded.pop(name, None)
+
+
+def get(name):
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+
+    with _lock:
+        if name not in _loaded:
+            loader = BACKENDS[name]
+            began = time.perf_counter()
+            _loaded[name] = importlib.import_module(loader) if isinstance(loader, str) else loader()
+            logger.info("backend %s loaded in %.2fs", name, time.perf_counter() - began)
+        return _loaded[name]
+
+
+def loaded():
+    return sorted(_loaded)
+
+
+def preload(names=None):
+    """Load backends now (default BACKEND_PRELOAD); returns the names that failed."""
+    failed = []
+    for name in BACKEND_PRELOAD if names is None else names:
+        try:
+            get(name)
+        except Exception as e:
+            logger.warning("backend %s failed to load: %s", name, e)
+            failed.append(name)
+    return failed
@@ -0,0 +1,100 @@
+"""
+Daily_Expense sheet validation: per-row loop vs. one vectorized pass.
+
+Builds a claim history in a DuplicateIndex and a sheet of --rows rows,
+checks both implementations return the same result, then times them.
+
+    python -m benchmarks.daily_expense --rows 10000 --history 100000
+"""
+import time
+import random
+import argparse
+from datetime import date, timedelta
+
+import pandas as pd
+
+from app import check_duplicate, normalize_date, validate_daily_expense
+from dup_index import DuplicateIndex
+
+EMP = "E1001"
+
+
+def legacy_validate(df, emp, ctype, voucher, dup_index, c_id):
+    """The original iterrows implementation, kept as the reference."""
+    voucher_amount = float(voucher.get("Bill_Amount", 0))
+    total_excel_amount = 0
+    records = []
+
+    for _, row in df.iterrows():
+        inv = str(row["Invoice_No"])
+        date_obj = normalize_date(row["Date"])
+        amt = float(row["Total_Amount"])
+
+        if check_duplicate(dup_index, emp, inv, str(date_obj), amt):
+            return {"status": "DUPLICATE_CLAIM", "invoice_number": inv}
+
+        total_excel_amount += amt
+        records.append({
+            "Employee_Code": emp, "Invoice_No": inv, "Date": str(date_obj),
+            "Total_Amount": amt, "Claim_Type": ctype, "Claim_ID": c_id, "Status": "Approved",
+        })
+
+    if total_excel_amount > voucher_amount:
+        return {"status": "VOUCHER_AMOUNT_EXCEEDED", "excel_total": total_excel_amount,
+                "voucher_amount": voucher_amount}
+    return {"records": records, "total": total_excel_amount}
+
+
+def make_data(rows, history, dup_at, rng):
+    start = date(2024, 1, 1)
+    days = [(start + timedelta(days=i)).strftime("%d-%m-%Y") for i in range(365)]
+
+    df = pd.DataFrame({
+        "Invoice_No": [f"D-{i:06d}" for i in range(rows)],
+        "Date": [rng.choice(days) for _ in range(rows)],
+        "Total_Amount": [round(rng.uniform(20, 900), 2) for _ in range(rows)],
+    })
+
+    index = DuplicateIndex()
+    for i in range(history):
+        index.add(f"E{rng.randint(1000, 1999)}", f"D-{rng.randint(0, 10 ** 6):06d}",
+                  str(normalize_date(rng.choice(days))), round(rng.uniform(20, 900), 2))
+
+    if dup_at is not None:
+        row = df.iloc[dup_at]
+        index.add(EMP, row["Invoice_No"], str(normalize_date(row["Date"])), row["Total_Amount"] + 3)
+    return df, index
+
+
+def timed(fn, *args):
+    began = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - began
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=10000)
+    ap.add_argument("--history", type=int, default=100000)
+    ap.add_argument("--dup-at", type=int, default=None, help="plant a duplicate at this row")
+    ap.add_argument("--seed", type=int, default=11)
+    args = ap.parse_args(argv)
+
+    df, index = make_data(args.rows, args.history, args.dup_at, random.Random(args.seed))
+    voucher = {"Bill_Amount": 10 ** 9}
+
+    legacy, t_legacy = timed(legacy_validate, df, EMP, "Daily_Expense", voucher, index, "C1")
+    vector, t_vector = timed(validate_daily_expense, df, EMP, "Daily_Expense", voucher, index, "C1")
+
+    same = legacy.get("status") == vector.get("status") and legacy.get("invoice_number") == vector.get("invoice_number") \
+        and legacy.get("records") == vector.get("records")
+
+    print(f"rows={args.rows} history={args.history} dup_at={args.dup_at}")
+    print(f"  iterrows   {t_legacy * 1000:9.1f} ms")
+    print(f"  vectorized {t_vector * 1000:9.1f} ms  ({t_legacy / max(t_vector, 1e-9):.1f}x)")
+    print(f"  results match: {same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
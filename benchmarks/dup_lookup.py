@@ -0,0 +1,114 @@
+"""
+Duplicate-lookup cost vs. claimed_invoice size.
+
+Compares the projected, paginated fallback scan with the Invoice_Key
+GSI query against an in-memory stand-in that pages like DynamoDB
+(1 MB of items read per call, filter applied after the read).
+
+    python -m benchmarks.dup_lookup --sizes 1000 10000 100000
+"""
+import time
+import random
+import argparse
+from collections import defaultdict
+
+from invoice_index import INVOICE_KEY_ATTR, invoice_key, query_amounts, scan_amounts
+
+PAGE_BYTES = 1024 * 1024
+TEXT_BYTES = 3000  # typical String_Extracted blob
+CLAIM_TYPES = ["Travel", "Food", "Hotel", "Fuel"]
+
+
+class FakeTable:
+    """Just enough of a boto3 Table for invoice_index lookups."""
+
+    name = "claimed_invoice"
+
+    def __init__(self, items):
+        self.items = items
+        self.by_key = defaultdict(list)
+        for item in items:
+            self.by_key[item[INVOICE_KEY_ATTR]].append({"Total_Amount": item["Total_Amount"]})
+
+        self.calls = 0
+        self.items_read = 0
+
+    def _page(self, rows, size, start):
+        budget, end = PAGE_BYTES, start
+        while end < len(rows) and budget > 0:
+            budget -= size(rows[end])
+            end += 1
+        self.calls += 1
+        self.items_read += end - start
+        return rows[start:end], (end if end < len(rows) else None)
+
+    def scan(self, ExpressionAttributeValues, ExclusiveStartKey=None, **kwargs):
+        start = ExclusiveStartKey["i"] if ExclusiveStartKey else 0
+        rows, nxt = self._page(self.items, lambda it: TEXT_BYTES + 200, start)
+        inv, ct = ExpressionAttributeValues[":inv"], ExpressionAttributeValues[":ct"]
+        out = {"Items": [
+            {"Total_Amount": it["Total_Amount"]}
+            for it in rows if it["Invoice_Number"] == inv and it["Claim_Type"] == ct
+        ]}
+        if nxt is not None:
+            out["LastEvaluatedKey"] = {"i": nxt}
+        return out
+
+    def query(self, ExpressionAttributeValues, ExclusiveStartKey=None, **kwargs):
+        start = ExclusiveStartKey["i"] if ExclusiveStartKey else 0
+        rows, nxt = self._page(self.by_key.get(ExpressionAttributeValues[":k"], []), lambda it: 64, start)
+        out = {"Items": rows}
+        if nxt is not None:
+            out["LastEvaluatedKey"] = {"i": nxt}
+        return out
+
+
+def make_items(n, rng):
+    items = []
+    for i in range(n):
+        inv, ct = f"INV-{i:07d}", rng.choice(CLAIM_TYPES)
+        items.append({
+            "File_Hash": f"{i:032x}",
+            "Invoice_Number": inv,
+            "Claim_Type": ct,
+            "Total_Amount": round(rng.uniform(50, 5000), 2),
+            INVOICE_KEY_ATTR: invoice_key(inv, ct),
+        })
+    return items
+
+
+def measure(table, fn, probes):
+    table.calls = table.items_read = 0
+    began = time.perf_counter()
+    for inv, ct in probes:
+        fn(table, inv, ct)
+    elapsed = time.perf_counter() - began
+    n = len(probes)
+    return {
+        "ms": 1000 * elapsed / n,
+        "calls": table.calls / n,
+        "items_read": table.items_read / n,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--probes", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    print(f"{'items':>9} {'path':>6} {'ms/lookup':>10} {'calls':>7} {'items read':>11}")
+
+    for size in args.sizes:
+        table = FakeTable(make_items(size, rng))
+        probes = [(it["Invoice_Number"], it["Claim_Type"]) for it in rng.sample(table.items, min(args.probes, size))]
+
+        for label, fn in (("scan", scan_amounts), ("query", query_amounts)):
+            r = measure(table, fn, probes)
+            print(f"{size:>9} {label:>6} {r['ms']:>10.3f} {r['calls']:>7.1f} {r['items_read']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
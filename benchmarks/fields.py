@@ -0,0 +1,85 @@
+"""
+Field extraction: per-field functions vs. the single-scan engine.
+
+Builds long multi-page OCR-like texts, checks fields.extract_fields
+returns exactly what date/invoice/total/ven return, and times both.
+
+    python -m benchmarks.fields --pages 1 10 50 --repeat 20
+"""
+import time
+import random
+import argparse
+
+from date import extract_date_from_text
+from invoice import extract_invoice
+from total import extract_total
+from fields import extract_fields, find_vendor
+
+FILLER = [
+    "Item description qty rate", "Paneer tikka 2 x 180.00", "Service charge 5%",
+    "CGST 2.5% SGST 2.5%", "Thank you visit again", "Table 12 Cover 4 Steward Ramesh",
+    "GSTIN 27AABCU9603R1ZM", "Shop no 4 Linking Road Bandra West Mumbai 400050",
+    "FSSAI Lic No 11517011000128", "Round off 0.40", "Terms and conditions apply",
+]
+TAILS = [
+    "Invoice No: AB12345678\nDate: 14/02/2024\nGrand Total Rs. 1,845.00",
+    "Bill No 4471\nBill Date 03-Mar-2024\nTotal Amount 2,310.50",
+    "Paid via UPI 780.00\nOrder OD123456789012",
+    "Net Amount 96.00",
+]
+
+
+def make_text(pages, rng, lines_per_page=45):
+    out = []
+    for _ in range(pages):
+        out.extend(rng.choice(FILLER) for _ in range(lines_per_page))
+    # the fields sit at the end, so the per-field loops scan everything first
+    out.append(rng.choice(TAILS))
+    return "\n".join(out)
+
+
+def legacy_fields(text):
+    return {
+        "invoice_date": extract_date_from_text(text),
+        "invoice_number": extract_invoice(text),
+        "total": extract_total(text),
+        "vendor": find_vendor(text),
+    }
+
+
+def best_of(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - began)
+    return best / len(texts)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50])
+    ap.add_argument("--docs", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    ok = True
+    print(f"{'pages':>5} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}  parity")
+
+    for pages in args.pages:
+        texts = [make_text(pages, rng) for _ in range(args.docs)]
+        parity = all(legacy_fields(t) == extract_fields(t) for t in texts)
+        ok &= parity
+
+        t_legacy = best_of(legacy_fields, texts, args.repeat)
+        t_engine = best_of(extract_fields, texts, args.repeat)
+        print(f"{pages:>5} {t_legacy * 1000:>10.2f} {t_engine * 1000:>10.2f} {t_legacy / t_engine:>7.1f}x  {parity}")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+"""
+Throughput of serve.py as the worker count grows.
+
+For each worker count this starts `python serve.py <target>`. It then
+keeps 2 x workers client threads busy for --duration seconds and
+reports requests/sec, p50/p95 latency, and speedup over one worker.
+The default target is cpu_app below: each request burns a fixed amount
+of pure-Python CPU (LOAD_WORK_MS, default 20) and touches no OCR, DynamoDB or disk.
+Throughput should therefore grow roughly linearly up to the core count.
+Point --target/--path at a real endpoint to load the API itself.
+
+    python -m benchmarks.load
+    python -m benchmarks.load --workers 1 2 4 8 --duration 15
+    python -m benchmarks.load --target app:app --path /metrics
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import subprocess
+import http.client
+
+WORK_MS = float(os.environ.get("LOAD_WORK_MS", "20"))
+
+
+# -------------------------------------------------------------
+# SYNTHETIC APP
+# -------------------------------------------------------------
+def _calibrate():
+    """Loop iterations that take about 1 ms of CPU on this machine."""
+    n, began = 200000, time.process_time()
+    x = 0
+    for i in range(n):
+        x += i * i
+    return max(1, int(n / ((time.process_time() - began) * 1000)))
+
+
+_PER_MS = None
+
+
+def cpu_app(environ, start_response):
+    global _PER_MS
+    if _PER_MS is None:
+        _PER_MS = _calibrate()
+
+    x = 0
+    for i in range(int(_PER_MS * WORK_MS)):
+        x += i * i
+
+    body = json.dumps({"status": "OK", "pid": os.getpid()}).encode()
+    start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+    return [body]
+
+
+# -------------------------------------------------------------
+# LOAD GENERATOR
+# -------------------------------------------------------------
+def percentile(sorted_xs, q):
+    k = (len(sorted_xs) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_xs) - 1)
+    return sorted_xs[lo] + (sorted_xs[hi] - sorted_xs[lo]) * (k - lo)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, path, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", path)
+            conn.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def drive(port, path, clients, duration):
+    latencies, errors, pids = [], [0], set()
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        mine, failed, seen = [], 0, set()
+        while time.monotonic() < stop_at:
+            began = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                conn.request("GET", path)
+                response = conn.getresponse()
+                body = response.read()
+                conn.close()
+            except OSError:
+                failed += 1
+                continue
+            if response.status != 200:
+                failed += 1
+                continue
+            mine.append(time.perf_counter() - began)
+            try:
+                seen.add(json.loads(body).get("pid"))
+            except (ValueError, AttributeError):
+                pass
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+            pids.update(seen)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    began = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - began
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / wall,
+        "p50_ms": 1000 * percentile(latencies, 50) if latencies else None,
+        "p95_ms": 1000 * percentile(latencies, 95) if latencies else None,
+        "workers_seen": len(pids - {None}),
+    }
+
+
+def run(target, path, workers, duration):
+    port = free_port()
+    env = dict(os.environ, SERVE_PRELOAD="", SERVE_WARM_OCR="off", LOAD_WORK_MS=str(WORK_MS))
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", target, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--max-requests", "1000000"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_ready(port, path):
+            raise RuntimeError(f"server with {workers} worker(s) did not come up")
+        drive(port, path, workers * 2, 1.0)  # let every worker calibrate/warm
+        return drive(port, path, workers * 2, duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1)))
+
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--target", default="benchmarks.load:cpu_app", help="module:attr served by serve.py")
+    ap.add_argument("--path", default="/")
+    ap.add_argument("--workers", type=int, nargs="*", default=default_workers)
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds of load per worker count")
+    args = ap.parse_args(argv)
+
+    results = []
+    for n in args.workers:
+        result = run(args.target, args.path, n, args.duration)
+        result["workers"] = n
+        results.append(result)
+        print(f"{n:>3} worker(s): {result['rps']:8.1f} req/s  p95 {result['p95_ms'] or 0:7.1f} ms", file=sys.stderr)
+
+    base = results[0]["rps"] / results[0]["workers"] if results and results[0]["rps"] else None
+    for r in results:
+        r["speedup"] = r["rps"] / base if base else None
+        r["efficiency"] = r["rps"] / (base * r["workers"]) if base else None
+
+    print(json.dumps({"cores": cores, "work_ms": WORK_MS, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
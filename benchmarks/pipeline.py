@@ -0,0 +1,302 @@
+"""
+Per-stage timings of the claim pipeline over a corpus of bills.
+
+Runs every PDF/image in bills_folder (plus any --corpus dirs/files)
+through the real stages - base64 decode, PDF text layer, rasterization,
+OCR, vendor OCR, field extraction, duplicate check and persistence -
+and reports p50/p95/max latency, CPU time, peak RSS and pages/sec per
+stage as JSON. A file that errors is listed under "errors" and fails the
+run (exit 1): a broken stage would otherwise just look faster. DynamoDB is replaced by in-process stubs, the claim
+store by a throwaway SQLite file, and the OCR result cache is off, so
+it runs offline and measures real work. CPU time covers this process
+and exited children; the long-lived OCR page-pool workers are not
+included, so compare wall time for the "ocr" stage.
+
+    python -m benchmarks.pipeline --out bench.json
+    python -m benchmarks.pipeline --save-baseline baseline.json
+    python -m benchmarks.pipeline --baseline baseline.json --threshold 0.15
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import platform
+import tempfile
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from uploads import Upload
+from document import DocumentContext, ocr_pages
+from orientation import ocr_oriented
+from textlayer import page_paths, PATH_OCR
+from ven1 import get_vendor
+from fields import extract_fields
+from dup_index import DuplicateIndex
+from claim_store import ClaimStore
+from dynamo_writer import DynamoWriter
+from invoice_index import claimed_amounts
+
+STAGES = [
+    "decode", "text_layer", "rasterize", "ocr", "vendor_ocr",
+    "fields", "duplicate_check", "persist",
+]
+EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg")
+
+
+# -------------------------------------------------------------
+# OFFLINE STAND-INS
+# -------------------------------------------------------------
+class StubDynamoClient:
+    """Accepts every write, like a healthy table, and keeps nothing."""
+
+    def batch_write_item(self, RequestItems):
+        return {"UnprocessedItems": {}}
+
+    def update_item(self, **kwargs):
+        return {}
+
+
+class StubTable:
+    name = "claimed_invoice"
+
+    def query(self, **kwargs):
+        return {"Items": []}
+
+    def scan(self, **kwargs):
+        return {"Items": []}
+
+
+# -------------------------------------------------------------
+# MEASUREMENT
+# -------------------------------------------------------------
+def _cpu():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.cpu = defaultdict(float)
+        self.pages = defaultdict(int)
+        self.rss = {}
+
+    def run(self, stage, fn, *args, pages=0):
+        cpu, began = _cpu(), time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.samples[stage].append(time.perf_counter() - began)
+            self.cpu[stage] += _cpu() - cpu
+            self.pages[stage] += pages
+            self.rss[stage] = _peak_rss_mb()
+
+    def report(self):
+        out = {}
+        for stage in STAGES:
+            xs = sorted(self.samples.get(stage, []))
+            if not xs:
+                continue
+            wall = sum(xs)
+            out[stage] = {
+                "count": len(xs),
+                "p50_ms": 1000 * percentile(xs, 50),
+                "p95_ms": 1000 * percentile(xs, 95),
+                "max_ms": 1000 * xs[-1],
+                "total_s": wall,
+                "cpu_s": self.cpu[stage],
+                "peak_rss_mb": self.rss[stage],
+                "pages_per_s": self.pages[stage] / wall if self.pages[stage] and wall else None,
+            }
+        return out
+
+
+def percentile(sorted_xs, q):
+    if len(sorted_xs) == 1:
+        return sorted_xs[0]
+    k = (len(sorted_xs) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_xs) - 1)
+    return sorted_xs[lo] + (sorted_xs[hi] - sorted_xs[lo]) * (k - lo)
+
+
+# -------------------------------------------------------------
+# PIPELINE
+# -------------------------------------------------------------
+def corpus_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(EXTENSIONS):
+                    yield os.path.join(path, name)
+        elif os.path.isfile(path):
+            yield path
+
+
+def process_file(path, rec, dup_index, store, writer, table):
+    with open(path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode()
+
+    with rec.run("decode", Upload.from_base64, encoded) as upload:
+        ctx = DocumentContext(data=upload.data, name=os.path.basename(path), cache=False)
+
+        if ctx.kind == "pdf":
+            layer = rec.run("text_layer", ctx.text_layer)
+            pages = len(layer)
+            scanned = [i for i, path in enumerate(page_paths(layer)) if path == PATH_OCR]
+            texts = list(layer)
+            if scanned:
+                imgs = rec.run("rasterize", lambda: [ctx.page_image(i) for i in scanned])
+                for i, page_text in zip(scanned, rec.run("ocr", ocr_pages, imgs, pages=len(imgs))):
+                    texts[i] = page_text
+            text = "\n".join(t for t in texts if t and t.strip())
+        else:
+            img = rec.run("rasterize", ctx.page_image, 0)
+            pages = 1
+            text = rec.run("ocr", ocr_oriented, img, pages=1)
+
+        vendor = rec.run("vendor_ocr", get_vendor, ctx, pages=1)
+        fields = rec.run("fields", extract_fields, text)
+
+        try:
+            total = float(fields["total"])
+        except (TypeError, ValueError):
+            total = 0.0
+
+        def duplicate_check():
+            dup_index.contains("BENCH", fields["invoice_number"], str(fields["invoice_date"]), total)
+            return claimed_amounts(table, fields["invoice_number"], "Individual Expense")
+
+        rec.run("duplicate_check", duplicate_check)
+
+        record = {
+            "Employee_Code": "BENCH",
+            "Invoice_No": fields["invoice_number"],
+            "Date": str(fields["invoice_date"]),
+            "Total_Amount": total,
+            "Claim_Type": "Individual_Expense",
+            "Claim_ID": "BENCH-" + ctx.md5[:8],
+            "Status": "Approved",
+        }
+
+        def persist():
+            store.append_claims([record])
+            writer.put_items([{k: str(v) for k, v in record.items()}])
+            dup_index.add_records([record])
+
+        rec.run("persist", persist)
+
+    return {"file": path, "pages": pages, "vendor": vendor, **{k: fields[k] for k in ("invoice_number", "total")}}
+
+
+def run(paths, repeat=1):
+    rec = Recorder()
+    dup_index = DuplicateIndex()
+    writer = DynamoWriter(StubDynamoClient(), "CLAIM-DATA")
+    table = StubTable()
+    files = list(corpus_files(paths))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ClaimStore(os.path.join(tmp, "bench_claims.db"), import_legacy=False)
+
+        errors = []
+        began = time.perf_counter()
+        for _ in range(repeat):
+            for path in files:
+                try:
+                    process_file(path, rec, dup_index, store, writer, table)
+                except Exception as e:
+                    print(f"{path}: {e}", file=sys.stderr)
+                    errors.append({"file": path, "error": f"{type(e).__name__}: {e}"})
+        wall = time.perf_counter() - began
+
+    return {
+        "files": len(files),
+        "repeat": repeat,
+        "failures": len(errors),
+        "errors": errors,
+        "wall_s": wall,
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": rec.report(),
+    }
+
+
+# -------------------------------------------------------------
+# BASELINE COMPARE
+# -------------------------------------------------------------
+def compare(result, baseline, threshold):
+    """Stage metrics that got worse than baseline by more than threshold (a fraction)."""
+    regressions = []
+    for stage, now in result["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if before[metric] and now[metric] > before[metric] * (1 + threshold):
+                regressions.append({
+                    "stage": stage,
+                    "metric": metric,
+                    "baseline": before[metric],
+                    "current": now[metric],
+                    "change": now[metric] / before[metric] - 1,
+                })
+        if before.get("pages_per_s") and now.get("pages_per_s") \
+                and now["pages_per_s"] < before["pages_per_s"] * (1 - threshold):
+            regressions.append({
+                "stage": stage,
+                "metric": "pages_per_s",
+                "baseline": before["pages_per_s"],
+                "current": now["pages_per_s"],
+                "change": now["pages_per_s"] / before["pages_per_s"] - 1,
+            })
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--corpus", nargs="*", default=[], help="extra directories or files")
+    ap.add_argument("--no-default-corpus", action="store_true", help="skip bills_folder")
+    ap.add_argument("--repeat", type=int, default=1)
+    ap.add_argument("--out", help="write the JSON report here as well as stdout")
+    ap.add_argument("--save-baseline", help="write the report as a baseline file")
+    ap.add_argument("--baseline", help="compare against this baseline and flag regressions")
+    ap.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, as a fraction")
+    args = ap.parse_args(argv)
+
+    paths = ([] if args.no_default_corpus else ["bills_folder"]) + args.corpus
+    result = run(paths, args.repeat)
+
+    status = 1 if result["failures"] else 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["regressions"] = compare(result, json.load(f), args.threshold)
+        status = 1 if result["regressions"] else status
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if result["failures"] and args.save_baseline:
+        print(f"{result['failures']} file(s) failed, not saving a baseline", file=sys.stderr)
+        args.save_baseline = None
+    for path in filter(None, [args.out, args.save_baseline]):
+        with open(path, "w") as f:
+            f.write(report)
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
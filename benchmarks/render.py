@@ -0,0 +1,86 @@
+"""
+PDF rasterization speed per engine in render.py.
+
+Every page of every PDF in bills_folder (plus any --corpus dirs/files)
+is rendered at --dpi by each engine, --repeat times, from the bytes in
+memory. The report gives median ms per page, pages/sec and total
+megapixels per engine, plus speedup over poppler (pdf2image/pdftoppm)
+when it is installed. Engines that can't load are reported and skipped.
+
+    python -m benchmarks.render
+    python -m benchmarks.render --dpi 150 --engines pdfium pymupdf
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import render
+from benchmarks.pipeline import corpus_files
+
+
+def time_engine(engine, data, dpi, repeat):
+    seconds = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        imgs = render.render_pages(data, dpi, engine=engine)
+        seconds.append(time.perf_counter() - began)
+    return statistics.median(seconds), imgs
+
+
+def run(paths, engines, dpi, repeat):
+    pdfs = []
+    for path in corpus_files(paths):
+        if path.lower().endswith(".pdf"):
+            with open(path, "rb") as f:
+                pdfs.append(f.read())
+
+    results = {}
+    for engine in engines:
+        try:
+            seconds, pages, pixels = 0.0, 0, 0
+            for data in pdfs:
+                s, imgs = time_engine(engine, data, dpi, repeat)
+                seconds += s
+                pages += len(imgs)
+                pixels += sum(img.width * img.height for img in imgs)
+        except Exception as e:
+            print(f"{engine}: {e}", file=sys.stderr)
+            results[engine] = None
+            continue
+
+        results[engine] = {
+            "files": len(pdfs),
+            "pages": pages,
+            "total_s": seconds,
+            "ms_per_page": 1000 * seconds / pages if pages else None,
+            "pages_per_s": pages / seconds if seconds else None,
+            "megapixels": pixels / 1e6,
+        }
+
+    base = results.get("poppler")
+    if base and base["total_s"]:
+        for engine, r in results.items():
+            if r:
+                r["speedup_vs_poppler"] = base["total_s"] / r["total_s"]
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--corpus", nargs="*", default=[], help="extra directories or files")
+    ap.add_argument("--no-default-corpus", action="store_true", help="skip bills_folder")
+    ap.add_argument("--engines", nargs="*", default=sorted(render.ENGINES), choices=sorted(render.ENGINES))
+    ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per file and engine (median is kept)")
+    args = ap.parse_args(argv)
+
+    paths = ([] if args.no_default_corpus else ["bills_folder"]) + args.corpus
+    report = {"dpi": args.dpi, "engines": run(paths, args.engines, args.dpi, args.repeat)}
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
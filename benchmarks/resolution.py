@@ -0,0 +1,155 @@
+"""
+Accuracy/latency of adaptive OCR resolution against fixed 300 dpi.
+
+Every scanned PDF and image in the corpus is OCR'd twice, with the
+result cache off:
+- baseline: every page at RENDER_DPI (photos at native size);
+- adaptive: each page at its own resolution (raster.py), then refine.py
+  for any field the first pass missed.
+The report gives wall time, megapixels through Tesseract, and field
+agreement per file and in total. Agreement is with the baseline, or
+with --truth (JSON {file name: {field: value}}) when given, in which
+case the baseline's accuracy is reported too. PDFs with a text layer
+are skipped because they are never OCR'd.
+
+    python -m benchmarks.resolution
+    python -m benchmarks.resolution --corpus scans/ --truth truth.json --out resolution.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from document import DocumentContext, RENDER_DPI
+from fields import extract_fields
+from refine import refine_fields
+from textlayer import usable
+from benchmarks.pipeline import corpus_files
+
+FIELDS = ["invoice_date", "invoice_number", "total"]
+
+
+def norm(value):
+    return str(value).strip().lower().replace(" ", "") if value is not None else None
+
+
+def baseline(data, name):
+    ctx = DocumentContext(data=data, name=name, cache=False, adaptive=False)
+    began = time.perf_counter()
+    text = ctx.text
+    fields = extract_fields(text)
+    seconds = time.perf_counter() - began
+
+    pixels = sum(img.width * img.height for (i, dpi), img in ctx._pages.items() if dpi == RENDER_DPI)
+    return {"seconds": seconds, "megapixels": pixels / 1e6, "fields": {k: fields[k] for k in FIELDS}}
+
+
+def adaptive(data, name):
+    ctx = DocumentContext(data=data, name=name, cache=False, adaptive=True)
+    began = time.perf_counter()
+    text = ctx.text
+    first = extract_fields(text)
+    fields = refine_fields(ctx, first)
+    seconds = time.perf_counter() - began
+
+    pages = ctx.page_ocr.values()
+    pixels = sum(p["size"][0] * p["size"][1] + p.get("refined_px", 0) for p in pages)
+    return {
+        "seconds": seconds,
+        "megapixels": pixels / 1e6,
+        "fields": {k: fields[k] for k in FIELDS},
+        "refined": sorted(k for k in FIELDS if norm(first[k]) != norm(fields[k])),
+        "pages": [
+            {"dpi": p.get("dpi"), "scale": p.get("scale"), "line_px": p["line_px"]}
+            for p in pages
+        ],
+    }
+
+
+def agreement(fields, reference):
+    keys = [k for k in FIELDS if k in reference]
+    same = sum(norm(fields[k]) == norm(reference[k]) for k in keys)
+    return same, len(keys)
+
+
+def run(paths, truth=None):
+    rows = []
+    for path in corpus_files(paths):
+        name = os.path.basename(path)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        probe = DocumentContext(data=data, name=name, cache=False)
+        if probe.kind == "pdf" and any(usable(t) for t in probe.text_layer()):
+            continue
+
+        try:
+            base, adapt = baseline(data, name), adaptive(data, name)
+        except Exception as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+
+        reference = (truth or {}).get(name, base["fields"])
+        rows.append({
+            "file": name,
+            "baseline": base,
+            "adaptive": adapt,
+            "agreement": agreement(adapt["fields"], reference),
+            "baseline_agreement": agreement(base["fields"], reference) if truth and name in truth else None,
+        })
+    return rows
+
+
+def summarize(rows):
+    def total(side, key):
+        return sum(r[side][key] for r in rows)
+
+    same = sum(r["agreement"][0] for r in rows)
+    checked = sum(r["agreement"][1] for r in rows)
+    with_truth = [r for r in rows if r["baseline_agreement"]]
+
+    summary = {
+        "files": len(rows),
+        "baseline_s": total("baseline", "seconds"),
+        "adaptive_s": total("adaptive", "seconds"),
+        "baseline_megapixels": total("baseline", "megapixels"),
+        "adaptive_megapixels": total("adaptive", "megapixels"),
+        "field_agreement": same / checked if checked else None,
+        "refined_files": sum(bool(r["adaptive"]["refined"]) for r in rows),
+    }
+    if summary["adaptive_s"]:
+        summary["speedup"] = summary["baseline_s"] / summary["adaptive_s"]
+    if with_truth:
+        base_same = sum(r["baseline_agreement"][0] for r in with_truth)
+        base_checked = sum(r["baseline_agreement"][1] for r in with_truth)
+        summary["baseline_accuracy"] = base_same / base_checked if base_checked else None
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--corpus", nargs="*", default=[], help="extra directories or files")
+    ap.add_argument("--no-default-corpus", action="store_true", help="skip bills_folder")
+    ap.add_argument("--truth", help="JSON of expected fields per file name")
+    ap.add_argument("--out", help="write the JSON report here as well as stdout")
+    args = ap.parse_args(argv)
+
+    truth = None
+    if args.truth:
+        with open(args.truth) as f:
+            truth = json.load(f)
+
+    paths = ([] if args.no_default_corpus else ["bills_folder"]) + args.corpus
+    rows = run(paths, truth)
+    report = json.dumps({"summary": summarize(rows), "files": rows}, indent=2, default=str)
+
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Cold-start time of the API modules, checked against a budget.
+
+Each run starts a fresh interpreter, imports the Flask module, and
+issues GET /metrics through the test client. The API counts as ready
+once that request returns. The time is wall clock from interpreter
+start. The child also reports which heavy OCR/PDF backends were
+imported; none of them should be loaded until a request needs them
+(see backends.py). Exits 1 if the best of --repeat runs is over budget
+or a heavy backend was loaded at import.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --module app app_backup --budget 3 --repeat 5
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+STARTUP_BUDGET_S = float(os.environ.get("STARTUP_BUDGET_S", "3.0"))
+HEAVY_MODULES = ["torch", "easyocr", "cv2", "pytesseract", "pdfplumber", "pdf2image", "pypdfium2", "fitz"]
+
+CHILD = """
+import sys, time, json
+began = time.perf_counter()
+import importlib
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter() - began
+status = module.app.test_client().get("/metrics").status_code
+ready = time.perf_counter() - began
+print(json.dumps({
+    "import_s": imported,
+    "ready_s": ready,
+    "status": status,
+    "heavy_loaded": [m for m in json.loads(sys.argv[2]) if m in sys.modules],
+}))
+"""
+
+
+def measure(module, cwd=None):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, module, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=cwd or os.getcwd(),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--module", nargs="*", default=["app"], help="Flask modules exposing `app`")
+    ap.add_argument("--budget", type=float, default=STARTUP_BUDGET_S, help="seconds until ready")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per module; the best one counts")
+    args = ap.parse_args(argv)
+
+    report, failed = {}, False
+    for module in args.module:
+        runs = [measure(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r["ready_s"])
+        heavy = sorted({m for r in runs for m in r["heavy_loaded"]})
+        ok = best["ready_s"] <= args.budget and not heavy and best["status"] == 200
+
+        report[module] = {
+            "import_s": best["import_s"],
+            "ready_s": best["ready_s"],
+            "budget_s": args.budget,
+            "heavy_loaded": heavy,
+            "ok": ok,
+        }
+        failed = failed or not ok
+
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
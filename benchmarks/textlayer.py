@@ -0,0 +1,112 @@
+"""
+Text-layer extraction speed: PyMuPDF against pdfplumber.
+
+Every PDF in bills_folder (plus any --corpus dirs/files) has its text
+layer read by each engine in textlayer.ENGINES, --repeat times. Each
+run opens the document from memory and reads all pages. For every
+engine the report gives median seconds per file, the total, pages/sec
+and which pages would still need OCR. It also lists the files where
+the engines disagree about which pages are usable, and whether the
+fields extracted from the two texts match.
+
+    python -m benchmarks.textlayer
+    python -m benchmarks.textlayer --repeat 5 --out textlayer.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import textlayer
+from fields import extract_fields
+from benchmarks.pipeline import corpus_files
+
+FIELDS = ["invoice_date", "invoice_number", "total"]
+
+
+def time_engine(engine, data, repeat):
+    seconds = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        pages = textlayer.extract_pages(data, engine)
+        seconds.append(time.perf_counter() - began)
+    return statistics.median(seconds), pages
+
+
+def run(paths, engines, repeat=3):
+    rows = []
+    for path in corpus_files(paths):
+        if not path.lower().endswith(".pdf"):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+
+        row = {"file": os.path.basename(path)}
+        for engine in engines:
+            try:
+                seconds, pages = time_engine(engine, data, repeat)
+            except Exception as e:
+                print(f"{path} ({engine}): {e}", file=sys.stderr)
+                row[engine] = None
+                continue
+
+            text = "\n".join(t for t in pages if textlayer.usable(t))
+            fields = extract_fields(text) if text else {}
+            row[engine] = {
+                "seconds": seconds,
+                "pages": len(pages),
+                "paths": textlayer.page_paths(pages),
+                "fields": {k: fields.get(k) for k in FIELDS},
+            }
+        rows.append(row)
+    return rows
+
+
+def summarize(rows, engines):
+    summary = {}
+    for engine in engines:
+        done = [r[engine] for r in rows if r.get(engine)]
+        seconds = sum(d["seconds"] for d in done)
+        pages = sum(d["pages"] for d in done)
+        summary[engine] = {
+            "files": len(done),
+            "total_s": seconds,
+            "p50_ms": 1000 * statistics.median([d["seconds"] for d in done]) if done else None,
+            "pages_per_s": pages / seconds if seconds else None,
+            "ocr_pages": sum(d["paths"].count(textlayer.PATH_OCR) for d in done),
+        }
+
+    if len(engines) == 2:
+        a, b = engines
+        both = [r for r in rows if r.get(a) and r.get(b)]
+        if summary[a]["total_s"]:
+            summary["speedup"] = summary[b]["total_s"] / summary[a]["total_s"]
+        summary["routing_differs"] = [r["file"] for r in both if r[a]["paths"] != r[b]["paths"]]
+        summary["fields_differ"] = [r["file"] for r in both if r[a]["fields"] != r[b]["fields"]]
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--corpus", nargs="*", default=[], help="extra directories or files")
+    ap.add_argument("--no-default-corpus", action="store_true", help="skip bills_folder")
+    ap.add_argument("--engines", nargs="*", default=["pymupdf", "pdfplumber"], choices=sorted(textlayer.ENGINES))
+    ap.add_argument("--repeat", type=int, default=3, help="runs per file and engine (median is kept)")
+    ap.add_argument("--out", help="write the JSON report here as well as stdout")
+    args = ap.parse_args(argv)
+
+    paths = ([] if args.no_default_corpus else ["bills_folder"]) + args.corpus
+    rows = run(paths, args.engines, args.repeat)
+    report = json.dumps({"summary": summarize(rows, args.engines), "files": rows}, indent=2, default=str)
+
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+import os
+import sys
+import json
+import uuid
+import sqlite3
+import argparse
+import threading
+
+import pandas as pd
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+CLAIM_STORE_DB = os.environ.get("CLAIM_STORE_DB", "claims.db")
+
+# table -> (columns, legacy workbook it replaces)
+TABLES = {
+    "claims": (
+        ["Employee_Code", "Invoice_No", "Date", "Total_Amount", "Claim_Type", "Claim_ID", "Status"],
+        "claim.xlsx",
+    ),
+    "claimed_invoices": (
+        ["File Name", "File Hash", "Invoice Date", "Invoice Number", "Vendor", "Total Amount", "String Extracted"],
+        "claimed_invoices.xlsx",
+    ),
+    "expenses": (
+        ["Employee_Code", "Date", "Amount", "UploadedBy", "Claim Type", "Extra"],
+        "expenses_database.xlsx",
+    ),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    id INTEGER PRIMARY KEY,
+    "Employee_Code" TEXT,
+    "Invoice_No" TEXT,
+    "Date" TEXT,
+    "Total_Amount" REAL,
+    "Claim_Type" TEXT,
+    "Claim_ID" TEXT,
+    "Status" TEXT
+);
+CREATE INDEX IF NOT EXISTS claims_claim_id ON claims ("Claim_ID");
+CREATE INDEX IF NOT EXISTS claims_employee ON claims ("Employee_Code");
+CREATE INDEX IF NOT EXISTS claims_invoice ON claims ("Invoice_No");
+
+CREATE TABLE IF NOT EXISTS claimed_invoices (
+    id INTEGER PRIMARY KEY,
+    "File Name" TEXT,
+    "File Hash" TEXT,
+    "Invoice Date" TEXT,
+    "Invoice Number" TEXT,
+    "Vendor" TEXT,
+    "Total Amount" TEXT,
+    "String Extracted" TEXT
+);
+CREATE INDEX IF NOT EXISTS claimed_invoices_hash ON claimed_invoices ("File Hash");
+CREATE INDEX IF NOT EXISTS claimed_invoices_number ON claimed_invoices (lower(trim("Invoice Number")));
+
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY,
+    "Employee_Code" TEXT,
+    "Date" TEXT,
+    "Amount" REAL,
+    "UploadedBy" TEXT,
+    "Claim Type" TEXT,
+    "Extra" TEXT
+);
+CREATE INDEX IF NOT EXISTS expenses_key ON expenses ("Employee_Code", "Date", "Amount");
+
+CREATE TABLE IF NOT EXISTS imported (workbook TEXT PRIMARY KEY);
+"""
+
+
+def _quote(col):
+    return '"%s"' % col
+
+
+def _clean(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value != value:
+        return None
+    if hasattr(value, "item"):  # numpy scalars
+        value = value.item()
+    if not isinstance(value, (str, int, float)):
+        return str(value)
+    return value
+
+
+# -------------------------------------------------------------
+# STORE
+# -------------------------------------------------------------
+class ClaimStore:
+    """
+    SQLite (WAL) replacement for claim.xlsx, claimed_invoices.xlsx and
+    expenses_database.xlsx. Appends and status updates touch only the
+    affected rows; finance still gets workbooks via export_xlsx.
+    """
+
+    def __init__(self, path=CLAIM_STORE_DB, import_legacy=True):
+        self.path = path
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        if import_legacy:
+            for table, (_, workbook) in TABLES.items():
+                self._import_legacy(table, workbook)
+
+    # ---------------- helpers ----------------
+    def _insert(self, table, rows, workbook=None):
+        columns = TABLES[table][0]
+        sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+            table, ", ".join(_quote(c) for c in columns), ", ".join("?" * len(columns))
+        )
+        values = [tuple(_clean(row.get(c)) for c in columns) for row in rows]
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # claim the workbook inside the write lock: another process
+                # may have imported it since our check in _import_legacy
+                if workbook and self._conn.execute(
+                    "INSERT OR IGNORE INTO imported VALUES (?)", (workbook,)
+                ).rowcount == 0:
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                self._conn.executemany(sql, values)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(values)
+
+    def _import_legacy(self, table, workbook):
+        """One-time copy of an existing workbook so history isn't lost."""
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM imported WHERE workbook = ?", (workbook,)).fetchone()
+            if done or not os.path.exists(workbook):
+                return
+
+            df = pd.read_excel(workbook)
+            df.columns = [str(c).strip() for c in df.columns]
+            if table == "expenses":
+                cols = detect_expense_columns(df.columns)
+                rows = [expense_row(r, *cols) for r in df.to_dict("records")]
+            else:
+                rows = df.to_dict("records")
+
+            self._insert(table, rows, workbook=workbook)
+
+    def frame(self, table, where="", params=()):
+        columns = TABLES[table][0]
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT %s FROM %s %s ORDER BY id" % (", ".join(_quote(c) for c in columns), table, where),
+                params,
+            )
+            rows = cur.fetchall()
+        return pd.DataFrame(rows, columns=columns)
+
+    # ---------------- claims ----------------
+    def append_claims(self, records):
+        return self._insert("claims", [dict(r, Claim_ID=str(r["Claim_ID"])) for r in records])
+
+    def claims_since(self, last_id):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT id, "Employee_Code", "Invoice_No", "Date", "Total_Amount" FROM claims WHERE id > ? ORDER BY id',
+                (last_id,),
+            ).fetchall()
+
+    def update_claim_status(self, claim_id, status):
+        """Set Status on every row of a claim; returns the (Claim_ID, Invoice_No) rows touched."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    'SELECT "Claim_ID", "Invoice_No" FROM claims WHERE "Claim_ID" = ?', (str(claim_id),)
+                ).fetchall()
+                self._conn.execute('UPDATE claims SET "Status" = ? WHERE "Claim_ID" = ?', (status, str(claim_id)))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    # ---------------- claimed invoices ----------------
+    def append_invoice(self, row):
+        return self._insert("claimed_invoices", [row])
+
+    def has_file_hash(self, file_hash):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT 1 FROM claimed_invoices WHERE "File Hash" = ? LIMIT 1', (str(file_hash),)
+            ).fetchone() is not None
+
+    def invoice_totals(self, invoice_no):
+        with self._lock:
+            return [
+                r[0] for r in self._conn.execute(
+                    'SELECT "Total Amount" FROM claimed_invoices WHERE lower(trim("Invoice Number")) = ?',
+                    (str(invoice_no).strip().lower(),),
+                )
+            ]
+
+    # ---------------- daily expenses ----------------
+    def append_expenses(self, rows):
+        return self._insert("expenses", rows)
+
+    def append_new_expenses(self, batches, accept):
+        """
+        All-or-nothing append of expense rows that arrive in batches.
+
+        Rows are staged in a per-call temp table as they come, then
+        joined against expenses on the (Employee_Code, Date, Amount)
+        index, so neither the upload nor the history is held in memory.
+        accept(stats) sees {"rows", "total", "duplicates"} and decides
+        whether the staged rows are appended. Returns stats.
+        """
+        columns = TABLES["expenses"][0]
+        cols = ", ".join(_quote(c) for c in columns)
+        staged = "staged_expenses_%s" % uuid.uuid4().hex
+        stats = {"rows": 0, "total": 0.0, "duplicates": 0, "appended": False}
+
+        with self._lock:
+            self._conn.execute(
+                'CREATE TEMP TABLE %s ("Employee_Code" TEXT, "Date" TEXT, "Amount" REAL, '
+                '"UploadedBy" TEXT, "Claim Type" TEXT, "Extra" TEXT)' % staged
+            )
+
+        try:
+            for rows in batches:
+                values = [tuple(_clean(row.get(c)) for c in columns) for row in rows]
+                with self._lock:
+                    self._conn.executemany(
+                        "INSERT INTO %s (%s) VALUES (%s)" % (staged, cols, ", ".join("?" * len(columns))),
+                        values,
+                    )
+                stats["rows"] += len(values)
+                stats["total"] += sum(row["Amount"] or 0 for row in rows)
+
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # IS, not =: NULL keys matched each other in the old pandas merge
+                    stats["duplicates"] = self._conn.execute(
+                        'SELECT count(*) FROM %s s JOIN expenses e ON e."Employee_Code" IS s."Employee_Code" '
+                        'AND e."Date" IS s."Date" AND e."Amount" IS s."Amount"' % staged
+                    ).fetchone()[0]
+
+                    if accept(stats):
+                        self._conn.execute("INSERT INTO expenses (%s) SELECT %s FROM %s" % (cols, cols, staged))
+                        stats["appended"] = True
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        finally:
+            with self._lock:
+                self._conn.execute("DROP TABLE IF EXISTS temp.%s" % staged)
+
+        return stats
+
+    # ---------------- export ----------------
+    def export_xlsx(self, table, out_path):
+        df = self.frame(table)
+        if table == "expenses":
+            extra = pd.DataFrame([json.loads(x) if x else {} for x in df.pop("Extra")])
+            df = pd.concat([df, extra], axis=1)
+        df.to_excel(out_path, index=False)
+        return len(df)
+
+
+def detect_expense_columns(columns):
+    """(employee, date, amount) column names of a daily-expense sheet, None where missing."""
+    employee_col = next((c for c in columns if "employee" in c.lower() and "code" in c.lower()), None)
+    date_col = next((c for c in columns if "date" in c.lower()), None)
+    amount_col = next((c for c in columns if "amount" in c.lower()), None)
+    return employee_col, date_col, amount_col
+
+
+def expense_row(rec, employee_col="Employee_Code", date_col="Date", amount_col="Amount"):
+    """Map an uploaded daily-expense row onto the expenses table."""
+    rec = dict(rec)
+    date = pd.to_datetime(rec.pop(date_col, None), errors="coerce", dayfirst=True)
+
+    return {
+        "Employee_Code": _clean(rec.pop(employee_col, None)),
+        "Date": None if pd.isna(date) else date.isoformat(),
+        "Amount": _clean(rec.pop(amount_col, None)),
+        "UploadedBy": _clean(rec.pop("UploadedBy", None)),
+        "Claim Type": _clean(rec.pop("Claim Type", None)),
+        "Extra": json.dumps({str(k): _clean(v) for k, v in rec.items()}, default=str),
+    }
+
+
+# -------------------------------------------------------------
+# PROCESS-WIDE INSTANCE
+# -------------------------------------------------------------
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            _store = ClaimStore()
+    return _store
+
+
+# -------------------------------------------------------------
+# CLI
+# -------------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Claim store maintenance")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export-xlsx", help="write a table out as a workbook for finance")
+    exp.add_argument("--table", choices=sorted(TABLES), default="claims")
+    exp.add_argument("--out", help="defaults to the legacy workbook name of the table")
+    exp.add_argument("--db", default=CLAIM_STORE_DB)
+
+    args = ap.parse_args(argv)
+
+    if args.command == "export-xlsx":
+        out = args.out or TABLES[args.table][1]
+        count = ClaimStore(args.db).export_xlsx(args.table, out)
+        print(f"Exported {count} rows from {args.table} to {out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+import io
+import os
+import hashlib
+import logging
+import threading
+import multiprocessing
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from PIL import Image, ImageOps, ImageFilter
+
+import ocr_pool
+import ocr_cache
+import raster
+import render
+import textlayer
+from orientation import ocr_oriented, ocr_oriented_lines
+from uploads import sniff_kind
+from metrics import OCR_PAGES, PAGES_SKIPPED
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------
+# CONFIGURATION
+# -----------------------------------------------------------
+RENDER_DPI = 300
+
+# Scanned pages are OCR'd on a shared process pool. One document may only
+# keep OCR_PAGES_PER_DOCUMENT pages in flight so a long folio can't starve
+# other requests of workers. The pool is per process: serve.py, which
+# runs several app processes, sizes it to the host's CPUs divided among
+# them (1, i.e. no pool, with the default one worker per CPU).
+OCR_PAGE_WORKERS = int(os.environ.get("OCR_PAGE_WORKERS", str(os.cpu_count() or 1)))
+OCR_PAGES_PER_DOCUMENT = int(os.environ.get("OCR_PAGES_PER_DOCUMENT", "2"))
+
+
+# -------------------------------------------------------------
+# IMAGE HELPERS
+# -------------------------------------------------------------
+def binarize(img):
+    img = ImageOps.grayscale(img)
+    img = img.point(lambda x: 0 if x < 128 else 255, '1')
+    return img.filter(ImageFilter.SHARPEN)
+
+
+def join_pages(texts):
+    """Page texts joined the way the full text is: each non-blank page after a newline."""
+    text_out = ""
+    for txt in texts:
+        if txt and txt.strip():
+            text_out += "\n" + txt
+    return text_out
+
+
+# -------------------------------------------------------------
+# PARALLEL PAGE OCR
+# -------------------------------------------------------------
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+
+def get_page_executor():
+    global _page_executor
+
+    with _page_executor_lock:
+        if _page_executor is None:
+            _page_executor = ProcessPoolExecutor(
+                max_workers=OCR_PAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _page_executor
+
+
+def _reset_page_executor():
+    global _page_executor
+
+    with _page_executor_lock:
+        _page_executor = None
+
+
+def ocr_pages(imgs, max_in_flight=OCR_PAGES_PER_DOCUMENT, ocr=ocr_oriented):
+    """
+    OCR every page, fanning out to the page pool; results keep page order.
+    imgs may be a lazy iterable (render.iter_pages), in which case the
+    next page is rendered here while the pool OCRs the ones before it.
+    """
+    imgs = iter(imgs)
+    head = list(islice(imgs, 2))
+    if len(head) < 2 or OCR_PAGE_WORKERS < 2 or max_in_flight < 2:
+        texts = []
+        for img in chain(head, imgs):
+            OCR_PAGES.inc()
+            texts.append(ocr(img))
+        return texts
+
+    executor = get_page_executor()
+    texts, seen, pending = [], [], {}
+
+    try:
+        for img in chain(head, imgs):
+            OCR_PAGES.inc()
+            seen.append(img)
+            texts.append(None)
+            pending[executor.submit(ocr, img)] = len(seen) - 1
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    texts[pending.pop(future)] = future.result()
+
+        for future in list(pending):
+            texts[pending.pop(future)] = future.result()
+    except BrokenProcessPool:
+        logger.warning("OCR page pool broke, finishing pages serially")
+        _reset_page_executor()
+        done = [t if t is not None else ocr(img) for t, img in zip(texts, seen)]
+        for img in imgs:
+            OCR_PAGES.inc()
+            done.append(ocr(img))
+        return done
+
+    return texts
+
+
+# -------------------------------------------------------------
+# DOCUMENT CONTEXT
+# -------------------------------------------------------------
+class DocumentContext:
+    """
+    One attachment, opened once per request.
+
+    Raw bytes, the PDF text layer, rendered pages, OCR text and EasyOCR
+    lines are all computed lazily and cached, so the date, invoice,
+    total and vendor extractors can share a single parse/render/OCR.
+
+    With adaptive resolution (raster.OCR_ADAPTIVE) each OCR'd page is
+    rendered/downscaled to suit its text size; self.page_ocr then records,
+    per page index, the resolution used and Tesseract's line boxes so
+    refine.py can re-read missed fields from full-resolution crops.
+    layout.py may read only the header and totals bands first, and
+    text_until() may stop before the last page; either leaves
+    self.partial_text (see known_partial_text()).
+    """
+
+    def __init__(self, data=None, path=None, name=None, cache=True, adaptive=None):
+        if data is None and path is None:
+            raise ValueError("DocumentContext needs data or path")
+
+        self.path = path
+        self.name = name or (os.path.basename(path) if path else None)
+
+        self._data = data
+        self._md5 = None
+        self._text_layer = None
+        self.page_paths = None  # per page: textlayer.PATH_TEXT or PATH_OCR, once the text is read
+        self._text = None
+        self._pages = {}
+        self._ocr_lines = {}
+
+        self.adaptive = raster.OCR_ADAPTIVE if adaptive is None else adaptive
+        self.page_ocr = {}
+        self.partial_text = None  # header/totals crops, or the pages read before an early exit
+
+        self._cache = ocr_cache.get_cache() if cache else None
+        self._cached = None
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(path=path)
+
+    @classmethod
+    def from_bytes(cls, data, name=None):
+        return cls(data=data, name=name)
+
+    @classmethod
+    def from_upload(cls, upload, name=None):
+        """Small uploads stay in memory; spilled ones are read from their temp file."""
+        if upload.spilled:
+            return cls(path=upload.path, name=name)
+        return cls(data=upload.data, name=name)
+
+    # ---------------- raw bytes ----------------
+    @property
+    def data(self):
+        if self._data is None:
+            with open(self.path, "rb") as f:
+                self._data = f.read()
+        return self._data
+
+    @property
+    def md5(self):
+        if self._md5 is None:
+            self._md5 = hashlib.md5(self.data).hexdigest()
+        return self._md5
+
+    @property
+    def kind(self):
+        if self.path:
+            lower = self.path.lower()
+            if lower.endswith(".pdf"):
+                return "pdf"
+            if lower.endswith((".xls", ".xlsx")):
+                return "excel"
+            return "image"
+        return sniff_kind(self.data)
+
+    # ---------------- result cache ----------------
+    def cached(self, key):
+        """Value stored for this file's content by an earlier request, if any."""
+        if self._cache is None:
+            return None
+        if self._cached is None:
+            self._cached = self._cache.get(self.md5) or {}
+        return self._cached.get(key)
+
+    def remember(self, **parts):
+        if self._cache is None:
+            return
+        self._cache.put(self.md5, **parts)
+        if self._cached is not None:
+            for key, value in parts.items():
+                if isinstance(value, dict) and isinstance(self._cached.get(key), dict):
+                    self._cached[key] = {**self._cached[key], **value}
+                else:
+                    self._cached[key] = value
+
+    # ---------------- PDF text layer ----------------
+    def text_layer(self):
+        """Per-page text layer (textlayer.py); empty list for images or unreadable PDFs."""
+        if self._text_layer is None:
+            pages = []
+            if self.kind == "pdf":
+                try:
+                    pages = textlayer.extract_pages(self.data)
+                except Exception as e:
+                    logger.warning("text layer failed: %s", e)
+            self._text_layer = pages
+        return self._text_layer
+
+    # ---------------- page bitmaps ----------------
+    def _iter_render(self, dpi, first_page=None, last_page=None):
+        """Rendered pages (render.py), cached as they are produced."""
+        source = self._data if self._data is not None else self.path
+        first = (first_page or 1) - 1
+        for i, img in enumerate(render.iter_pages(source, dpi, first_page, last_page), first):
+            self._pages[(i, dpi)] = img
+            yield img
+
+    def _render(self, dpi, first_page=None, last_page=None):
+        return list(self._iter_render(dpi, first_page, last_page))
+
+    def page_images(self, dpi=RENDER_DPI):
+        if self.kind != "pdf":
+            return [self.page_image(0, dpi)]
+        return self._render(dpi)
+
+    def page_count(self):
+        if self.kind != "pdf":
+            return 1
+        if self.text_layer():
+            return len(self.text_layer())
+        return render.page_count(self._data if self._data is not None else self.path)
+
+    def probe_image(self, index=0):
+        """One page at raster.OCR_PROBE_DPI, for measuring text size and layout."""
+        if self.kind != "pdf":
+            return self.page_image(0)
+        return self.page_image(index, raster.OCR_PROBE_DPI)
+
+    def page_image(self, index=0, dpi=RENDER_DPI):
+        key = (index, dpi)
+        if key not in self._pages:
+            if self.kind == "pdf":
+                self._render(dpi, first_page=index + 1, last_page=index + 1)
+            else:
+                self._pages[key] = Image.open(io.BytesIO(self.data))
+        return self._pages[key]
+
+    # ---------------- full text ----------------
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.cached("text")
+            if self._text is None:
+                self._text = self._extract_text()
+                self.remember(text=self._text)
+        return self._text
+
+    def known_full_text(self):
+        """The full text if it has already been read (here or in the cache), else None."""
+        if self._text is None:
+            self._text = self.cached("text")
+        return self._text
+
+    def known_partial_text(self):
+        """
+        The partial text the fields were found in (header/totals crops or
+        the pages read before an early exit), or None. Not the whole
+        document: don't search it for things the fields didn't need.
+        """
+        for partial in (self.partial_text, self.cached("roi_text"), self.cached("partial_text")):
+            if partial is not None:
+                return partial
+        return None
+
+    def text_until(self, done, order):
+        """
+        Read a PDF's pages in the order order(page_count) gives and stop
+        as soon as done(text) is true of the pages read so far, joined in
+        page order. Returns that partial text (also self.partial_text),
+        or the full text when every page had to be read. Images, cached
+        and unreadable documents just return self.text.
+        """
+        if self.kind != "pdf" or self._text is not None or self.cached("text") is not None:
+            return self.text
+        layer = self.text_layer()
+        if not layer:
+            return self.text
+
+        texts = {}
+        for chunk in self._iter_page_chunks(order(len(layer))):
+            texts.update(chunk)
+            if len(texts) == len(layer):
+                break
+            partial = join_pages(texts[i] for i in sorted(texts))
+            if done(partial):
+                PAGES_SKIPPED.inc(len(layer) - len(texts))
+                self.partial_text = partial
+                self.remember(partial_text=partial)
+                return partial
+
+        self._text = join_pages(texts[i] for i in range(len(layer)))
+        self.remember(text=self._text, page_paths=self.page_paths)
+        return self._text
+
+    def _iter_page_chunks(self, order):
+        """
+        [(index, text)] for the pages in order, a few at a time: text
+        layer pages as they are, the others OCR'd OCR_PAGES_PER_DOCUMENT
+        per chunk so they still share the page pool.
+        """
+        layer = self.text_layer()
+        paths = textlayer.page_paths(layer)
+        if self.page_paths is None:
+            self.page_paths = [None] * len(layer)  # None: not read (yet)
+
+        step = max(1, OCR_PAGES_PER_DOCUMENT)
+        for start in range(0, len(order), step):
+            chunk = order[start:start + step]
+            scanned = [i for i in chunk if paths[i] == textlayer.PATH_OCR]
+
+            ocr = {}
+            if scanned:
+                try:
+                    ocr = dict(zip(scanned, self._ocr_scanned(scanned)))
+                except Exception:
+                    logger.exception("page rendering/OCR failed")
+
+            for i in chunk:
+                self.page_paths[i] = paths[i]
+            yield [(i, layer[i] if paths[i] == textlayer.PATH_TEXT else ocr.get(i, "")) for i in chunk]
+
+    def _extract_text(self):
+        if self.kind != "pdf":
+            OCR_PAGES.inc()
+            if self.adaptive:
+                return self._ocr_photo_adaptive()
+            return ocr_oriented(self.page_image(0))
+
+        # text layer where a page has one, OCR for the pages that don't
+        texts = list(self.text_layer())
+        paths = textlayer.page_paths(texts)
+        scanned = [i for i, path in enumerate(paths) if path == textlayer.PATH_OCR]
+
+        try:
+            if not texts:  # unreadable text layer: OCR everything
+                texts = self._ocr_scanned()
+                paths = [textlayer.PATH_OCR] * len(texts)
+            elif scanned:
+                for i, page_text in zip(scanned, self._ocr_scanned(scanned)):
+                    texts[i] = page_text
+        except Exception:
+            logger.exception("page rendering/OCR failed")
+            texts = [t if path == textlayer.PATH_TEXT else "" for t, path in zip(texts, paths)]
+
+        self.page_paths = paths
+        self.remember(page_paths=paths)
+        return join_pages(texts)
+
+    def _ocr_scanned(self, indices=None):
+        """OCR text of the given pages (all pages when None), in that order."""
+        if self.adaptive:
+            return self._ocr_scanned_adaptive(indices)
+        if indices is None:
+            return ocr_pages(self._iter_render(RENDER_DPI))
+        return ocr_pages(self.page_image(i) for i in indices)
+
+    # ---------------- adaptive resolution ----------------
+    def _ocr_photo_adaptive(self):
+        img = self.page_image(0)
+        line_px = raster.line_height_px(img)
+        scale = raster.pick_scale(line_px)
+
+        result = ocr_oriented_lines(raster.downscale(img, scale))
+        self.page_ocr[0] = {"scale": scale, "line_px": line_px, **result}
+        return result["text"]
+
+    def _ocr_scanned_adaptive(self, indices=None):
+        """Probe each page at low dpi, then render it at its own dpi and OCR it."""
+        indices = list(range(self.page_count()) if indices is None else indices)
+        measured = []
+
+        def rendered():
+            # pages are probed and rendered lazily, each only as the OCR pool can take it
+            for i in indices:
+                line_px = raster.line_height_px(self.probe_image(i))
+                dpi = raster.pick_dpi(line_px)
+                measured.append((dpi, line_px))
+                yield self.page_image(i, dpi)
+
+        results = ocr_pages(rendered(), ocr=ocr_oriented_lines)
+        for i, (dpi, line_px), result in zip(indices, measured, results):
+            self.page_ocr[i] = {"dpi": dpi, "line_px": line_px, **result}
+        return [r["text"] for r in results]
+
+    # ---------------- EasyOCR lines ----------------
+    def ocr_lines(self, index=0, rows=None):
+        """
+        EasyOCR lines of one page as [{'text', 'conf', 'bbox'}], top to
+        bottom. With rows, only the band holding the page's first rows
+        text lines is read (bboxes are then relative to that band).
+        """
+        key = str(index) if rows is None else f"{index}:{rows}"
+        if key not in self._ocr_lines:
+            cached = (self.cached("ocr_lines") or {}).get(key)
+            if cached is not None:
+                self._ocr_lines[key] = cached
+                return cached
+
+            page = self.page_image(index)
+            if rows is not None:
+                box = raster.lines_box(page, raster.text_lines(page)[:rows])
+                page = page.crop(box) if box else page
+
+            img = np.asarray(binarize(page).convert("L"))
+            results = ocr_pool.readtext(img, detail=1)
+            self._ocr_lines[key] = [
+                {"text": t.strip(), "conf": float(conf), "bbox": [[int(x), int(y)] for x, y in bbox]}
+                for bbox, t, conf in results
+                if t.strip()
+            ]
+            self.remember(ocr_lines={key: self._ocr_lines[key]})
+        return self._ocr_lines[key]
@@ -0,0 +1,96 @@
+import bisect
+import threading
+
+from claim_store import get_store
+
+AMOUNT_TOLERANCE = 5
+
+
+# -------------------------------------------------------------
+# DUPLICATE INDEX
+# -------------------------------------------------------------
+class DuplicateIndex:
+    """
+    Resident index of claimed rows: (Employee_Code, Invoice_No, Date)
+    -> sorted list of Total_Amount, so the +/- tolerance check is a
+    bisect instead of a scan over the whole claim history.
+    """
+
+    def __init__(self, tolerance=AMOUNT_TOLERANCE):
+        self.tolerance = tolerance
+        self.last_id = 0
+
+        self._amounts = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(emp, inv, date):
+        return (str(emp), str(inv), str(date))
+
+    def add(self, emp, inv, date, amt):
+        try:
+            amt = float(amt)
+        except (TypeError, ValueError):
+            return
+        if amt != amt:  # NaN never matches anything
+            return
+
+        with self._lock:
+            bisect.insort(self._amounts.setdefault(self.key(emp, inv, date), []), amt)
+
+    def add_records(self, records):
+        for rec in records:
+            self.add(rec["Employee_Code"], rec["Invoice_No"], rec["Date"], rec["Total_Amount"])
+
+    def contains(self, emp, inv, date, amt):
+        with self._lock:
+            amounts = self._amounts.get(self.key(emp, inv, date))
+            if not amounts:
+                return False
+            i = bisect.bisect_left(amounts, amt - self.tolerance)
+            return i < len(amounts) and amounts[i] <= amt + self.tolerance
+
+    def amounts_for(self, keys):
+        """{key: sorted amounts} for those of keys that have history (a hash join)."""
+        with self._lock:
+            return {k: list(self._amounts[k]) for k in keys if k in self._amounts}
+
+    def load_frame(self, df):
+        with self._lock:
+            self._amounts = {}
+            if df.empty:
+                return
+            for emp, inv, date, amt in df[["Employee_Code", "Invoice_No", "Date", "Total_Amount"]].itertuples(index=False):
+                self.add(emp, inv, date, amt)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(v) for v in self._amounts.values())
+
+
+# -------------------------------------------------------------
+# CLAIM-STORE-BACKED INSTANCE
+# -------------------------------------------------------------
+_claim_index = None
+_claim_index_lock = threading.Lock()
+
+
+def get_claim_index(store=None):
+    """
+    Process-wide index over the claims table. The first call loads the
+    whole history; later calls only pull rows appended since (by this
+    or any other process), which is one indexed range query.
+    """
+    global _claim_index
+
+    store = store or get_store()
+
+    with _claim_index_lock:
+        if _claim_index is None:
+            _claim_index = DuplicateIndex()
+
+        for row_id, emp, inv, date, amt in store.claims_since(_claim_index.last_id):
+            _claim_index.add(emp, inv, date, amt)
+            _claim_index.last_id = row_id
+
+        return _claim_index
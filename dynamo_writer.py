@@ -0,0 +1,173 @@
+import os
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from metrics import DYNAMODB_CALLS
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+DYNAMO_BATCH_SIZE = 25  # BatchWriteItem hard limit
+DYNAMO_MAX_WORKERS = int(os.environ.get("DYNAMO_MAX_WORKERS", "8"))
+DYNAMO_MAX_RETRIES = int(os.environ.get("DYNAMO_MAX_RETRIES", "6"))
+DYNAMO_BACKOFF_BASE = float(os.environ.get("DYNAMO_BACKOFF_BASE", "0.05"))
+DYNAMO_BACKOFF_MAX = 5.0
+
+RETRYABLE_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "InternalServerError",
+    "ServiceUnavailable",
+}
+
+
+class UnprocessedItemsError(Exception):
+    pass
+
+
+# -------------------------------------------------------------
+# WRITER
+# -------------------------------------------------------------
+class DynamoWriter:
+    """
+    Batched inserts and bounded-concurrency updates for one table.
+
+    Talks to the low-level client (thread-safe, unlike boto3 resources)
+    so any object with batch_write_item/update_item - a botocore
+    Stubber-wrapped client or a local stand-in - can be plugged in.
+
+    key names the table's key attributes. BatchWriteItem rejects a whole
+    batch holding two items with the same key, so put_items keeps only
+    the last item per key, as a put_item loop would have left it.
+    """
+
+    def __init__(self, client, table_name, key=None, max_workers=DYNAMO_MAX_WORKERS,
+                 max_retries=DYNAMO_MAX_RETRIES, backoff_base=DYNAMO_BACKOFF_BASE,
+                 sleep=time.sleep):
+        self.client = client
+        self.table_name = table_name
+        self.key = tuple(key) if key else None
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.sleep = sleep
+
+        self._serializer = TypeSerializer()
+
+    @classmethod
+    def for_table(cls, table, **kwargs):
+        return cls(table.meta.client, table.name, **kwargs)
+
+    def _serialize(self, item):
+        return {k: self._serializer.serialize(v) for k, v in item.items()}
+
+    def _backoff(self, attempt):
+        delay = min(DYNAMO_BACKOFF_MAX, self.backoff_base * (2 ** attempt))
+        self.sleep(delay * random.uniform(0.5, 1.0))
+
+    # ---------------- inserts ----------------
+    def unique_by_key(self, items):
+        """items with only the last one kept per key, in first-seen key order."""
+        if not self.key:
+            return list(items)
+        latest = {}
+        for item in items:
+            latest[tuple(item.get(k) for k in self.key)] = item
+        if len(latest) < len(items):
+            logger.info(
+                "dynamodb %s: %d item(s) share a key with a later one, keeping the last",
+                self.table_name, len(items) - len(latest),
+            )
+        return list(latest.values())
+
+    def put_items(self, items):
+        """Write items 25 at a time, retrying UnprocessedItems with backoff."""
+        items = self.unique_by_key(items)
+        batches = []
+
+        for start in range(0, len(items), DYNAMO_BATCH_SIZE):
+            requests = [
+                {"PutRequest": {"Item": self._serialize(item)}}
+                for item in items[start:start + DYNAMO_BATCH_SIZE]
+            ]
+
+            began = time.perf_counter()
+            calls = 0
+            attempt = 0
+            while requests:
+                calls += 1
+                DYNAMODB_CALLS.inc(operation="batch_write_item")
+                try:
+                    response = self.client.batch_write_item(RequestItems={self.table_name: requests})
+                except ClientError as e:
+                    if e.response["Error"]["Code"] not in RETRYABLE_ERRORS or attempt >= self.max_retries:
+                        raise
+                    self._backoff(attempt)
+                    attempt += 1
+                    continue
+
+                requests = response.get("UnprocessedItems", {}).get(self.table_name, [])
+                if requests:
+                    if attempt >= self.max_retries:
+                        raise UnprocessedItemsError(
+                            f"{len(requests)} item(s) still unprocessed after {attempt} retries"
+                        )
+                    self._backoff(attempt)
+                    attempt += 1
+
+            elapsed = time.perf_counter() - began
+            batches.append({"items": min(DYNAMO_BATCH_SIZE, len(items) - start), "calls": calls, "seconds": elapsed})
+            logger.info(
+                "dynamodb %s batch of %d written in %.3fs (%d call(s))",
+                self.table_name, batches[-1]["items"], elapsed, calls,
+            )
+
+        return {"items": len(items), "batches": batches}
+
+    # ---------------- updates ----------------
+    def _update_one(self, key, kwargs):
+        attempt = 0
+        while True:
+            began = time.perf_counter()
+            DYNAMODB_CALLS.inc(operation="update_item")
+            try:
+                self.client.update_item(TableName=self.table_name, Key=self._serialize(key), **kwargs)
+                return time.perf_counter() - began
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in RETRYABLE_ERRORS or attempt >= self.max_retries:
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+
+    def update_items(self, keys, UpdateExpression, ExpressionAttributeValues,
+                     ExpressionAttributeNames=None):
+        """Apply the same update to every key with at most max_workers in flight."""
+        kwargs = {
+            "UpdateExpression": UpdateExpression,
+            "ExpressionAttributeValues": self._serialize(ExpressionAttributeValues),
+        }
+        if ExpressionAttributeNames:
+            kwargs["ExpressionAttributeNames"] = ExpressionAttributeNames
+
+        began = time.perf_counter()
+        if len(keys) <= 1:
+            latencies = [self._update_one(k, kwargs) for k in keys]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(keys))) as pool:
+                latencies = list(pool.map(lambda k: self._update_one(k, kwargs), keys))
+        elapsed = time.perf_counter() - began
+
+        logger.info("dynamodb %s updated %d item(s) in %.3fs", self.table_name, len(keys), elapsed)
+        return {
+            "items": len(keys),
+            "seconds": elapsed,
+            "max_item_seconds": max(latencies, default=0.0),
+        }
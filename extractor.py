@@ -7,7 +7,7 @@ import os
 import pandas as pd
 from PIL import Image
 import numpy as np
-from pdf2image import convert_from_path
+from render import render_pages
  
 # --- CONFIGURATION (UPDATE THESE PATHS) ---
 
@@ -23,18 +23,6 @@ if platform.system() == "Windows":
     pytesseract.pytesseract.tesseract_cmd = (
         r"C:\Users\VikasTiwari\AppData\Local\Programs\Tesseract-OCR\tesseract.exe"
     )
-else:
-    # Linux / VM safety check
-    if not shutil.which("tesseract"):
-        raise RuntimeError("Tesseract is not installed or not in PATH")
-
-# 2. Poppler Path (REQUIRED for Windows if using PDF)
-#POPPLER_PATH = r"C:\poppler-25.10.0\bin"
-
-if platform.system() == "Windows":
-    POPPLER_PATH = r"C:\poppler-25.10.0\bin"
-else:
-    POPPLER_PATH = None
 
 
 # --- FOLDER SETUP ---
@@ -43,13 +31,9 @@ OUTPUT_FILE = "extracted_bill_data.csv"
  
 # --- HELPER FUNCTIONS ---
 
-def get_text_from_pdf(pdf_path, poppler_path=None):
+def get_text_from_pdf(pdf_path):
     try:
-        kwargs = dict(first_page=1, last_page=1)
-        if poppler_path:
-            kwargs["poppler_path"] = poppler_path
-
-        images = convert_from_path(pdf_path, **kwargs)
+        images = render_pages(pdf_path, dpi=200, first_page=1, last_page=1)
 
         if images:
             return pytesseract.image_to_string(images[0], config=TESSERACT_CONFIG)
@@ -229,40 +213,49 @@ def extract_details(text, file_name):
 
 # --- MAIN PROCESSING LOGIC ---
 
-results = []
-file_list = os.listdir(IMAGE_FOLDER)
+def main():
+    # Linux / VM safety check
+    if platform.system() != "Windows" and not shutil.which("tesseract"):
+        raise RuntimeError("Tesseract is not installed or not in PATH")
 
-print(f"Starting extraction for {len(file_list)} files in '{IMAGE_FOLDER}'...")
+    results = []
+    file_list = os.listdir(IMAGE_FOLDER)
 
-for file_name in file_list:
-    path = os.path.join(IMAGE_FOLDER, file_name)
-    
-    raw_text = "" 
-    
-    if file_name.lower().endswith((".png", ".jpg", ".jpeg")):
-        preprocessed_img = preprocess_image(path)
-        if preprocessed_img is not None:
-            raw_text = pytesseract.image_to_string(preprocessed_img, config=TESSERACT_CONFIG) 
-    
-    elif file_name.lower().endswith((".pdf")):
-        raw_text = get_text_from_pdf(path, POPPLER_PATH)
-        
-    else:
-        continue 
+    print(f"Starting extraction for {len(file_list)} files in '{IMAGE_FOLDER}'...")
 
-    if raw_text:
-        details = extract_details(raw_text, file_name) 
-        details["File"] = file_name
-        results.append(details)
-        
-        print(f"✅ Extracted: {file_name} -> Date: {details['Date']}, Bill No: {details['Bill No']}, Total Amount: {details['Total Amount']}")
+    for file_name in file_list:
+        path = os.path.join(IMAGE_FOLDER, file_name)
+
+        raw_text = "" 
+
+        if file_name.lower().endswith((".png", ".jpg", ".jpeg")):
+            preprocessed_img = preprocess_image(path)
+            if preprocessed_img is not None:
+                raw_text = pytesseract.image_to_string(preprocessed_img, config=TESSERACT_CONFIG) 
+
+        elif file_name.lower().endswith((".pdf")):
+            raw_text = get_text_from_pdf(path)
+
+        else:
+            continue 
+
+        if raw_text:
+            details = extract_details(raw_text, file_name) 
+            details["File"] = file_name
+            results.append(details)
+
+            print(f"✅ Extracted: {file_name} -> Date: {details['Date']}, Bill No: {details['Bill No']}, Total Amount: {details['Total Amount']}")
+        else:
+            print(f"❌ Failed to extract text from: {file_name}")
+
+    # --- SAVE RESULTS ---
+    if results:
+        df = pd.DataFrame(results)
+        df.to_csv(OUTPUT_FILE, index=False)
+        print(f"\n🎉 Extraction complete! Results saved in '{OUTPUT_FILE}'.")
     else:
-        print(f"❌ Failed to extract text from: {file_name}")
-
-# --- SAVE RESULTS ---
-if results:
-    df = pd.DataFrame(results)
-    df.to_csv(OUTPUT_FILE, index=False)
-    print(f"\n🎉 Extraction complete! Results saved in '{OUTPUT_FILE}'.")
-else:
-    print(f"\nNo data extracted. Check your file names and Tesseract/Poppler paths.")
+        print(f"\nNo data extracted. Check your file names and Tesseract path.")
+
+
+if __name__ == "__main__":
+    main()
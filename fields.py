@@ -0,0 +1,302 @@
+import re
+from bisect import bisect_right
+
+from date import date_keywords, date_patterns
+
+# -------------------------------------------------------------
+# SINGLE-SCAN FIELD EXTRACTION
+# -------------------------------------------------------------
+# date.extract_date_from_text, invoice.extract_invoice, total.extract_total
+# and ven.extract_vendor each re-split the text and loop keywords x lines
+# x patterns. Here the text is lowered and split once, each keyword
+# family is located in one pass (KeywordSet), and the precompiled field
+# regexes only run on the lines / offsets those hits point at. Results
+# are the same as the per-field functions, which stay as the reference.
+
+ADDRESS_WORDS = [
+    "india", "karnataka", "maharashtra", "thane", "bengaluru", "mumbai",
+    "road", "village", "taluka", "district", "dist", "pin", "pincode",
+    "state", "west", "east", "south", "north"
+]
+
+INVOICE_KEYWORDS = [
+    "invoice number", "invoice no", "invoice id", "invoice #",
+    "tax invoice", "bill number", "bill no", "inv no", "invoice", "patient id"
+]
+
+TOTAL_LINE_KEYWORDS = ["total", "due", "payable", "amount"]
+
+VENDORS = [
+    "Uber", "Ola", "Flipkart", "Amazon", "Zomato", "Swiggy",
+    "Dominos", "Makemytrip", "IRCTC", "Cleartrip", "Hotel", "Resort",
+    "Restaurant", "Airbnb"
+]
+
+
+class KeywordSet:
+    """
+    Lowered keywords, minus any that contain another one: a line holding
+    "invoice number" already holds "invoice". Hits are found with one
+    C-level str.find pass per keyword, skipping to the next line after
+    each hit, which beats a regex alternation in CPython's re.
+    """
+
+    def __init__(self, words):
+        words = {w.lower() for w in words}
+        self.words = sorted(w for w in words if not any(o != w and o in w for o in words))
+
+    def lines(self, lower, starts):
+        hits = set()
+        end = len(lower)
+        for word in self.words:
+            pos = lower.find(word)
+            while pos != -1:
+                i = bisect_right(starts, pos) - 1
+                hits.add(i)
+                pos = lower.find(word, starts[i + 1] if i + 1 < len(starts) else end)
+        return sorted(hits)
+
+    def positions(self, lower):
+        found = []
+        for word in self.words:
+            pos = lower.find(word)
+            while pos != -1:
+                found.append(pos)
+                pos = lower.find(word, pos + 1)
+        found.sort()
+        return found
+
+
+DATE_KEYS = KeywordSet(date_keywords)
+INVOICE_KEYS = KeywordSet(INVOICE_KEYWORDS)
+TOTAL_KEYS = KeywordSet(TOTAL_LINE_KEYWORDS)
+ADDRESS_KEYS = KeywordSet(ADDRESS_WORDS)
+
+DATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in date_patterns]
+# every date pattern contains a 20xx year and none can cross a newline,
+# so only lines holding a year can contain a date
+YEAR = re.compile(r"20\d\d")
+
+INVOICE_PATTERNS = [
+    re.compile(r"(?:invoice\s*number|invoice\s*no|invoice\s*#|invoice\s*id|bill\s*no|bill\s*number|patient\s*id|inv\s*no)[\s:#]*([A-Za-z0-9\-\/]+)", re.IGNORECASE),
+    re.compile(r"\b([A-Z]{2,4}\d{6,12})\b", re.IGNORECASE),
+]
+ORDER_ID = re.compile(r"\bOD[0-9]{10,}\b")
+# the keyword pattern can only start where one of these does ("inv"
+# covers "invoice"); it may run across lines, so it is tried at offsets
+INVOICE_ANCHORS = KeywordSet(["inv", "bill", "patient"])
+# an ID's digits are preceded by at most 4 letters
+ID_DIGITS = re.compile(r"\d{6}")
+
+# Every total pattern starts with \b<word>: a match can only begin where
+# one of these words starts, so they are tried only at those offsets.
+TOTAL_ANCHORS = KeywordSet(["grand", "total", "due", "invoice", "net", "payment", "paid", "visa", "card", "cash", "upi"])
+TOTAL_ANCHORS_RE = re.compile(r"\b(?:grand|total|due|invoice|net|payment|paid|visa|card|cash|upi)", re.IGNORECASE)
+TOTAL_PATTERNS = [
+    re.compile(r"\bGrand\s*Total\s*[₹RsINR\.\s]*([0-9]+\.[0-9]+|[0-9]+)", re.IGNORECASE),
+    re.compile(r"\bTotal\s*Due\s*[₹RsINR\.\s]*([0-9]+\.[0-9]+|[0-9]+)", re.IGNORECASE),
+    re.compile(r"\bDue\s*(Amount)?\s*[₹RsINR\.\s]*([0-9]+\.[0-9]+|[0-9]+)", re.IGNORECASE),
+    re.compile(r"\bTotal\s*(Amount|Payable|Bill)\s*[₹RsINR\.\s]*([0-9]+\.[0-9]+|[0-9]+)", re.IGNORECASE),
+    re.compile(r"\b(Invoice|Net)\s*(Total|Amount)\s*[₹RsINR\.\s]*([0-9]+\.[0-9]+|[0-9]+)", re.IGNORECASE),
+    re.compile(r"\b(Payment|Paid|VISA|Card|Cash|UPI)\s*[A-Za-z]*\s*[₹RsINR\.\s]*([0-9]+\.[0-9]+|[0-9]+)", re.IGNORECASE),
+    re.compile(r"\bTotal[\s:A-Za-z]*[₹RsINR]*\.?([0-9]+\.[0-9]+|[0-9]+)", re.IGNORECASE),
+]
+NUMBER = re.compile(r"[0-9]+\.[0-9]+|[0-9]+")
+CAPITALIZED = re.compile(r"[A-Z][a-zA-Z0-9& ]{2,}")
+
+
+# -------------------------------------------------------------
+# TOKENIZED TEXT
+# -------------------------------------------------------------
+class ScannedText:
+    """A text split into lines once, with keyword hits mapped to line numbers."""
+
+    def __init__(self, text):
+        self.text = text
+        self.lines = text.split("\n")
+        self.lower = text.lower()
+
+        # line i starts at offset starts[i] of the lowered text
+        self.starts = [0]
+        find = self.lower.find
+        pos = find("\n")
+        while pos != -1:
+            self.starts.append(pos + 1)
+            pos = find("\n", pos + 1)
+
+    def hit_lines(self, keywords):
+        """Sorted line numbers containing at least one of keywords (a KeywordSet or regex)."""
+        if isinstance(keywords, KeywordSet):
+            return keywords.lines(self.lower, self.starts)
+
+        hits = []
+        for m in keywords.finditer(self.lower):
+            line = bisect_right(self.starts, m.start()) - 1
+            if not hits or hits[-1] != line:
+                hits.append(line)
+        return hits
+
+
+# -------------------------------------------------------------
+# FIELDS
+# -------------------------------------------------------------
+def find_date(scan):
+    if not scan.text:
+        return None
+
+    for i in scan.hit_lines(DATE_KEYS):
+        line = scan.lines[i]
+        for dp in DATE_PATTERNS:
+            found = dp.search(line)
+            if found:
+                return found.group(0)
+
+    year_lines = scan.hit_lines(YEAR)
+    for dp in DATE_PATTERNS:
+        for i in year_lines:
+            found = dp.search(scan.lines[i])
+            if found:
+                return found.group(0)
+
+    return None
+
+
+def find_invoice(scan, address_lines):
+    for i in scan.hit_lines(INVOICE_KEYS):
+        if i in address_lines:
+            continue
+        line = scan.lines[i]
+        for pat in INVOICE_PATTERNS:
+            m = pat.search(line)
+            if m:
+                return m.group(1).strip()
+
+    text_clean = (
+        scan.text.replace(",", " ")
+            .replace(":", " ")
+            .replace("#", " # ")
+            .replace("-", " ")
+    ).lower()
+
+    for pos in INVOICE_ANCHORS.positions(text_clean):
+        m = INVOICE_PATTERNS[0].match(text_clean, pos)
+        if m:
+            return m.group(1).strip()
+
+    digits = ID_DIGITS.search(text_clean)
+    if digits:
+        m = INVOICE_PATTERNS[1].search(text_clean, max(0, digits.start() - 4))
+        if m:
+            return m.group(1).strip()
+
+    # text_clean is lowercase, so this never matches; kept for parity
+    order_match = ORDER_ID.search(text_clean) if "OD" in text_clean else None
+    if order_match:
+        return "Invoice Missing - Using OrderID: " + order_match.group(0)
+
+    return "Invoice Not Found"
+
+
+def find_total(text):
+    text_clean = text.replace(",", "")
+    scan = ScannedText(text_clean)
+
+    if len(scan.lower) == len(text_clean):
+        anchors = TOTAL_ANCHORS.positions(scan.lower)
+    else:  # lower() changed offsets (rare non-ASCII); fall back to the regex
+        anchors = [m.start() for m in TOTAL_ANCHORS_RE.finditer(text_clean)]
+
+    # first match of each pattern, in pattern order, like re.search
+    for pat in TOTAL_PATTERNS:
+        for pos in anchors:
+            m = pat.match(text_clean, pos)
+            if m:
+                amt = m.group(m.lastindex)
+                if amt and float(amt) > 50:
+                    return amt
+                break
+
+    address_lines = set(scan.hit_lines(ADDRESS_KEYS))
+
+    for i in scan.hit_lines(TOTAL_KEYS):
+        line = scan.lines[i]
+        if not line.strip() or i in address_lines:
+            continue
+        nums = [n for n in NUMBER.findall(line) if 50 < float(n) < 50000]
+        if nums:
+            return max(nums, key=lambda x: float(x))
+
+    return "Total not found"
+
+
+def find_vendor(text):
+    lines = text.replace(",", "").split("\n")[:20]
+    lines = [line for line in lines if not any(w in line.lower() for w in ADDRESS_KEYS.words)]
+
+    for line in lines:
+        lowered = line.lower()
+        for vendor in VENDORS:
+            if vendor.lower() in lowered:
+                return vendor
+
+    for line in lines:
+        words = CAPITALIZED.findall(line)
+        if words:
+            return words[0].strip()
+
+    return "Vendor not found"
+
+
+def extract_fields(text):
+    """invoice_date, invoice_number, total and (text) vendor from one pass over text."""
+    text = text or ""
+    scan = ScannedText(text)
+    address_lines = set(scan.hit_lines(ADDRESS_KEYS))
+
+    return {
+        "invoice_date": find_date(scan),
+        "invoice_number": find_invoice(scan, address_lines),
+        "total": find_total(text),
+        "vendor": find_vendor(text),
+    }
+
+
+# -------------------------------------------------------------
+# CONFIDENCE
+# -------------------------------------------------------------
+# A value is confident when its own keyword vouches for it: the date or
+# invoice number sits on a line naming that field, or the total came
+# from one of the "<keyword> total/amount" patterns. Fallbacks (any
+# dated line, any ID-shaped token, a payment line, the largest number
+# on a total line) may still be overturned by a page not yet read.
+CONFIDENT_TOTAL_PATTERNS = TOTAL_PATTERNS[:5]
+
+
+def confident_fields(text, fields=None):
+    """Names of the fields in fields (default: extract_fields(text)) that are confident."""
+    text = text or ""
+    fields = extract_fields(text) if fields is None else fields
+    scan = ScannedText(text)
+    confident = set()
+
+    date = fields.get("invoice_date")
+    if date and any(date in scan.lines[i] for i in scan.hit_lines(DATE_KEYS)):
+        confident.add("invoice_date")
+
+    number = fields.get("invoice_number")
+    if number and number != "Invoice Not Found":
+        address_lines = set(scan.hit_lines(ADDRESS_KEYS))
+        number = number.lower()
+        if any(number in scan.lines[i].lower() for i in scan.hit_lines(INVOICE_KEYS) if i not in address_lines):
+            confident.add("invoice_number")
+
+    total = fields.get("total")
+    if total and total != "Total not found":
+        text_clean = text.replace(",", "")
+        for pat in CONFIDENT_TOTAL_PATTERNS:
+            m = pat.search(text_clean)
+            if m and m.group(m.lastindex) == total:
+                confident.add("total")
+                break
+
+    return confident
@@ -0,0 +1,58 @@
+import os
+
+from fields import confident_fields
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# Multi-page PDFs are read page by page in PAGE_ORDER, and reading stops
+# once every EARLY_EXIT_FIELDS field has a confident value. A 12-page
+# hotel folio with its number and date on page 1 and the grand total on
+# the last page costs two pages, not twelve.
+#
+# PAGE_ORDER is a comma-separated priority list of "first", "last",
+# "middle" (pages 2..n-1, in order) and 1-based page numbers (negative
+# counts from the end). Pages it doesn't name are read last, in order.
+EARLY_EXIT = os.environ.get("EARLY_EXIT", "1") == "1"
+PAGE_ORDER = os.environ.get("PAGE_ORDER", "first,last,middle")
+EARLY_EXIT_FIELDS = [
+    f for f in os.environ.get("EARLY_EXIT_FIELDS", "invoice_date,invoice_number,total").split(",") if f
+]
+
+
+def page_order(count, order=None):
+    """Page indices 0..count-1 in the priority order spec order (default PAGE_ORDER)."""
+    picked = []
+    for part in (order or PAGE_ORDER).split(","):
+        part = part.strip().lower()
+        if part == "first":
+            wanted = [0]
+        elif part == "last":
+            wanted = [count - 1]
+        elif part == "middle":
+            wanted = range(1, count - 1)
+        elif part.lstrip("-").isdigit() and int(part):
+            number = int(part)
+            wanted = [number - 1 if number > 0 else count + number]
+        else:
+            raise ValueError(f"bad PAGE_ORDER entry {part!r}")
+        picked.extend(i for i in wanted if 0 <= i < count and i not in picked)
+
+    picked.extend(i for i in range(count) if i not in picked)
+    return picked
+
+
+def fields_found(text, required=None):
+    return set(EARLY_EXIT_FIELDS if required is None else required) <= confident_fields(text)
+
+
+def incremental_text(ctx, required=None, order=None):
+    """
+    The text to extract fields from: for a PDF, only as many pages as it
+    takes for every required field to be confident (ctx.partial_text);
+    the full text if that takes every page, or for images and cached
+    documents.
+    """
+    if not EARLY_EXIT:
+        return ctx.text
+    return ctx.text_until(lambda text: fields_found(text, required), lambda count: page_order(count, order))
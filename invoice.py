@@ -1,12 +1,10 @@
-import pdfplumber
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
 import re
 import os
 import platform
 import shutil
 
+from document import DocumentContext
+
 # -----------------------------------------------------------
 # OS-AWARE CONFIGURATION
 # -----------------------------------------------------------
@@ -105,46 +103,7 @@ def check_known_invoice_in_text(text, known_invoice):
 
 # ------------------------ UNIVERSAL PDF / IMAGE TEXT EXTRACTOR -------------------------
 def extract_text_full(filepath):
-
-    ext = filepath.lower().split(".")[-1]
-
-    # ---------------------------- PDF ----------------------------
-    if ext == "pdf":
-        text_out = ""
-
-        # 1️⃣ Try pdfplumber
-        try:
-            with pdfplumber.open(filepath) as pdf:
-                for pg in pdf.pages:
-                    txt = pg.extract_text()
-                    if txt and txt.strip():
-                        text_out += "\n" + txt
-
-            if text_out.strip():
-                return text_out
-        except Exception as e:
-            print("pdfplumber failed:", e)
-
-        # 2️⃣ OCR fallback with pdf2image
-        try:
-            kwargs = {"dpi": 300}
-            if POPPLER_PATH:
-                kwargs["poppler_path"] = POPPLER_PATH
-
-            images = convert_from_path(filepath, **kwargs)
-
-            for img in images:
-                text_out += pytesseract.image_to_string(img, config=TESSERACT_CONFIG)
-
-            return text_out
-        except Exception as e:
-            print("pdf2image failed:", e)
-            return ""
-
-    # ---------------------------- IMAGE ----------------------------
-    else:
-        img = Image.open(filepath)
-        return pytesseract.image_to_string(img, config=TESSERACT_CONFIG)
+    return DocumentContext.from_path(filepath).text
 
 
 # -------------------------- MAIN EXECUTION ---------------------------
@@ -154,17 +113,18 @@ image_paths = [
 
 known_invoice_number = "M06HL24I11684390"
 
-for file in image_paths:
-    print("\n--------------------------------------------")
-    print("FILE:", file)
+if __name__ == "__main__":
+    for file in image_paths:
+        print("\n--------------------------------------------")
+        print("FILE:", file)
 
-    text = extract_text_full(file)
-    print("\nEXTRACTED TEXT (PREVIEW):")
-    print(text[:500])
+        text = extract_text_full(file)
+        print("\nEXTRACTED TEXT (PREVIEW):")
+        print(text[:500])
 
-    invoice_no = extract_invoice(text)
-    print("\n>> Extracted Invoice No:", invoice_no)
+        invoice_no = extract_invoice(text)
+        print("\n>> Extracted Invoice No:", invoice_no)
 
-    contains = check_known_invoice_in_text(text, known_invoice_number)
-    print(f">> Known Invoice ({known_invoice_number}) Present?: {contains}")
+        contains = check_known_invoice_in_text(text, known_invoice_number)
+        print(f">> Known Invoice ({known_invoice_number}) Present?: {contains}")
 
@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import argparse
+import logging
+
+import boto3
+from botocore.exceptions import ClientError
+
+from metrics import DYNAMODB_CALLS
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# GSI on claimed_invoice: partition key Invoice_Key, projecting only
+# Total_Amount, so a duplicate check reads a handful of tiny items
+# instead of every receipt (and its String_Extracted blob).
+INVOICE_KEY_INDEX = os.environ.get("INVOICE_KEY_INDEX", "Invoice_Key-index")
+INVOICE_KEY_ATTR = "Invoice_Key"
+AMOUNT_ATTR = "Total_Amount"
+
+# A table whose index query failed goes straight to the scan until this
+# many seconds have passed; then the index is tried again (it may have
+# been CREATING, or been added since).
+INDEX_RETRY_SECONDS = float(os.environ.get("INVOICE_INDEX_RETRY_SECONDS", "300"))
+
+# table name -> time.monotonic() after which the index is tried again
+_missing_index = {}
+
+
+def invoice_key(invoice_no, claim_type):
+    """Normalized invoice number + claim type, e.g. 'inv-0042#Travel'."""
+    return f"{str(invoice_no).strip().lower()}#{str(claim_type).strip()}"
+
+
+# -------------------------------------------------------------
+# LOOKUP
+# -------------------------------------------------------------
+def _paginate(call, **kwargs):
+    while True:
+        DYNAMODB_CALLS.inc(operation=getattr(call, "__name__", "table"))
+        response = call(**kwargs)
+        yield from response.get("Items", [])
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def query_amounts(table, invoice_no, claim_type):
+    """Total_Amount of every claimed receipt with this invoice number and claim type."""
+    items = _paginate(
+        table.query,
+        IndexName=INVOICE_KEY_INDEX,
+        KeyConditionExpression="#k = :k",
+        ProjectionExpression="#a",
+        ExpressionAttributeNames={"#k": INVOICE_KEY_ATTR, "#a": AMOUNT_ATTR},
+        ExpressionAttributeValues={":k": invoice_key(invoice_no, claim_type)},
+    )
+    return [item.get(AMOUNT_ATTR) for item in items]
+
+
+def scan_amounts(table, invoice_no, claim_type):
+    """Fallback for tables without the index: full scan, but projected and paginated."""
+    items = _paginate(
+        table.scan,
+        FilterExpression="Invoice_Number = :inv AND Claim_Type = :ct",
+        ProjectionExpression="#a",
+        ExpressionAttributeNames={"#a": AMOUNT_ATTR},
+        ExpressionAttributeValues={":inv": invoice_no, ":ct": claim_type},
+    )
+    return [item.get(AMOUNT_ATTR) for item in items]
+
+
+def claimed_amounts(table, invoice_no, claim_type):
+    if time.monotonic() >= _missing_index.get(table.name, 0):
+        try:
+            return query_amounts(table, invoice_no, claim_type)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("ValidationException", "ResourceNotFoundException"):
+                raise
+            logger.warning("%s has no usable %s, scanning for %.0fs: %s",
+                           table.name, INVOICE_KEY_INDEX, INDEX_RETRY_SECONDS, e)
+            _missing_index[table.name] = time.monotonic() + INDEX_RETRY_SECONDS
+
+    return scan_amounts(table, invoice_no, claim_type)
+
+
+# -------------------------------------------------------------
+# INDEX MAINTENANCE
+# -------------------------------------------------------------
+def create_index(table):
+    """Add the Invoice_Key GSI (on-demand tables; provisioned ones need throughput too)."""
+    table.meta.client.update_table(
+        TableName=table.name,
+        AttributeDefinitions=[{"AttributeName": INVOICE_KEY_ATTR, "AttributeType": "S"}],
+        GlobalSecondaryIndexUpdates=[{
+            "Create": {
+                "IndexName": INVOICE_KEY_INDEX,
+                "KeySchema": [{"AttributeName": INVOICE_KEY_ATTR, "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": [AMOUNT_ATTR]},
+            }
+        }],
+    )
+    _missing_index.pop(table.name, None)
+
+
+def backfill(table):
+    """Write Invoice_Key onto items stored before the index existed."""
+    key_names = [k["AttributeName"] for k in table.key_schema]
+    updated = 0
+
+    for item in _paginate(
+        table.scan,
+        FilterExpression="attribute_not_exists(#k) AND attribute_exists(Invoice_Number)",
+        ProjectionExpression=", ".join(["Invoice_Number", "Claim_Type"] + ["#p%d" % i for i in range(len(key_names))]),
+        ExpressionAttributeNames={"#k": INVOICE_KEY_ATTR, **{"#p%d" % i: n for i, n in enumerate(key_names)}},
+    ):
+        table.update_item(
+            Key={n: item[n] for n in key_names},
+            UpdateExpression="SET #k = :k",
+            ExpressionAttributeNames={"#k": INVOICE_KEY_ATTR},
+            ExpressionAttributeValues={":k": invoice_key(item["Invoice_Number"], item.get("Claim_Type", ""))},
+        )
+        updated += 1
+
+    return updated
+
+
+# -------------------------------------------------------------
+# CLI
+# -------------------------------------------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Invoice_Key index maintenance for claimed_invoice")
+    ap.add_argument("command", choices=["create-index", "backfill"])
+    ap.add_argument("--table", default="claimed_invoice")
+    ap.add_argument("--region", default="ap-south-1")
+
+    args = ap.parse_args(argv)
+    table = boto3.resource("dynamodb", region_name=args.region).Table(args.table)
+
+    if args.command == "create-index":
+        create_index(table)
+        print(f"Creating {INVOICE_KEY_INDEX} on {args.table}")
+    else:
+        print(f"Backfilled {backfill(table)} items in {args.table}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import importlib
+import threading
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+JOBS_DB = os.environ.get("JOBS_DB", "jobs.db")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+
+# A RUNNING job whose lease has expired is assumed lost (worker killed,
+# host restarted) and is handed to the next free worker. A live worker
+# renews its lease every JOB_LEASE_SECONDS / 3 while the handler runs,
+# so slow jobs are never run twice at once.
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+
+# submit() refuses new work once this many jobs are waiting (0: no limit),
+# so a backlog turns into 503s for clients instead of unbounded latency
+JOB_QUEUE_MAX = int(os.environ.get("JOB_QUEUE_MAX", "1000"))
+JOB_POLL_SECONDS = 0.5
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+
+# -------------------------------------------------------------
+# QUEUE
+# -------------------------------------------------------------
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_queued jobs are already waiting."""
+
+
+class JobQueue:
+    """
+    Durable job queue on SQLite. Jobs outlive the workers that run them:
+    a claim is only a lease, so work held by a dead worker is retried.
+    Use path=":memory:" for an in-process queue (thread workers only).
+    """
+
+    def __init__(self, path=JOBS_DB, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS,
+                 max_queued=JOB_QUEUE_MAX):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_queued = max_queued
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def submit(self, payload):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.max_queued:
+                    (waiting,) = self._conn.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)
+                    ).fetchone()
+                    if waiting >= self.max_queued:
+                        raise QueueFull("%d jobs already queued" % waiting)
+
+                self._conn.execute(
+                    "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, QUEUED, json.dumps(payload), now, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self, worker_id, on_abandon=None):
+        """
+        Lease the oldest runnable job; returns (job_id, payload) or None.
+        Jobs out of attempts are failed on the way, and on_abandon (if
+        given) is called with each one's payload so it can clean up.
+        """
+        now = time.time()
+        abandoned = []
+        try:
+            return self._claim(worker_id, now, abandoned)
+        finally:
+            for job_id, payload in abandoned:
+                if on_abandon is None:
+                    continue
+                try:
+                    on_abandon(json.loads(payload))
+                except Exception:
+                    logger.exception("cleanup of abandoned job %s failed", job_id)
+
+    def _claim(self, worker_id, now, abandoned):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        """
+                        SELECT id, payload, attempts FROM jobs
+                        WHERE status = ? OR (status = ? AND lease_expires < ?)
+                        ORDER BY created_at LIMIT 1
+                        """,
+                        (QUEUED, RUNNING, now),
+                    ).fetchone()
+
+                    if row is None:
+                        self._conn.execute("COMMIT")
+                        return None
+
+                    job_id, payload, attempts = row
+                    if attempts >= self.max_attempts:
+                        self._finish(job_id, FAILED, None, "Job abandoned after %d attempts" % attempts, now)
+                        if payload is not None:
+                            abandoned.append((job_id, payload))
+                        continue
+
+                    self._conn.execute(
+                        """
+                        UPDATE jobs SET status = ?, worker = ?, lease_expires = ?,
+                                        attempts = attempts + 1, updated_at = ?
+                        WHERE id = ?
+                        """,
+                        (RUNNING, worker_id, now + self.lease_seconds, now, job_id),
+                    )
+                    self._conn.execute("COMMIT")
+                    return job_id, json.loads(payload)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _finish(self, job_id, status, result, error, now, worker_id=None):
+        """Record the outcome; with worker_id, only while that worker still holds the lease."""
+        sql = """
+            UPDATE jobs SET status = ?, result = ?, error = ?, payload = NULL,
+                            lease_expires = NULL, updated_at = ?
+            WHERE id = ?
+        """
+        args = [status, json.dumps(result) if result is not None else None, error, now, job_id]
+        if worker_id is not None:
+            sql += " AND status = ? AND worker = ?"
+            args += [RUNNING, worker_id]
+        return self._conn.execute(sql, args).rowcount
+
+    def complete(self, job_id, result, worker_id=None):
+        with self._lock:
+            return self._finish(job_id, DONE, result, None, time.time(), worker_id)
+
+    def fail(self, job_id, error, worker_id=None):
+        with self._lock:
+            return self._finish(job_id, FAILED, None, error, time.time(), worker_id)
+
+    def renew(self, job_id, worker_id):
+        """Extend worker_id's lease on a running job; False once the lease is lost."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (now + self.lease_seconds, now, job_id, RUNNING, worker_id),
+            )
+        return cur.rowcount == 1
+
+    def release(self, worker_id):
+        """Put jobs leased by a dead worker back on the queue."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE status = ? AND worker = ?",
+                (QUEUED, time.time(), RUNNING, worker_id),
+            )
+        return cur.rowcount
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result, error, attempts, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        status, result, error, attempts, created_at, updated_at = row
+        job = {
+            "job_id": job_id,
+            "status": status,
+            "attempts": attempts,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+
+# -------------------------------------------------------------
+# WORKERS
+# -------------------------------------------------------------
+def resolve_handler(handler):
+    if callable(handler):
+        return handler
+    module, _, name = handler.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _heartbeat(queue, job_id, worker_id, done):
+    while not done.wait(queue.lease_seconds / 3):
+        if not queue.renew(job_id, worker_id):
+            logger.warning("job %s: lease lost by worker %s", job_id, worker_id)
+            return
+
+
+def run_worker(queue, handler, worker_id, stop=None, poll=JOB_POLL_SECONDS, cleanup=None):
+    """
+    Claim and run jobs until stop is set. cleanup (optional) is called
+    with the payload of every job abandoned after max_attempts.
+    """
+    handler = resolve_handler(handler)
+    cleanup = resolve_handler(cleanup) if cleanup else None
+
+    while stop is None or not stop.is_set():
+        job = queue.claim(worker_id, on_abandon=cleanup)
+        if job is None:
+            time.sleep(poll)
+            continue
+
+        job_id, payload = job
+        done = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(queue, job_id, worker_id, done), daemon=True)
+        beat.start()
+        try:
+            result = handler(payload)
+        except Exception as e:
+            logger.exception("job %s failed", job_id)
+            recorded = queue.fail(job_id, str(e), worker_id)
+        else:
+            recorded = queue.complete(job_id, result, worker_id)
+        finally:
+            done.set()
+            beat.join()
+
+        if not recorded:
+            logger.warning("job %s: outcome dropped, worker %s no longer held the lease", job_id, worker_id)
+
+
+def _process_main(db_path, handler, worker_id, cleanup):
+    run_worker(JobQueue(db_path), handler, worker_id, cleanup=cleanup)
+
+
+class WorkerPool:
+    """
+    Bounded pool of job workers. mode="process" isolates OCR crashes in
+    child processes and restarts them; mode="thread" keeps everything in
+    one process, which is what tests and ":memory:" queues need.
+    """
+
+    def __init__(self, queue, handler, workers=JOB_WORKERS, mode="process", cleanup=None):
+        self.queue = queue
+        self.handler = handler
+        self.cleanup = cleanup
+        self.workers = max(1, int(workers))
+        self.mode = mode
+
+        self._stop = threading.Event()
+        self._members = {}
+        self._supervisor = None
+
+    def _spawn(self, worker_id):
+        if self.mode == "thread":
+            member = threading.Thread(
+                target=run_worker,
+                args=(self.queue, self.handler, worker_id, self._stop),
+                kwargs={"cleanup": self.cleanup},
+                daemon=True,
+            )
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            member = ctx.Process(
+                target=_process_main,
+                args=(self.queue.path, self.handler, worker_id, self.cleanup),
+                daemon=True,
+            )
+        member.start()
+        self._members[worker_id] = member
+
+    def start(self):
+        for i in range(self.workers):
+            self._spawn(f"{os.getpid()}-{i}-{uuid.uuid4().hex[:8]}")
+
+        if self.mode == "process":
+            self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+            self._supervisor.start()
+        return self
+
+    def _supervise(self):
+        while not self._stop.wait(1.0):
+            for worker_id, member in list(self._members.items()):
+                if member.is_alive():
+                    continue
+
+                released = self.queue.release(worker_id)
+                logger.warning(
+                    "job worker %s exited (code %s), requeued %d job(s)",
+                    worker_id, member.exitcode, released,
+                )
+                del self._members[worker_id]
+                self._spawn(f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for worker_id, member in self._members.items():
+            if self.mode == "process":
+                member.terminate()
+            member.join(timeout)
+            self.queue.release(worker_id)
+        self._members.clear()
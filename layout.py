@@ -0,0 +1,125 @@
+import os
+import math
+import logging
+
+import backends
+import raster
+import textlayer
+from fields import extract_fields
+from orientation import orient
+from refine import missing_fields
+from metrics import OCR_PAGES
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# Vendor, invoice number and date sit in the header; the total sits in
+# the last block of text. Layout-first OCR finds the text lines with the
+# cheap row profile in raster.py and OCRs only those two bands. The full
+# page is OCR'd only when the crops don't yield ROI_REQUIRED_FIELDS.
+LAYOUT_ROI = os.environ.get("LAYOUT_ROI", "1") == "1"
+ROI_HEADER_LINES = int(os.environ.get("ROI_HEADER_LINES", "15"))
+ROI_TOTALS_FRACTION = float(os.environ.get("ROI_TOTALS_FRACTION", "0.35"))
+ROI_TOTALS_MIN_LINES = int(os.environ.get("ROI_TOTALS_MIN_LINES", "8"))
+ROI_REQUIRED_FIELDS = [
+    f for f in os.environ.get("ROI_REQUIRED_FIELDS", "invoice_date,invoice_number,total").split(",") if f
+]
+
+
+# -------------------------------------------------------------
+# REGIONS
+# -------------------------------------------------------------
+def header_box(img, lines):
+    return raster.lines_box(img, lines[:ROI_HEADER_LINES])
+
+
+def totals_box(img, lines):
+    count = max(ROI_TOTALS_MIN_LINES, math.ceil(len(lines) * ROI_TOTALS_FRACTION))
+    return raster.lines_box(img, lines[-count:])
+
+
+def regions(first, last):
+    """
+    [(image, box)] to OCR: the header band of the first page and the
+    totals band of the last, as one box when they meet on a single page.
+    None when either page shows no clear text lines.
+    """
+    first_lines = raster.text_lines(first)
+    last_lines = first_lines if last is first else raster.text_lines(last)
+    if len(first_lines) < raster.MIN_TEXT_LINES or len(last_lines) < raster.MIN_TEXT_LINES:
+        return None
+
+    header, totals = header_box(first, first_lines), totals_box(last, last_lines)
+    if last is first and totals[1] <= header[3]:
+        return [(first, (0, header[1], first.width, totals[3]))]
+    return [(first, header), (last, totals)]
+
+
+def adaptive_pages(ctx):
+    """First and last page at the resolution raster.py picks for them."""
+    if ctx.kind != "pdf":
+        img = ctx.page_image(0)
+        page = raster.downscale(img, raster.pick_scale(raster.line_height_px(img)))
+        return page, page
+
+    pages = []
+    for index in sorted({0, ctx.page_count() - 1}):
+        pages.append(ctx.page_image(index, raster.pick_dpi(raster.line_height_px(ctx.probe_image(index)))))
+    return pages[0], pages[-1]
+
+
+# -------------------------------------------------------------
+# LAYOUT-FIRST FIELDS
+# -------------------------------------------------------------
+def roi_fields(ctx):
+    """
+    Fields read from the header and totals crops only, or None when the
+    full text should be used instead: a PDF with a text layer, a page
+    whose orientation or lines can't be made out, or crops that miss
+    one of ROI_REQUIRED_FIELDS. On success ctx.partial_text holds the
+    crops' text.
+    """
+    if not LAYOUT_ROI:
+        return None
+
+    text = ctx.cached("roi_text")
+    if text is None:
+        if ctx.cached("text") is not None:
+            return None  # a full read is already paid for
+        if ctx.kind == "pdf" and any(textlayer.usable(t) for t in ctx.text_layer()):
+            return None
+
+        text = read_regions(ctx)
+        if text is None:
+            return None
+
+    fields = extract_fields(text)
+    missing = [f for f in missing_fields(fields) if f in ROI_REQUIRED_FIELDS]
+    if missing:
+        logger.info("header/totals crops missed %s, reading the full page", missing)
+        return None
+
+    ctx.partial_text = text
+    ctx.remember(roi_text=text)
+    return fields
+
+
+def read_regions(ctx):
+    first, last = adaptive_pages(ctx)
+
+    upright = []
+    for page in (first, last) if last is not first else (first,):
+        img, angle = orient(page)
+        if angle is None:
+            return None  # the full-page path tries every angle
+        upright.append(img)
+
+    boxes = regions(upright[0], upright[-1])
+    if boxes is None:
+        return None
+
+    pytesseract = backends.get("pytesseract")
+    OCR_PAGES.inc(len(upright))
+    return "\n".join(pytesseract.image_to_string(img.crop(box)) for img, box in boxes)
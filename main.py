@@ -1,15 +1,10 @@
-import os
-import tempfile
-
 # import the updated safe decryption functions
 from dec import safe_decrypt_text as decrypt_text
 from dec import safe_decrypt_file as decrypt_file
 
-from date import extract_date_from_text
-from total import extract_total
-from invoice import extract_invoice
+from fields import extract_fields
 from ven1 import get_vendor
-from total import extract_text_full
+from document import DocumentContext
 
 
 # -------------------------------------------------------------
@@ -26,18 +21,17 @@ def process_invoice_request(enc_date, enc_total, enc_invoice, enc_vendor, enc_fi
     # STEP 2 — decrypt actual uploaded file (Base64 → bytes)
     file_bytes = decrypt_file(enc_file)
 
-    # STEP 3 — save decrypted file temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(file_bytes)
-        temp_path = tmp.name
+    # STEP 3 — open the decrypted file once for every extractor
+    ctx = DocumentContext.from_bytes(file_bytes)
 
     # STEP 4 — extract text from the invoice
-    text = extract_text_full(temp_path)
+    text = ctx.text
 
-    found_date = extract_date_from_text(text)
-    found_total = extract_total(text)
-    found_invoice = extract_invoice(text)
-    found_vendor = get_vendor(temp_path)
+    fields = extract_fields(text)
+    found_date = fields["invoice_date"]
+    found_total = fields["total"]
+    found_invoice = fields["invoice_number"]
+    found_vendor = get_vendor(ctx)
 
     # STEP 5 — compare extracted values with expected values
     result = {
@@ -57,9 +51,6 @@ def process_invoice_request(enc_date, enc_total, enc_invoice, enc_vendor, enc_fi
                          dec_expected_vendor.lower()),
     }
 
-    # remove temporary decrypted file
-    os.remove(temp_path)
-
     return result
 
 
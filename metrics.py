@@ -0,0 +1,200 @@
+import time
+import bisect
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; OCR of a long scan can take tens of seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+# -------------------------------------------------------------
+# METRIC TYPES
+# -------------------------------------------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self, key, value):
+        return [f"{self.name}_total{_labels(self.labelnames, key)} {value}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - began, **labels)
+
+    def _samples(self, key, value):
+        counts, total, count = value
+        out, running = [], 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            running += n
+            le = 'le="%s"' % ("+Inf" if bound == float("inf") else repr(float(bound)))
+            out.append(f"{self.name}_bucket{_labels(self.labelnames, key, [le])} {running}")
+        out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+        out.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return out
+
+
+# -------------------------------------------------------------
+# REGISTRY
+# -------------------------------------------------------------
+class Registry:
+    """
+    Metrics of this process. Recording is a dict update under a lock;
+    the exposition text is only built when /metrics is scraped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labels=()):
+    return REGISTRY.register(Counter(name, help, labels))
+
+
+def histogram(name, help, labels=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+# -------------------------------------------------------------
+# PIPELINE METRICS
+# -------------------------------------------------------------
+REQUEST_SECONDS = histogram(
+    "claim_request_seconds", "Request latency by endpoint and outcome status.", ["endpoint", "status"]
+)
+STAGE_SECONDS = histogram(
+    "claim_stage_seconds", "Time spent per pipeline stage.", ["stage"]
+)
+OCR_PAGES = counter("ocr_pages", "Pages run through OCR.")
+PAGES_SKIPPED = counter("pages_skipped", "PDF pages never read because the fields were found on earlier ones.")
+OCR_CACHE_LOOKUPS = counter("ocr_cache_lookups", "OCR result cache lookups.", ["result"])
+DYNAMODB_CALLS = counter("dynamodb_calls", "DynamoDB API calls.", ["operation"])
+
+
+def stage(name):
+    """with stage("ocr"): ... -> claim_stage_seconds{stage="ocr"}"""
+    return STAGE_SECONDS.time(stage=name)
+
+
+def _outcome(rv):
+    """Outcome label of a Flask view's return value: the JSON "status", else the HTTP code."""
+    code = 200
+    if isinstance(rv, tuple):
+        rv, code = rv[0], rv[1] if len(rv) > 1 else 200
+    if isinstance(rv, dict):
+        return str(rv.get("status", code))
+
+    code = getattr(rv, "status_code", code)
+    if getattr(rv, "is_json", False):
+        body = rv.get_json(silent=True)
+        if isinstance(body, dict) and "status" in body:
+            return str(body["status"])
+    return str(code)
+
+
+def track_request(endpoint):
+    """Decorator for Flask views: request latency labelled with the outcome."""
+    def wrap(view):
+        @wraps(view)
+        def inner(*args, **kwargs):
+            began = time.perf_counter()
+            status = "EXCEPTION"
+            try:
+                rv = view(*args, **kwargs)
+                status = _outcome(rv)
+                return rv
+            finally:
+                REQUEST_SECONDS.observe(time.perf_counter() - began, endpoint=endpoint, status=status)
+        return inner
+    return wrap
+
+
+def metrics_view():
+    from flask import Response
+
+    return Response(REGISTRY.render(), mimetype=CONTENT_TYPE.split(";")[0], content_type=CONTENT_TYPE)
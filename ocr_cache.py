@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+
+from metrics import OCR_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+OCR_CACHE_ENABLED = os.environ.get("OCR_CACHE", "1") == "1"
+OCR_CACHE_PATH = os.environ.get("OCR_CACHE_PATH", "ocr_cache.db")
+OCR_CACHE_MAX_BYTES = int(os.environ.get("OCR_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+OCR_CACHE_MAX_AGE = int(os.environ.get("OCR_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+# Bump whenever text extraction or field parsing changes so stale
+# results are not served for the new code. The settings that change
+# what is extracted (extraction_config) are part of the key as well.
+#   2: single-scan fields, adaptive resolution + refinement, header/
+#      totals crops, PyMuPDF text layer with per-page OCR, in-process
+#      rendering, early exit
+EXTRACTOR_VERSION = "2"
+
+
+# -------------------------------------------------------------
+# CACHE
+# -------------------------------------------------------------
+class OCRCache:
+    """
+    Content-addressed store of extraction results, keyed by file hash
+    and version (get_cache uses cache_version()). Entries are evicted
+    least-recently-used once the cache is over max_bytes, or when older
+    than max_age.
+    """
+
+    def __init__(self, path=OCR_CACHE_PATH, max_bytes=OCR_CACHE_MAX_BYTES,
+                 max_age=OCR_CACHE_MAX_AGE, version=EXTRACTOR_VERSION):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.version = version
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (hash, version)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def get(self, content_hash):
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM entries WHERE hash = ? AND version = ?",
+                (content_hash, self.version),
+            ).fetchone()
+
+            if row is None or row[1] < now - self.max_age:
+                self.misses += 1
+                OCR_CACHE_LOOKUPS.inc(result="miss")
+                return None
+
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE hash = ? AND version = ?",
+                (now, content_hash, self.version),
+            )
+            self.hits += 1
+            OCR_CACHE_LOOKUPS.inc(result="hit")
+
+        return json.loads(row[0])
+
+    def put(self, content_hash, **parts):
+        """Merge parts into the entry for content_hash (dict values merge key by key)."""
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM entries WHERE hash = ? AND version = ?",
+                (content_hash, self.version),
+            ).fetchone()
+
+            payload = json.loads(row[0]) if row else {}
+            created_at = row[1] if row else now
+
+            for key, value in parts.items():
+                if isinstance(value, dict) and isinstance(payload.get(key), dict):
+                    payload[key] = {**payload[key], **value}
+                else:
+                    payload[key] = value
+
+            blob = json.dumps(payload)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, self.version, blob, len(blob), created_at, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.max_age,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        freed = 0
+        victims = []
+        for key, version, size in self._conn.execute(
+            "SELECT hash, version, size FROM entries ORDER BY accessed_at"
+        ):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key, version))
+            freed += size
+
+        self._conn.executemany("DELETE FROM entries WHERE hash = ? AND version = ?", victims)
+        logger.info("OCR cache evicted %d entries (%d bytes)", len(victims), freed)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+# -------------------------------------------------------------
+# CACHE KEY
+# -------------------------------------------------------------
+def extraction_config():
+    """Settings that change the text/fields extracted from the same file."""
+    # imported here: these modules sit above document.py, which imports us
+    import raster
+    import render
+    import layout
+    import textlayer
+    import incremental
+
+    return {
+        "ocr_adaptive": raster.OCR_ADAPTIVE,
+        "ocr_target_line_px": raster.OCR_TARGET_LINE_PX,
+        "ocr_dpi": [raster.OCR_PROBE_DPI, raster.OCR_MIN_DPI, raster.OCR_MAX_DPI],
+        "ocr_min_scale": raster.OCR_MIN_SCALE,
+        "render_engine": render.RENDER_ENGINE,
+        "layout_roi": layout.LAYOUT_ROI,
+        "roi": [layout.ROI_HEADER_LINES, layout.ROI_TOTALS_FRACTION, layout.ROI_TOTALS_MIN_LINES,
+                layout.ROI_REQUIRED_FIELDS],
+        "text_layer_engine": textlayer.TEXT_LAYER_ENGINE,
+        "text_layer_min_chars": textlayer.TEXT_LAYER_MIN_CHARS,
+        "early_exit": incremental.EARLY_EXIT,
+        "page_order": incremental.PAGE_ORDER,
+        "early_exit_fields": incremental.EARLY_EXIT_FIELDS,
+    }
+
+
+def cache_version(version=EXTRACTOR_VERSION):
+    """version plus a digest of extraction_config(), e.g. "2-3f9a0c1b2d4e"."""
+    digest = hashlib.sha1(json.dumps(extraction_config(), sort_keys=True).encode()).hexdigest()
+    return f"{version}-{digest[:12]}"
+
+
+# -------------------------------------------------------------
+# PROCESS-WIDE INSTANCE
+# -------------------------------------------------------------
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+
+    if not OCR_CACHE_ENABLED:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = OCRCache(version=cache_version())
+    return _cache
@@ -0,0 +1,164 @@
+import os
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+import backends
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# Number of warm EasyOCR readers kept per (languages, gpu) key.
+# Raise it when serving with several request threads.
+OCR_POOL_SIZE = int(os.environ.get("OCR_POOL_SIZE", "1"))
+
+# CPU by default; OCR_GPU=1 opts into CUDA (easyocr falls back to CPU on
+# its own when CUDA is unavailable). Before the shared pool, rohit.py's
+# reader ran on CPU but ven1.py's used easyocr's default, gpu=True: on a
+# CUDA host set OCR_GPU=1 to keep vendor OCR on the GPU. On CPU, serve.py
+# loads the readers once before forking so workers share them
+# copy-on-write; with OCR_GPU=1 each worker loads its own after the fork.
+OCR_GPU = os.environ.get("OCR_GPU", "0") == "1"
+
+DEFAULT_LANGS = ("en",)
+
+
+# -------------------------------------------------------------
+# READER POOL
+# -------------------------------------------------------------
+class ReaderPool:
+    """Loads EasyOCR readers once and hands them out as exclusive leases."""
+
+    def __init__(self, langs=DEFAULT_LANGS, gpu=OCR_GPU, size=OCR_POOL_SIZE):
+        self.langs = tuple(langs)
+        self.gpu = gpu
+        self.size = max(1, int(size))
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "readers": 0,
+            "load_seconds": 0.0,
+            "leases": 0,
+            "lease_wait_seconds": 0.0,
+            "max_lease_wait_seconds": 0.0,
+            "inferences": 0,
+            "inference_seconds": 0.0,
+        }
+
+    def _load(self):
+        easyocr = backends.get("easyocr")
+
+        start = time.perf_counter()
+        reader = easyocr.Reader(list(self.langs), gpu=self.gpu)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._stats["readers"] += 1
+            self._stats["load_seconds"] += elapsed
+
+        logger.info("EasyOCR reader %s loaded in %.2fs", self.langs, elapsed)
+        return reader
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait(), 0.0
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if create:
+            try:
+                return self._load(), 0.0
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        start = time.perf_counter()
+        reader = self._idle.get(timeout=timeout)
+        return reader, time.perf_counter() - start
+
+    @contextmanager
+    def lease(self, timeout=None):
+        reader, waited = self._acquire(timeout)
+
+        with self._lock:
+            self._stats["leases"] += 1
+            self._stats["lease_wait_seconds"] += waited
+            self._stats["max_lease_wait_seconds"] = max(
+                self._stats["max_lease_wait_seconds"], waited
+            )
+
+        try:
+            yield reader
+        finally:
+            self._idle.put(reader)
+
+    def readtext(self, image, **kwargs):
+        with self.lease() as reader:
+            start = time.perf_counter()
+            result = reader.readtext(image, **kwargs)
+            elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._stats["inferences"] += 1
+            self._stats["inference_seconds"] += elapsed
+
+        return result
+
+    def warm(self):
+        """Load every reader of the pool up front."""
+        held = []
+        try:
+            for _ in range(self.size):
+                held.append(self._acquire(None)[0])
+        finally:
+            for reader in held:
+                self._idle.put(reader)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=self.size)
+
+
+# -------------------------------------------------------------
+# PROCESS-WIDE REGISTRY
+# -------------------------------------------------------------
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(langs=DEFAULT_LANGS, gpu=OCR_GPU, size=OCR_POOL_SIZE):
+    key = (tuple(langs), gpu)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ReaderPool(langs, gpu=gpu, size=size)
+            _pools[key] = pool
+
+    return pool
+
+
+def readtext(image, langs=DEFAULT_LANGS, **kwargs):
+    return get_pool(langs).readtext(image, **kwargs)
+
+
+def stats():
+    with _pools_lock:
+        pools = list(_pools.items())
+
+    return {
+        f"{'+'.join(langs)}/{'gpu' if gpu else 'cpu'}": pool.stats()
+        for (langs, gpu), pool in pools
+    }
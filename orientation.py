@@ -0,0 +1,140 @@
+import os
+import logging
+
+import backends
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# Tesseract OSD confidence below which we don't trust the angle and
+# fall back to OCR'ing every rotation.
+OSD_MIN_CONFIDENCE = float(os.environ.get("OSD_MIN_CONFIDENCE", "2.0"))
+
+# OSD runs on a downscaled copy; orientation doesn't need full resolution
+OSD_MAX_SIDE = 1600
+
+FALLBACK_ANGLES = (0, 90, 180, 270)
+
+
+# -------------------------------------------------------------
+# ORIENTATION DETECTION
+# -------------------------------------------------------------
+def detect_orientation(img):
+    """
+    Return (angle, confidence) where angle is the counter-clockwise
+    PIL rotation that makes the page upright, or (None, 0.0) when
+    Tesseract can't tell.
+    """
+    small = img.copy()
+    small.thumbnail((OSD_MAX_SIDE, OSD_MAX_SIDE))
+
+    pytesseract = backends.get("pytesseract")
+    try:
+        osd = pytesseract.image_to_osd(small, output_type=pytesseract.Output.DICT)
+    except pytesseract.TesseractError as e:
+        logger.info("OSD failed: %s", str(e).strip())
+        return None, 0.0
+
+    # OSD reports the clockwise rotation, PIL rotates counter-clockwise
+    angle = (360 - int(osd["rotate"])) % 360
+    return angle, float(osd["orientation_conf"])
+
+
+def orient(img):
+    """Rotate img upright; returns (image, angle) with angle None on low confidence."""
+    angle, confidence = detect_orientation(img)
+    logger.info("orientation angle=%s confidence=%.2f", angle, confidence)
+
+    if angle is None or confidence < OSD_MIN_CONFIDENCE:
+        return img, None
+
+    if angle:
+        img = img.rotate(angle, expand=True)
+    return img, angle
+
+
+# -------------------------------------------------------------
+# OCR
+# -------------------------------------------------------------
+def ocr_all_angles(img, config=""):
+    pytesseract = backends.get("pytesseract")
+    best = ""
+    for angle in FALLBACK_ANGLES:
+        text = pytesseract.image_to_string(img.rotate(angle, expand=True), config=config)
+        if len(text) > len(best):
+            best = text
+    return best
+
+
+def ocr_oriented(img, config=""):
+    upright, angle = orient(img)
+
+    if angle is None:
+        logger.info("low orientation confidence, trying all %d angles", len(FALLBACK_ANGLES))
+        return ocr_all_angles(img, config=config)
+
+    return backends.get("pytesseract").image_to_string(upright, config=config)
+
+
+# -------------------------------------------------------------
+# OCR WITH LINE BOXES
+# -------------------------------------------------------------
+def ocr_data(img, config=""):
+    """
+    Text of img plus its lines as [(text, (left, top, right, bottom))],
+    from one image_to_data call. Lines are joined with newlines and
+    blocks/paragraphs with a blank line, like image_to_string.
+    """
+    pytesseract = backends.get("pytesseract")
+    d = pytesseract.image_to_data(img, config=config, output_type=pytesseract.Output.DICT)
+
+    lines = {}
+    for i, word in enumerate(d["text"]):
+        if not word or not word.strip():
+            continue
+        key = (d["block_num"][i], d["par_num"][i], d["line_num"][i])
+        left, top = d["left"][i], d["top"][i]
+        right, bottom = left + d["width"][i], top + d["height"][i]
+
+        if key not in lines:
+            lines[key] = [[word], [left, top, right, bottom]]
+            continue
+        words, box = lines[key]
+        words.append(word)
+        box[0], box[1] = min(box[0], left), min(box[1], top)
+        box[2], box[3] = max(box[2], right), max(box[3], bottom)
+
+    out, parts, prev = [], [], None
+    for key, (words, box) in lines.items():
+        line = " ".join(words)
+        if prev is not None and key[:2] != prev:
+            parts.append("")
+        parts.append(line)
+        out.append((line, tuple(box)))
+        prev = key[:2]
+
+    return "\n".join(parts), out
+
+
+def ocr_oriented_lines(img, config=""):
+    """
+    ocr_oriented with the line boxes kept: {"text", "lines", "angle",
+    "size"}. Boxes are in the image rotated by angle (expand=True);
+    size is that image's (width, height).
+    """
+    upright, angle = orient(img)
+
+    if angle is None:
+        logger.info("low orientation confidence, trying all %d angles", len(FALLBACK_ANGLES))
+        best = None
+        for a in FALLBACK_ANGLES:
+            rotated = img.rotate(a, expand=True)
+            text, lines = ocr_data(rotated, config=config)
+            if best is None or len(text) > len(best["text"]):
+                best = {"text": text, "lines": lines, "angle": a, "size": rotated.size}
+        return best
+
+    text, lines = ocr_data(upright, config=config)
+    return {"text": text, "lines": lines, "angle": angle or 0, "size": upright.size}
@@ -0,0 +1,119 @@
+import os
+import math
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# Pages are OCR'd at the lowest resolution that still gives Tesseract
+# text lines about OCR_TARGET_LINE_PX tall (10pt at 300 dpi is ~40px,
+# where its accuracy starts to drop). Fields the first pass misses are
+# re-read from full-resolution crops (refine.py).
+OCR_ADAPTIVE = os.environ.get("OCR_ADAPTIVE", "1") == "1"
+OCR_TARGET_LINE_PX = float(os.environ.get("OCR_TARGET_LINE_PX", "40"))
+
+# scanned PDFs: a cheap probe render to measure the text, then the real one
+OCR_PROBE_DPI = int(os.environ.get("OCR_PROBE_DPI", "100"))
+OCR_MIN_DPI = int(os.environ.get("OCR_MIN_DPI", "150"))
+OCR_MAX_DPI = int(os.environ.get("OCR_MAX_DPI", "300"))
+OCR_DPI_STEP = 25  # finer steps don't change what Tesseract reads
+
+# photos: only ever downscaled, never below this fraction
+OCR_MIN_SCALE = float(os.environ.get("OCR_MIN_SCALE", "0.25"))
+
+# line-height measurement works on a copy no larger than this
+MEASURE_MAX_SIDE = 1600
+MIN_TEXT_LINES = 3
+
+
+# -------------------------------------------------------------
+# TEXT LINE HEIGHT
+# -------------------------------------------------------------
+def _otsu(gray):
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    weight = np.cumsum(hist)
+    mean = np.cumsum(hist * np.arange(256))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mean[-1] * weight / total - mean) ** 2 / (weight * (total - weight))
+    return int(np.nanargmax(between[:-1]))
+
+
+def text_lines(img):
+    """
+    (top, bottom) pixel rows of img's text lines, top to bottom.
+
+    Rows with many ink/paper transitions are text rows; runs of them are
+    lines. Shadows and rules are long dark runs with few transitions, so
+    they don't count.
+    """
+    gray = ImageOps.grayscale(img)
+    factor = 1.0
+    if max(gray.size) > MEASURE_MAX_SIDE:
+        factor = max(gray.size) / MEASURE_MAX_SIDE
+        gray = gray.resize((max(1, round(gray.width / factor)), max(1, round(gray.height / factor))), Image.BILINEAR)
+
+    a = np.asarray(gray, dtype=np.uint8)
+    if a.size == 0:
+        return []
+
+    ink = a < _otsu(a)
+    transitions = np.count_nonzero(ink[:, 1:] != ink[:, :-1], axis=1)
+    text_rows = np.concatenate(([0], (transitions >= 8).astype(np.int8), [0]))
+
+    edges = np.flatnonzero(np.diff(text_rows))
+    lines = []
+    for top, bottom in zip(edges[0::2], edges[1::2]):
+        if 3 <= bottom - top <= a.shape[0] * 0.1:
+            lines.append((int(top * factor), min(img.height, int(math.ceil(bottom * factor)))))
+    return lines
+
+
+def line_height_px(img, lines=None):
+    """
+    Median height in pixels of img's text lines, or None when no clear
+    lines are found (skewed photos, pictures, blank pages).
+    """
+    lines = text_lines(img) if lines is None else lines
+    if len(lines) < MIN_TEXT_LINES:
+        return None
+    return float(np.median([bottom - top for top, bottom in lines]))
+
+
+def lines_box(img, lines, pad_lines=1):
+    """Full-width box around lines, padded by pad_lines line heights."""
+    if not lines:
+        return None
+    pad = pad_lines * sorted(bottom - top for top, bottom in lines)[len(lines) // 2]
+    return (0, max(0, lines[0][0] - pad), img.width, min(img.height, lines[-1][1] + pad))
+
+
+# -------------------------------------------------------------
+# RESOLUTION CHOICE
+# -------------------------------------------------------------
+def pick_dpi(line_px, probe_dpi=OCR_PROBE_DPI):
+    """Render dpi for a page whose lines are line_px tall at probe_dpi."""
+    if not line_px:
+        return OCR_MAX_DPI
+    dpi = probe_dpi * OCR_TARGET_LINE_PX / line_px
+    dpi = math.ceil(dpi / OCR_DPI_STEP) * OCR_DPI_STEP
+    return int(min(OCR_MAX_DPI, max(OCR_MIN_DPI, dpi)))
+
+
+def pick_scale(line_px):
+    """Downscale factor for a photo whose lines are line_px tall."""
+    if not line_px:
+        return 1.0
+    scale = OCR_TARGET_LINE_PX / line_px
+    scale = math.ceil(scale * 20) / 20  # 5% steps, rounded up
+    return min(1.0, max(OCR_MIN_SCALE, scale))
+
+
+def downscale(img, scale):
+    if scale >= 1.0:
+        return img
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.LANCZOS)
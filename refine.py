@@ -0,0 +1,119 @@
+import logging
+
+import backends
+import raster
+from fields import DATE_KEYS, INVOICE_KEYS, TOTAL_KEYS, extract_fields
+from metrics import stage, OCR_PAGES
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# A keyword line's value may sit on the line itself or just below it
+# (right-aligned totals, dates under a "Date" label).
+REGION_LINES_ABOVE = 1
+REGION_LINES_BELOW = 2
+REGION_OCR_CONFIG = "--psm 6"  # one uniform block of text
+
+FIELD_KEYS = {
+    "invoice_date": DATE_KEYS,
+    "invoice_number": INVOICE_KEYS,
+    "total": TOTAL_KEYS,
+}
+NOT_FOUND = {
+    "invoice_date": (None, ""),
+    "invoice_number": (None, "", "Invoice Not Found"),
+    "total": (None, "", "Total not found"),
+}
+
+
+# -------------------------------------------------------------
+# SECOND PASS FOR MISSED FIELDS
+# -------------------------------------------------------------
+def missing_fields(fields):
+    return [k for k, empty in NOT_FOUND.items() if fields.get(k) in empty]
+
+
+def keyword_boxes(lines, fields):
+    """Boxes of first-pass lines holding a keyword of any of fields."""
+    words = [w for f in fields for w in FIELD_KEYS[f].words]
+    return [box for text, box in lines if any(w in text.lower() for w in words)]
+
+
+def bands(boxes, width, height):
+    """Full-width horizontal strips around boxes, overlapping ones merged."""
+    strips = []
+    for left, top, right, bottom in sorted(boxes, key=lambda b: b[1]):
+        line = max(1, bottom - top)
+        strip = [max(0, top - REGION_LINES_ABOVE * line), min(height, bottom + REGION_LINES_BELOW * line)]
+        if strips and strip[0] <= strips[-1][1]:
+            strips[-1][1] = max(strips[-1][1], strip[1])
+        else:
+            strips.append(strip)
+    return [(0, top, width, bottom) for top, bottom in strips]
+
+
+def full_resolution(ctx, index, info):
+    """The page at full resolution, rotated like the first pass; and its scale to the first pass."""
+    if "dpi" in info:
+        img = ctx.page_image(index, raster.OCR_MAX_DPI)
+        factor = raster.OCR_MAX_DPI / info["dpi"]
+    else:
+        img = ctx.page_image(0)
+        factor = 1.0 / info["scale"]
+
+    if info["angle"]:
+        img = img.rotate(info["angle"], expand=True)
+    return img, factor
+
+
+def refine_fields(ctx, fields):
+    """
+    Fill fields the adaptive first pass missed by OCR'ing, at full
+    resolution, only the strips of the page around the missing fields'
+    keyword lines. A page with none of those keywords is re-read whole.
+    Fields already found are kept as they are.
+    """
+    missing = missing_fields(fields)
+    if not missing:
+        return fields
+
+    if not ctx.page_ocr:
+        # text came from the result cache (or a PDF text layer): reuse
+        # what an earlier refinement found, if anything
+        return {**fields, **{k: v for k, v in (ctx.cached("refined") or {}).items() if k in missing}}
+
+    pytesseract = backends.get("pytesseract")
+    texts = []
+
+    with stage("refine"):
+        for index, info in sorted(ctx.page_ocr.items()):
+            if info.get("dpi") == raster.OCR_MAX_DPI or info.get("scale") == 1.0:
+                continue  # already read at full resolution
+
+            img, factor = full_resolution(ctx, index, info)
+            boxes = keyword_boxes(info["lines"], missing)
+            info["refined_px"] = 0
+
+            if not boxes:
+                OCR_PAGES.inc()
+                info["refined_px"] = img.width * img.height
+                texts.append(pytesseract.image_to_string(img))
+                continue
+
+            scaled = [tuple(round(v * factor) for v in box) for box in boxes]
+            for region in bands(scaled, img.width, img.height):
+                crop = img.crop(region)
+                info["refined_px"] += crop.width * crop.height
+                texts.append(pytesseract.image_to_string(crop, config=REGION_OCR_CONFIG))
+
+    if not texts:
+        return fields
+
+    found = extract_fields("\n".join(texts))
+    refined = {k: found[k] for k in missing if found[k] not in NOT_FOUND[k]}
+    logger.info("refinement of %s found %s", missing, sorted(refined))
+
+    ctx.remember(refined=refined)
+    return {**fields, **refined}
@@ -0,0 +1,130 @@
+import os
+import platform
+
+from PIL import Image
+
+import backends
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# PDF pages are rasterized in-process from the bytes already in memory.
+# pdf2image instead runs pdftoppm once per call, which writes PPM files
+# to a temp dir that are then decoded back. "poppler" keeps that path
+# for comparison, or for a host without pypdfium2/PyMuPDF.
+RENDER_ENGINE = os.environ.get("RENDER_ENGINE", "pdfium")  # pdfium | pymupdf | poppler
+
+if platform.system() == "Windows":
+    POPPLER_PATH = r"C:\poppler-25.07.0\Library\bin"
+else:
+    POPPLER_PATH = None
+
+# PDFium/MuPDF calls hold backends.pdf_lock. One page is rendered per
+# lock hold, so a long document doesn't block other requests for its
+# whole length.
+
+
+# -------------------------------------------------------------
+# ENGINES
+# -------------------------------------------------------------
+def _page_range(count, first_page, last_page):
+    """0-based indices for pdf2image-style 1-based, inclusive first/last_page."""
+    first = max(1, first_page or 1)
+    last = min(count, last_page or count)
+    return range(first - 1, last)
+
+
+def pdfium_pages(source, dpi, first_page=None, last_page=None):
+    pdfium = backends.get("pypdfium2")
+    with backends.pdf_lock:
+        pdf = pdfium.PdfDocument(source)
+    try:
+        for index in _page_range(len(pdf), first_page, last_page):
+            with backends.pdf_lock:
+                page = pdf[index]
+                # BGR(x) bitmaps are copied into the PIL image, so the
+                # bitmap and page can be released straight away
+                img = page.render(scale=dpi / 72).to_pil()
+                page.close()
+            yield img
+    finally:
+        with backends.pdf_lock:
+            pdf.close()
+
+
+def pymupdf_pages(source, dpi, first_page=None, last_page=None):
+    fitz = backends.get("fitz")
+    with backends.pdf_lock:
+        doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, bytes) else fitz.open(source)
+    try:
+        for index in _page_range(doc.page_count, first_page, last_page):
+            with backends.pdf_lock:
+                pix = doc.load_page(index).get_pixmap(dpi=dpi, alpha=False)
+                img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+            yield img
+    finally:
+        with backends.pdf_lock:
+            doc.close()
+
+
+def poppler_pages(source, dpi, first_page=None, last_page=None):
+    pdf2image = backends.get("pdf2image")
+    kwargs = {"dpi": dpi, "first_page": first_page, "last_page": last_page}
+    if POPPLER_PATH:
+        kwargs["poppler_path"] = POPPLER_PATH
+    if isinstance(source, bytes):
+        yield from pdf2image.convert_from_bytes(source, **kwargs)
+    else:
+        yield from pdf2image.convert_from_path(source, **kwargs)
+
+
+ENGINES = {
+    "pdfium": pdfium_pages,
+    "pymupdf": pymupdf_pages,
+    "poppler": poppler_pages,
+}
+
+
+# -------------------------------------------------------------
+# RENDERING
+# -------------------------------------------------------------
+def iter_pages(source, dpi=300, first_page=None, last_page=None, engine=None):
+    """
+    RGB PIL images of a PDF's pages, one at a time. source is the PDF's
+    bytes or path; first_page/last_page are 1-based and inclusive, as in
+    pdf2image. Each page is rendered only when the caller asks for it, so
+    a consumer can OCR page n while page n+1 is being rendered.
+    """
+    return ENGINES[engine or RENDER_ENGINE](source, dpi, first_page, last_page)
+
+
+def render_pages(source, dpi=300, first_page=None, last_page=None, engine=None):
+    """Like pdf2image.convert_from_bytes/convert_from_path, from memory."""
+    return list(iter_pages(source, dpi, first_page, last_page, engine))
+
+
+def page_count(source, engine=None):
+    """Number of pages in the PDF (bytes or path), without rendering any."""
+    engine = engine or RENDER_ENGINE
+    if engine == "pdfium":
+        pdfium = backends.get("pypdfium2")
+        with backends.pdf_lock:
+            pdf = pdfium.PdfDocument(source)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+    if engine == "pymupdf":
+        fitz = backends.get("fitz")
+        with backends.pdf_lock:
+            doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, bytes) else fitz.open(source)
+            try:
+                return doc.page_count
+            finally:
+                doc.close()
+
+    pdf2image = backends.get("pdf2image")
+    kwargs = {"poppler_path": POPPLER_PATH} if POPPLER_PATH else {}
+    if isinstance(source, bytes):
+        return pdf2image.pdfinfo_from_bytes(source, **kwargs)["Pages"]
+    return pdf2image.pdfinfo_from_path(source, **kwargs)["Pages"]
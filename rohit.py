@@ -1,14 +1,12 @@
 import re
 from datetime import datetime
-import easyocr
 import warnings
 import os
 import logging
 from typing import List, Dict, Any, Optional
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s', force=True) 
-warnings.filterwarnings("ignore", category=UserWarning)
+import ocr_pool
+
 
 # ---------- Config ----------
 VENDOR_KEYWORDS = [
@@ -35,13 +33,6 @@ MONTH_MAP = {
     'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
 }
 
-# ---------- Initialization ----------
-try:
-    reader = easyocr.Reader(['en'], gpu=False)
-except Exception as e:
-    logging.error(f"Error initializing EasyOCR: {e}. OCR functionality disabled.")
-    reader = None
-
 # ---------- Helper Functions (Previous reliable versions) ----------
 
 def clean_and_convert(s: str) -> float:
@@ -84,9 +75,8 @@ def is_noise(text: str) -> bool:
     return False
 
 def extract_text(img_path: str) -> List[Dict[str, Any]]:
-    if reader is None: return []
     try:
-        results = reader.readtext(img_path, detail=1, paragraph=False)
+        results = ocr_pool.readtext(img_path, detail=1, paragraph=False)
 
         # print(results)
         date_pattern = re.compile(r'\b\d{1,2}\s*[A-Za-z]{3,9}\s*\d{2,4}\b')
@@ -354,6 +344,10 @@ def extract_invoice_details(img_path: str) -> Dict[str, str]:
     return ""
 
 if __name__ == "__main__":
+    # Configure logging (only when run as a script, not when imported)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s', force=True)
+    warnings.filterwarnings("ignore", category=UserWarning)
+
     image_paths = [
         # "bills_folder/test.jpg",
         # "bills_folder/Media.jpg",
@@ -0,0 +1,331 @@
+"""
+Preforking production server for the Flask entry points.
+
+The parent imports the app and warms the OCR backends once. It then
+forks SERVE_WORKERS workers that accept on a shared socket, so model
+weights loaded before the fork are shared copy-on-write. Each worker
+serves one request at a time and is replaced after SERVE_MAX_REQUESTS
+requests (plus jitter, so they don't all restart together) or once its
+RSS passes SERVE_MAX_RSS_MB; this contains slow leaks in
+torch/Tesseract. SIGTERM/SIGINT stop the workers after their current
+request, waiting up to SERVE_GRACEFUL_TIMEOUT seconds before killing
+them.
+
+Async jobs get one pool for the whole server, in a process of its own
+that the arbiter restarts if it dies. It runs the app module's
+start_job_pool() (or --jobs module:attr); the HTTP workers only submit
+to the job queue and read it. Each worker's OCR page pool gets its
+share of the host's CPUs (OCR_PAGE_WORKERS, if not set, is CPUs divided
+by workers).
+
+    python serve.py app:app --workers 4 --port 5001
+
+POSIX only (fork). /metrics is per process, so each scrape sees the
+worker that answered it.
+"""
+import os
+import sys
+import time
+import random
+import signal
+import socket
+import logging
+import argparse
+import importlib
+
+import backends
+
+logger = logging.getLogger("serve")
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+SERVE_HOST = os.environ.get("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.environ.get("SERVE_PORT", "5001"))
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", str(os.cpu_count() or 1)))
+SERVE_MAX_REQUESTS = int(os.environ.get("SERVE_MAX_REQUESTS", "500"))
+SERVE_MAX_REQUESTS_JITTER = int(os.environ.get("SERVE_MAX_REQUESTS_JITTER", "50"))
+SERVE_MAX_RSS_MB = float(os.environ.get("SERVE_MAX_RSS_MB", "3072"))
+SERVE_GRACEFUL_TIMEOUT = float(os.environ.get("SERVE_GRACEFUL_TIMEOUT", "30"))
+SERVE_BACKLOG = int(os.environ.get("SERVE_BACKLOG", "128"))
+
+# Backends imported in the parent before forking. CUDA cannot cross a
+# fork, so with OCR_GPU on the EasyOCR readers are warmed in each worker
+# instead of the parent.
+SERVE_PRELOAD = [
+    n for n in os.environ.get("SERVE_PRELOAD", "pytesseract,pypdfium2,fitz").split(",") if n
+]
+SERVE_WARM_OCR = os.environ.get("SERVE_WARM_OCR", "auto")  # auto | parent | worker | off
+
+# "module:attr" of a zero-argument callable that starts the job pool and
+# returns it (it must have stop()); "auto" uses start_job_pool from the
+# app's module if it has one, "" runs no job pool
+SERVE_JOBS = os.environ.get("SERVE_JOBS", "auto")
+
+# seconds a worker blocks in accept before rechecking its stop flags
+POLL_SECONDS = 1.0
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        import resource  # peak, not current, but better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_app(target):
+    """"module:attr" -> the WSGI app (attr defaults to "app")."""
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr or "app")
+
+
+# -------------------------------------------------------------
+# WARMUP
+# -------------------------------------------------------------
+def warm_ocr_where():
+    if SERVE_WARM_OCR != "auto":
+        return SERVE_WARM_OCR
+    import ocr_pool
+    return "worker" if ocr_pool.OCR_GPU else "parent"
+
+
+def warm_ocr():
+    import ocr_pool
+
+    began = time.perf_counter()
+    try:
+        ocr_pool.get_pool().warm()
+    except Exception as e:
+        logger.warning("OCR warmup failed: %s", e)
+        return
+    logger.info("pid %d: OCR readers warm in %.1fs", os.getpid(), time.perf_counter() - began)
+
+
+# -------------------------------------------------------------
+# WORKER
+# -------------------------------------------------------------
+def worker_main(sock, app, max_requests, max_rss_mb, warm):
+    from werkzeug.serving import make_server
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles ^C
+
+    if warm:
+        warm_ocr()
+
+    handled = []
+
+    def counted(environ, start_response):
+        handled.append(True)
+        return app(environ, start_response)
+
+    server = make_server(sock.getsockname()[0], sock.getsockname()[1], counted, fd=sock.fileno())
+    server.timeout = POLL_SECONDS
+
+    served = 0
+    while not stopping:
+        server.handle_request()
+        if handled:
+            served += len(handled)
+            handled.clear()
+
+            if served >= max_requests:
+                logger.info("pid %d: recycling after %d requests", os.getpid(), served)
+                break
+            rss = current_rss_mb()
+            if rss > max_rss_mb:
+                logger.info("pid %d: recycling at %.0f MB RSS after %d requests", os.getpid(), rss, served)
+                break
+
+    server.server_close()
+    os._exit(0)
+
+
+# -------------------------------------------------------------
+# JOB POOL
+# -------------------------------------------------------------
+def jobs_target(target, jobs=SERVE_JOBS):
+    if jobs != "auto":
+        return jobs or None
+    module = importlib.import_module(target.partition(":")[0])
+    return f"{module.__name__}:start_job_pool" if hasattr(module, "start_job_pool") else None
+
+
+def job_pool_main(start, graceful_timeout):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    pool = start()
+    logger.info("pid %d: job pool started", os.getpid())
+    while not stopping:
+        time.sleep(POLL_SECONDS)
+
+    pool.stop(timeout=graceful_timeout)  # terminates and joins the job processes
+    os._exit(0)
+
+
+# -------------------------------------------------------------
+# ARBITER
+# -------------------------------------------------------------
+class Arbiter:
+    def __init__(self, app, host=SERVE_HOST, port=SERVE_PORT, workers=SERVE_WORKERS,
+                 max_requests=SERVE_MAX_REQUESTS, max_rss_mb=SERVE_MAX_RSS_MB,
+                 graceful_timeout=SERVE_GRACEFUL_TIMEOUT, warm_in_worker=False, jobs=None):
+        self.app = app
+        self.jobs = jobs
+        self.jobs_pid = None
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_rss_mb = max_rss_mb
+        self.graceful_timeout = graceful_timeout
+        self.warm_in_worker = warm_in_worker
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(SERVE_BACKLOG)
+        # every worker polls the same socket; non-blocking so the ones
+        # that lose the race for a connection go back to polling
+        self.sock.setblocking(False)
+
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self):
+        max_requests = self.max_requests + random.randint(0, SERVE_MAX_REQUESTS_JITTER)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                worker_main(self.sock, self.app, max_requests, self.max_rss_mb, self.warm_in_worker)
+            except BaseException:
+                logger.exception("worker %d crashed", os.getpid())
+            finally:
+                os._exit(1)
+        self.children[pid] = time.monotonic()
+        logger.info("worker %d started", pid)
+
+    def spawn_jobs(self):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.sock.close()
+                job_pool_main(self.jobs, self.graceful_timeout)
+            except BaseException:
+                logger.exception("job pool %d crashed", os.getpid())
+            finally:
+                os._exit(1)
+        self.jobs_pid = pid
+        logger.info("job pool %d started", pid)
+
+    def reap(self):
+        while self.children or self.jobs_pid:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                self.jobs_pid = None
+                return
+            if pid == 0:
+                return
+            if pid == self.jobs_pid:
+                self.jobs_pid = None
+                logger.info("job pool %d exited (status %d)", pid, status)
+                continue
+            self.children.pop(pid, None)
+            logger.info("worker %d exited (status %d)", pid, status)
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        logger.info("listening on %s:%d with %d workers", *self.sock.getsockname()[:2], self.workers)
+        while not self.stopping:
+            self.reap()
+            while len(self.children) < self.workers and not self.stopping:
+                self.spawn()
+            if self.jobs and self.jobs_pid is None and not self.stopping:
+                self.spawn_jobs()
+            time.sleep(0.2)
+
+        self.shutdown()
+
+    def shutdown(self):
+        logger.info("stopping %d workers", len(self.children))
+        for pid in list(self.children) + ([self.jobs_pid] if self.jobs_pid else []):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        # a worker blocked in a request finishes it; idle ones exit within POLL_SECONDS
+        deadline = time.monotonic() + self.graceful_timeout
+        while (self.children or self.jobs_pid) and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+
+        for pid in list(self.children) + ([self.jobs_pid] if self.jobs_pid else []):
+            logger.warning("process %d did not stop in %.0fs, killing it", pid, self.graceful_timeout)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.children or self.jobs_pid:
+            self.reap()
+            time.sleep(0.05)
+
+        self.sock.close()
+
+
+def serve(target, jobs=SERVE_JOBS, **kwargs):
+    began = time.perf_counter()
+    # HTTP workers must never start a job pool of their own
+    os.environ["JOB_POOL_EMBEDDED"] = "0"
+    # each worker would size its OCR page pool to every CPU on the host
+    workers = kwargs.get("workers", SERVE_WORKERS)
+    os.environ.setdefault("OCR_PAGE_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+    app = load_app(target)
+    jobs = jobs_target(target, jobs)
+
+    failed = backends.preload(SERVE_PRELOAD)
+    where = warm_ocr_where()
+    if where == "parent":
+        warm_ocr()
+    logger.info(
+        "%s loaded in %.1fs (backends: %s%s)", target, time.perf_counter() - began,
+        ", ".join(backends.loaded()) or "none", f"; failed: {', '.join(failed)}" if failed else "",
+    )
+
+    Arbiter(app, warm_in_worker=where == "worker", jobs=load_app(jobs) if jobs else None, **kwargs).run()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("target", nargs="?", default="app:app", help="module:attr of the WSGI app")
+    ap.add_argument("--host", default=SERVE_HOST)
+    ap.add_argument("--port", type=int, default=SERVE_PORT)
+    ap.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    ap.add_argument("--max-requests", type=int, default=SERVE_MAX_REQUESTS)
+    ap.add_argument("--max-rss-mb", type=float, default=SERVE_MAX_RSS_MB)
+    ap.add_argument("--graceful-timeout", type=float, default=SERVE_GRACEFUL_TIMEOUT)
+    ap.add_argument("--jobs", default=SERVE_JOBS, help='module:attr starting the job pool, "auto" or ""')
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+
+    serve(
+        args.target, host=args.host, port=args.port, workers=args.workers,
+        max_requests=args.max_requests, max_rss_mb=args.max_rss_mb,
+        graceful_timeout=args.graceful_timeout, jobs=args.jobs,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,27 +1,14 @@
 import os
 import hashlib
-import pandas as pd
 
 # 🔐 JWT
 from jwt_token import create_jwt, verify_jwt
 
-from date import extract_date_from_text
-from total import extract_total, extract_text_full
-from invoice import extract_invoice, check_known_invoice_in_text
+from invoice import check_known_invoice_in_text
+from fields import extract_fields
 from ven1 import get_vendor
-
-
-EXCEL_FILE = "claimed_invoices.xlsx"
-
-REQUIRED_COLUMNS = [
-    "File Name",
-    "File Hash",
-    "Invoice Date",
-    "Invoice Number",
-    "Vendor",
-    "Total Amount",
-    "String Extracted"
-]
+from document import DocumentContext
+from claim_store import get_store
 
 
 # -------------------------------------------------------------
@@ -32,60 +19,37 @@ def get_file_hash(file_path):
         return hashlib.md5(f.read()).hexdigest()
 
 
-# -------------------------------------------------------------
-# LOAD OR CREATE EXCEL (SAFE)
-# -------------------------------------------------------------
-def load_or_create_excel():
-
-    if os.path.exists(EXCEL_FILE):
-        df = pd.read_excel(EXCEL_FILE)
-        df.columns = df.columns.str.strip()
-    else:
-        df = pd.DataFrame(columns=REQUIRED_COLUMNS)
-        df.to_excel(EXCEL_FILE, index=False)
-
-    for col in REQUIRED_COLUMNS:
-        if col not in df.columns:
-            df[col] = ""
-
-    return df
-
-
 # -------------------------------------------------------------
 # DUPLICATE CHECK (INVOICE + TOTAL)
 # -------------------------------------------------------------
-def is_already_claimed(df, invoice_no, total):
+def is_already_claimed(store, invoice_no, total):
 
-    invoice_no = str(invoice_no).strip().lower()
     total = str(total).strip()
 
-    df["Invoice Number"] = df["Invoice Number"].astype(str).str.strip().str.lower()
-    df["Total Amount"] = df["Total Amount"].astype(str).str.strip()
-
-    match = df[
-        (df["Invoice Number"] == invoice_no) &
-        (df["Total Amount"] == total)
-    ]
-
-    return not match.empty
+    return any(
+        str(t).strip() == total
+        for t in store.invoice_totals(invoice_no)
+    )
 
 
 # -------------------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------------------
-def process_invoice(file_path, df):
+def process_invoice(file_path, store):
 
-    file_name = os.path.basename(file_path)
-    file_hash = get_file_hash(file_path)
+    ctx = DocumentContext.from_path(file_path)
+    file_name = ctx.name
+    file_hash = ctx.md5
 
-    if file_hash in df["File Hash"].astype(str).values:
+    if store.has_file_hash(file_hash):
         print(f"\n❌ ALREADY CLAIMED (FILE MATCH): {file_name}")
-        return df
+        return
 
-    text = extract_text_full(file_path)
+    text = ctx.text
 
-    invoice_date = extract_date_from_text(text)
-    extracted_invoice = extract_invoice(text)
+    fields = extract_fields(text)
+    invoice_date = fields["invoice_date"]
+    extracted_invoice = fields["invoice_number"]
 
     KNOWN_INVOICE_NUMBER = "MH01CR1759"
     known_present = check_known_invoice_in_text(text, KNOWN_INVOICE_NUMBER)
@@ -95,18 +59,18 @@ def process_invoice(file_path, df):
     else:
         invoice_no = extracted_invoice
 
-    vendor = get_vendor(file_path)
-    total = extract_total(text)
+    vendor = get_vendor(ctx)
+    total = fields["total"]
 
-    if is_already_claimed(df, invoice_no, total):
+    if is_already_claimed(store, invoice_no, total):
         print(f"\n❌ ALREADY CLAIMED: {file_name}")
         print("Invoice:", invoice_no)
         print("Total:", total)
-        return df
+        return
 
     print(f"\n✅ NEW CLAIM: {file_name}")
 
-    new_row = {
+    store.append_invoice({
         "File Name": file_name,
         "File Hash": file_hash,
         "Invoice Date": invoice_date,
@@ -114,12 +78,7 @@ def process_invoice(file_path, df):
         "Vendor": vendor,
         "Total Amount": total,
         "String Extracted": text
-    }
-
-    df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    df.to_excel(EXCEL_FILE, index=False)
-
-    return df
+    })
 
 
 # -------------------------------------------------------------
@@ -135,11 +94,11 @@ def process_files(file_paths, jwt_token):   # 🔐 JWT added
         print(f"\n❌ JWT ERROR: {e}")
         return
 
-    df = load_or_create_excel()
+    store = get_store()
 
     for path in file_paths:
         if os.path.exists(path):
-            df = process_invoice(path, df)
+            process_invoice(path, store)
         else:
             print(f"\n⚠️ File not found: {path}")
 
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("flask")
+
+import app
+from jobs import JobQueue
+
+HEADERS = {"X-Username": app.VALID_USERNAME, "X-Password": app.VALID_PASSWORD}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_queued=1)
+    monkeypatch.setattr(app, "JOB_POOL_EMBEDDED", False)
+    monkeypatch.setattr(app, "get_job_queue", lambda: queue)
+    return app.app.test_client()
+
+
+def test_async_submit_queues_then_reports_a_full_queue(client):
+    claim = {"Claim": {"Vouchers": []}}
+
+    first = client.post("/process-invoice?async=1", json=claim, headers=HEADERS)
+    assert first.status_code == 202
+    assert first.get_json()["status"] == "QUEUED"
+
+    full = client.post("/process-invoice?async=1", json=claim, headers=HEADERS)
+    assert full.status_code == 503
+    assert full.get_json()["status"] == "BUSY"
+
+
+def test_async_bad_body_is_a_json_error(client):
+    response = client.post("/process-invoice?async=1", data="not json",
+                           headers={**HEADERS, "Content-Type": "application/json"})
+    assert response.get_json()["status"] == "ERROR1"
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from claim_store import ClaimStore, TABLES
+
+
+def test_legacy_workbook_imported_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    columns = TABLES["claims"][0]
+    pd.DataFrame([{c: "1" for c in columns}]).to_excel("claim.xlsx", index=False)
+
+    first = ClaimStore("claims.db", import_legacy=False)
+    second = ClaimStore("claims.db", import_legacy=False)
+    rows = pd.read_excel("claim.xlsx").to_dict("records")
+
+    # both processes passed the "already imported?" check before either wrote
+    assert first._insert("claims", rows, workbook="claim.xlsx") == 1
+    assert second._insert("claims", rows, workbook="claim.xlsx") == 0
+
+    assert len(ClaimStore("claims.db").frame("claims")) == 1
@@ -0,0 +1,65 @@
+from botocore.exceptions import ClientError
+
+from dynamo_writer import DynamoWriter
+
+
+class FakeClient:
+    """batch_write_item that rejects duplicate keys in one batch, like DynamoDB."""
+
+    def __init__(self):
+        self.table = {}
+        self.calls = 0
+
+    def batch_write_item(self, RequestItems):
+        self.calls += 1
+        (name, requests), = RequestItems.items()
+        keys = [(r["PutRequest"]["Item"]["Claim_ID"]["S"], r["PutRequest"]["Item"]["Invoice_No"]["S"]) for r in requests]
+        if len(set(keys)) != len(keys):
+            raise ClientError(
+                {"Error": {"Code": "ValidationException",
+                           "Message": "Provided list of item keys contains duplicates"}},
+                "BatchWriteItem",
+            )
+        for key, r in zip(keys, requests):
+            self.table[key] = r["PutRequest"]["Item"]
+        return {"UnprocessedItems": {}}
+
+
+def claim_rows(invoices):
+    return [
+        {"Claim_ID": "C1", "Invoice_No": inv, "Total_Amount": str(amount)}
+        for amount, inv in enumerate(invoices)
+    ]
+
+
+def test_duplicate_invoice_numbers_in_one_claim_keep_the_last_item():
+    client = FakeClient()
+    writer = DynamoWriter(client, "CLAIM-DATA", key=("Claim_ID", "Invoice_No"))
+
+    rows = claim_rows(["nan", "A1", "nan", "Invoice Not Found", "Invoice Not Found"])
+    result = writer.put_items(rows)
+
+    assert result["items"] == 3
+    assert client.calls == 1
+    assert set(client.table) == {("C1", "nan"), ("C1", "A1"), ("C1", "Invoice Not Found")}
+    assert client.table[("C1", "nan")]["Total_Amount"]["S"] == "2"
+    assert client.table[("C1", "Invoice Not Found")]["Total_Amount"]["S"] == "4"
+
+
+def test_duplicates_across_batch_boundaries():
+    client = FakeClient()
+    writer = DynamoWriter(client, "CLAIM-DATA", key=("Claim_ID", "Invoice_No"))
+
+    rows = claim_rows([f"INV{i % 30}" for i in range(60)])
+    writer.put_items(rows)
+
+    assert len(client.table) == 30
+    assert client.table[("C1", "INV0")]["Total_Amount"]["S"] == "30"
+
+
+def test_without_a_key_items_are_written_as_given():
+    client = FakeClient()
+    writer = DynamoWriter(client, "CLAIM-DATA")
+
+    writer.put_items(claim_rows(["A1", "A2"]))
+    assert len(client.table) == 2
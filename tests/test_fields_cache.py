@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("flask")
+
+import app
+import vali
+import ocr_cache
+from document import DocumentContext
+
+PDF = b"%PDF-1.4 same bytes for both endpoints"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ocr_cache.OCRCache(str(tmp_path / "ocr.db"))
+    monkeypatch.setattr(ocr_cache, "get_cache", lambda: cache)
+
+    text_fields = {"invoice_date": "01/02/2024", "invoice_number": "INV-7", "total": "120.00", "vendor": "guessed"}
+    monkeypatch.setattr(app, "roi_fields", lambda ctx: dict(text_fields))
+    monkeypatch.setattr(vali, "roi_fields", lambda ctx: dict(text_fields))
+    monkeypatch.setattr(vali, "get_vendor", lambda ctx: "from image")
+    return cache
+
+
+def test_invoice_vendor_does_not_depend_on_which_endpoint_ran_first(cache):
+    app.claim_fields(DocumentContext(data=PDF, name="bill.pdf"))
+    fields = vali.invoice_fields(DocumentContext(data=PDF, name="bill.pdf"))
+
+    assert fields["vendor"] == "from image"
+
+
+def test_both_extractors_are_served_from_the_cache(cache, monkeypatch):
+    vali.invoice_fields(DocumentContext(data=PDF, name="bill.pdf"))
+    app.claim_fields(DocumentContext(data=PDF, name="bill.pdf"))
+
+    def no_ocr(ctx):
+        raise AssertionError("extracted twice")
+
+    monkeypatch.setattr(app, "roi_fields", no_ocr)
+    monkeypatch.setattr(vali, "roi_fields", no_ocr)
+    monkeypatch.setattr(vali, "get_vendor", no_ocr)
+
+    assert app.claim_fields(DocumentContext(data=PDF, name="bill.pdf"))["invoice_number"] == "INV-7"
+    assert vali.invoice_fields(DocumentContext(data=PDF, name="bill.pdf"))["vendor"] == "from image"
@@ -0,0 +1,46 @@
+from botocore.exceptions import ClientError
+
+import invoice_index
+
+
+class FakeTable:
+    """Query fails like a GSI that is still CREATING until index_ready is set."""
+
+    name = "claimed_invoice"
+
+    def __init__(self):
+        self.index_ready = False
+        self.queries = 0
+        self.scans = 0
+
+    def query(self, **kwargs):
+        self.queries += 1
+        if not self.index_ready:
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "index is not yet active"}}, "Query"
+            )
+        return {"Items": [{"Total_Amount": "10"}]}
+
+    def scan(self, **kwargs):
+        self.scans += 1
+        return {"Items": [{"Total_Amount": "10"}]}
+
+
+def test_missing_index_is_retried_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(invoice_index.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(invoice_index, "INDEX_RETRY_SECONDS", 60)
+    monkeypatch.setattr(invoice_index, "_missing_index", {})
+    table = FakeTable()
+
+    assert invoice_index.claimed_amounts(table, "INV-1", "Travel") == ["10"]
+    assert (table.queries, table.scans) == (1, 1)
+
+    table.index_ready = True
+    now[0] += 30
+    invoice_index.claimed_amounts(table, "INV-1", "Travel")
+    assert (table.queries, table.scans) == (1, 2)  # still inside the TTL
+
+    now[0] += 31
+    invoice_index.claimed_amounts(table, "INV-1", "Travel")
+    assert (table.queries, table.scans) == (2, 2)
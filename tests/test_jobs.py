@@ -0,0 +1,76 @@
+import time
+import threading
+
+import pytest
+
+from jobs import JobQueue, QueueFull, run_worker, DONE, FAILED
+
+
+def run_workers(queue, handler, names, seconds, **kwargs):
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=run_worker, args=(queue, handler, name, stop), kwargs={"poll": 0.02, **kwargs})
+        for name in names
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+
+def test_slow_job_keeps_its_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.3)
+    runs = []
+
+    def handler(payload):
+        runs.append(payload)
+        time.sleep(1.0)
+        return {"ok": True}
+
+    job_id = queue.submit({"n": 1})
+    run_workers(queue, handler, ["a", "b"], 1.5)
+
+    job = queue.get(job_id)
+    assert job["status"] == DONE
+    assert job["attempts"] == 1
+    assert runs == [{"n": 1}]
+
+
+def test_abandoned_job_is_cleaned_up(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.01, max_attempts=1)
+    job_id = queue.submit({"path": "parked.pdf"})
+    assert queue.claim("dead") is not None  # worker dies holding the lease
+    time.sleep(0.05)
+
+    cleaned = []
+    assert queue.claim("next", on_abandon=cleaned.append) is None
+
+    assert cleaned == [{"path": "parked.pdf"}]
+    assert queue.get(job_id)["status"] == FAILED
+
+
+def test_outcome_needs_the_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.01)
+    job_id = queue.submit({})
+    queue.claim("a")
+    time.sleep(0.05)
+    queue.claim("b")  # a's lease expired, b took the job over
+
+    assert not queue.renew(job_id, "a")
+    assert not queue.complete(job_id, {"from": "a"}, "a")
+    assert queue.complete(job_id, {"from": "b"}, "b")
+    assert queue.get(job_id)["result"] == {"from": "b"}
+
+
+def test_submit_refuses_a_full_queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_queued=2)
+    queue.submit({})
+    queue.submit({})
+
+    with pytest.raises(QueueFull):
+        queue.submit({})
+
+    queue.claim("a")  # a running job no longer counts as waiting
+    queue.submit({})
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+for dependency in ("pandas", "boto3", "numpy", "PIL"):
+    pytest.importorskip(dependency)
+
+from benchmarks import pipeline
+
+
+@pytest.fixture
+def bill(tmp_path):
+    path = tmp_path / "bill.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    return str(path)
+
+
+def test_failing_file_fails_the_run(bill, tmp_path, monkeypatch):
+    def broken_stage(path, *args):
+        raise RuntimeError("rasterizer missing")
+
+    monkeypatch.setattr(pipeline, "process_file", broken_stage)
+    baseline = tmp_path / "baseline.json"
+
+    status = pipeline.main(["--no-default-corpus", "--corpus", bill, "--save-baseline", str(baseline)])
+
+    assert status == 1
+    assert not baseline.exists()
+
+
+def test_clean_run_passes_and_reports_no_failures(bill, tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "process_file", lambda path, *args: None)
+    out = tmp_path / "report.json"
+
+    assert pipeline.main(["--no-default-corpus", "--corpus", bill, "--out", str(out)]) == 0
+    report = json.loads(out.read_text())
+    assert report["failures"] == 0 and report["errors"] == []
@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+for dependency in ("flask", "pandas", "boto3"):
+    pytest.importorskip(dependency)
+
+from benchmarks.startup import measure, STARTUP_BUDGET_S, HEAVY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_app_starts_within_budget_without_heavy_backends():
+    # best of three, like benchmarks/startup.py: one slow run is disk cache, not a regression
+    runs = [measure("app", cwd=ROOT) for _ in range(3)]
+    best = min(runs, key=lambda r: r["ready_s"])
+
+    assert best["status"] == 200
+    assert not {m for r in runs for m in r["heavy_loaded"]} & set(HEAVY_MODULES)
+    assert best["ready_s"] <= STARTUP_BUDGET_S, f"app ready in {best['ready_s']:.2f}s"
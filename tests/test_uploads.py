@@ -0,0 +1,37 @@
+import base64
+import binascii
+import os
+
+import pytest
+
+from uploads import iter_b64decode, b64_head, Upload
+
+
+DATA = b"%PDF-1.4\n" + os.urandom(5000)
+
+
+def wrapped(data, width=76, newline="\r\n"):
+    encoded = base64.b64encode(data).decode()
+    return newline.join(encoded[i:i + width] for i in range(0, len(encoded), width))
+
+
+@pytest.mark.parametrize("chunk_chars", [4, 7, 76, 77, 1000, 1 << 20])
+def test_line_wrapped_base64(chunk_chars):
+    assert b"".join(iter_b64decode(wrapped(DATA), chunk_chars)) == DATA
+
+
+def test_wrapped_data_uri():
+    text = "data:application/pdf;base64," + wrapped(DATA, 64, "\n")
+    with Upload.from_base64(text) as upload:
+        assert upload.data == DATA
+        assert upload.kind == "pdf"
+    assert b64_head(text) == DATA[:2048]
+
+
+@pytest.mark.parametrize("cut", [1, 2, 3])
+def test_truncated_base64_raises(cut):
+    text = base64.b64encode(DATA).decode()[:-cut]
+    with pytest.raises(binascii.Error):
+        base64.b64decode(text)
+    with pytest.raises(binascii.Error):
+        b"".join(iter_b64decode(text))
@@ -0,0 +1,69 @@
+import io
+import os
+import re
+
+import backends
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+# Digital PDFs (Uber, Ola, hospital e-bills) carry their text; only pages
+# without a usable text layer need OCR. PyMuPDF reads every page from one
+# open in C and is several times faster than pdfplumber on dense pages;
+# pdfplumber stays available as the reference engine.
+TEXT_LAYER_ENGINE = os.environ.get("TEXT_LAYER_ENGINE", "pymupdf")  # pymupdf | pdfplumber
+
+# A page needs at least this many letters/digits to skip OCR. Scans often
+# carry a stamped page number or a scanner watermark in a thin text layer.
+TEXT_LAYER_MIN_CHARS = int(os.environ.get("TEXT_LAYER_MIN_CHARS", "20"))
+
+CID = re.compile(r"\(cid:\d+\)")  # what an unmapped font extracts as under pdfplumber
+
+# how each page's text was obtained (DocumentContext.page_paths)
+PATH_TEXT = "text"
+PATH_OCR = "ocr"
+
+
+# -------------------------------------------------------------
+# ENGINES
+# -------------------------------------------------------------
+def pymupdf_pages(data):
+    fitz = backends.get("fitz")
+    # text extraction is quick next to a render; one lock hold per document
+    with backends.pdf_lock:
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return [page.get_text("text", sort=True) for page in doc]
+
+
+def pdfplumber_pages(data):
+    pdfplumber = backends.get("pdfplumber")
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+
+ENGINES = {
+    "pymupdf": pymupdf_pages,
+    "pdfplumber": pdfplumber_pages,
+}
+
+
+def extract_pages(data, engine=None):
+    """Text of every page of the PDF in data, in page order, from one open."""
+    return ENGINES[engine or TEXT_LAYER_ENGINE](data)
+
+
+# -------------------------------------------------------------
+# PAGE ROUTING
+# -------------------------------------------------------------
+def usable(text):
+    """True when a page's text layer is worth using instead of OCR."""
+    if not text:
+        return False
+    if "(cid:" in text:
+        text = CID.sub("", text)
+    return sum(c.isalnum() for c in text) >= TEXT_LAYER_MIN_CHARS
+
+
+def page_paths(pages):
+    """PATH_TEXT or PATH_OCR for each page's text layer."""
+    return [PATH_TEXT if usable(text) else PATH_OCR for text in pages]
@@ -1,30 +1,6 @@
-import pdfplumber
 import re
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
-import platform
-import shutil
-
-# -----------------------------------------------------------
-# OS-AWARE CONFIGURATION
-# -----------------------------------------------------------
-
-# Tesseract
-#if platform.system() == "Windows":
-#    pytesseract.pytesseract.tesseract_cmd = (
-#        r"C:\Users\VikasTiwari\AppData\Local\Programs\Tesseract-OCR\tesseract.exe"
-#    )
-#else:
-#    if not shutil.which("tesseract"):
-#        raise RuntimeError("Tesseract is not installed or not in PATH")
-
-# Poppler
-if platform.system() == "Windows":
-    POPPLER_PATH = r"C:\poppler-25.07.0\Library\bin"
-else:
-    POPPLER_PATH = None
 
+from document import DocumentContext
 
 # -------------------------------------------------------------------------------------
 # YOUR ORIGINAL FUNCTION (UNCHANGED)
@@ -72,56 +48,11 @@ def extract_total(text):
     return "Total not found"
 
 
-# -------------------------------------------------------------------------------------
-# OCR HELPERS
-# -------------------------------------------------------------------------------------
-def _ocr_best(img):
-    best = ""
-    for angle in (0, 90, 180, 270):
-        text = pytesseract.image_to_string(img.rotate(angle, expand=True))
-        if len(text) > len(best):
-            best = text
-    return best
-
-
 # -------------------------------------------------------------------------------------
 # UNIVERSAL TEXT EXTRACTOR (VM SAFE)
 # -------------------------------------------------------------------------------------
 def extract_text_full(path):
-
-    if path.lower().endswith(".pdf"):
-        text_out = ""
-
-        # 1️⃣ pdfplumber first
-        try:
-            with pdfplumber.open(path) as pdf:
-                for pg in pdf.pages:
-                    txt = pg.extract_text()
-                    if txt and txt.strip():
-                        text_out += "\n" + txt
-
-            if text_out.strip():
-                return text_out
-        except Exception as e:
-            print("pdfplumber failed:", e)
-
-        # 2️⃣ OCR fallback
-        try:
-            kwargs = {"dpi": 300}
-            if POPPLER_PATH:
-                kwargs["poppler_path"] = POPPLER_PATH
-
-            imgs = convert_from_path(path, **kwargs)
-            for img in imgs:
-                text_out += "\n" + _ocr_best(img)
-            return text_out
-        except Exception as e:
-            print("pdf2image failed:", e)
-            return ""
-
-    else:
-        img = Image.open(path)
-        return _ocr_best(img)
+    return DocumentContext.from_path(path).text
 
 
 # -------------------------------------------------------------------------------------
@@ -131,10 +62,11 @@ files = [
     # "bills_folder/example.pdf"
 ]
 
-for file in files:
-    print("\n===== FILE:", file, "=====\n")
-    text = extract_text_full(file)
-    print(text[:500])
-    total = extract_total(text)
-    print("\n>> Extracted Total:", total)
+if __name__ == "__main__":
+    for file in files:
+        print("\n===== FILE:", file, "=====\n")
+        text = extract_text_full(file)
+        print(text[:500])
+        total = extract_total(text)
+        print("\n>> Extracted Total:", total)
 
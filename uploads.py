@@ -0,0 +1,217 @@
+import io
+import os
+import re
+import base64
+import binascii
+import shutil
+import tempfile
+
+# -------------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------------
+B64_CHUNK_CHARS = 1024 * 1024  # multiple of 4
+COPY_CHUNK_BYTES = 1024 * 1024
+SNIFF_BYTES = 2048
+
+# Attachments up to this size never touch the disk; bigger ones spill to
+# a private temp file that is removed when the Upload is closed.
+UPLOAD_SPILL_BYTES = int(os.environ.get("UPLOAD_SPILL_BYTES", str(32 * 1024 * 1024)))
+UPLOAD_SPILL_DIR = os.environ.get("UPLOAD_SPILL_DIR") or None
+
+EXTENSIONS = {"pdf": ".pdf", "excel": ".xlsx", "image": ".jpg"}
+
+# b64decode (without validate) drops anything outside the alphabet
+NOT_B64 = re.compile(r"[^A-Za-z0-9+/=]")
+
+
+def sniff_kind(data):
+    if data.startswith(b"%PDF"):
+        return "pdf"
+    if data[:2] == b"PK":
+        return "excel"
+    return "image"
+
+
+def strip_data_uri(base64_string):
+    if "base64," in base64_string[:256]:
+        return base64_string.split("base64,", 1)[1]
+    return base64_string
+
+
+# -------------------------------------------------------------
+# CHUNKED BASE64
+# -------------------------------------------------------------
+def iter_b64decode(base64_string, chunk_chars=B64_CHUNK_CHARS):
+    """
+    Decode a base64 string piece by piece so only one chunk of decoded
+    bytes is alive at a time. Like b64decode, characters outside the
+    alphabet (line wraps, whitespace) are skipped; raises binascii.Error
+    on malformed input.
+    """
+    base64_string = strip_data_uri(base64_string)
+    carry = ""
+
+    for start in range(0, len(base64_string), chunk_chars):
+        # decode whole 4-char quanta of alphabet characters, carry the rest
+        chunk = carry + NOT_B64.sub("", base64_string[start:start + chunk_chars])
+
+        usable = len(chunk) - len(chunk) % 4
+        carry = chunk[usable:]
+        if usable:
+            yield base64.b64decode(chunk[:usable])
+
+    if carry:
+        # a complete payload is whole quanta, padding included: this one
+        # was cut short, and b64decode would reject it too
+        raise binascii.Error("Incorrect padding")
+
+
+def b64_head(base64_string, size=SNIFF_BYTES):
+    """First ~size decoded bytes, for sniffing the file type."""
+    head = strip_data_uri(base64_string)[:size * 2]  # room for line wraps
+    return next(iter_b64decode(head), b"")[:size]
+
+
+def write_b64(base64_string, f, chunk_chars=B64_CHUNK_CHARS):
+    written = 0
+    for piece in iter_b64decode(base64_string, chunk_chars):
+        f.write(piece)
+        written += len(piece)
+    return written
+
+
+# -------------------------------------------------------------
+# BINARY STREAMS
+# -------------------------------------------------------------
+def copy_stream(stream, f, chunk_bytes=COPY_CHUNK_BYTES):
+    """Copy a request body / multipart part into f without buffering it whole."""
+    before = f.tell() if f.seekable() else 0
+    shutil.copyfileobj(stream, f, chunk_bytes)
+    return (f.tell() if f.seekable() else 0) - before
+
+
+# -------------------------------------------------------------
+# IN-MEMORY ATTACHMENT
+# -------------------------------------------------------------
+class Upload:
+    """
+    One attachment's bytes, held in memory up to spill_bytes and in a
+    temp file beyond that. Use as a context manager: close() drops the
+    buffer and deletes any file this Upload owns.
+    """
+
+    def __init__(self, spill_bytes=UPLOAD_SPILL_BYTES, spill_dir=UPLOAD_SPILL_DIR):
+        self.spill_bytes = spill_bytes
+        self.spill_dir = spill_dir
+        self.path = None
+        self.size = 0
+        self.head = b""
+
+        self._buf = io.BytesIO()
+        self._file = None
+        self._owned = True
+
+    # ---------------- constructors ----------------
+    @classmethod
+    def from_stream(cls, stream, **kwargs):
+        upload = cls(**kwargs)
+        try:
+            for chunk in iter(lambda: stream.read(COPY_CHUNK_BYTES), b""):
+                upload.write(chunk)
+            return upload.finish()
+        except Exception:
+            upload.close()
+            raise
+
+    @classmethod
+    def from_base64(cls, base64_string, **kwargs):
+        upload = cls(**kwargs)
+        try:
+            for piece in iter_b64decode(base64_string):
+                upload.write(piece)
+            return upload.finish()
+        except Exception:
+            upload.close()
+            raise
+
+    @classmethod
+    def from_path(cls, path, owned=False):
+        """Wrap a file already on disk; owned=True deletes it on close."""
+        upload = cls()
+        upload._buf = None
+        upload.path = path
+        upload.size = os.path.getsize(path)
+        upload._owned = owned
+        with open(path, "rb") as f:
+            upload.head = f.read(SNIFF_BYTES)
+        return upload
+
+    # ---------------- writing ----------------
+    def write(self, chunk):
+        if len(self.head) < SNIFF_BYTES:
+            self.head += bytes(chunk[:SNIFF_BYTES - len(self.head)])
+        self.size += len(chunk)
+
+        if self._file is None and self.path is None and self.size > self.spill_bytes:
+            self._spill()
+        (self._file or self._buf).write(chunk)
+
+    def _spill(self, directory=None):
+        fd, self.path = tempfile.mkstemp(suffix=EXTENSIONS[self.kind], dir=directory or self.spill_dir)
+        self._file = os.fdopen(fd, "wb")
+        if self._buf is not None:
+            self._file.write(self._buf.getbuffer())
+            self._buf = None
+
+    def finish(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self
+
+    def detach(self, directory=None):
+        """Make sure the bytes are on disk and hand the file over to the caller."""
+        if self.path is None:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._spill(directory)
+            self.finish()
+        self._owned = False
+        return self.path
+
+    # ---------------- reading ----------------
+    @property
+    def kind(self):
+        return sniff_kind(self.head)
+
+    @property
+    def spilled(self):
+        return self.path is not None
+
+    @property
+    def data(self):
+        if self._buf is not None:
+            return self._buf.getvalue()  # no copy while the buffer isn't shared
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def open(self):
+        """Seekable binary file object (for pandas/openpyxl/pdfplumber)."""
+        if self._buf is not None:
+            return io.BytesIO(self.data)
+        return open(self.path, "rb")
+
+    # ---------------- cleanup ----------------
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path and self._owned and os.path.exists(self.path):
+            os.remove(self.path)
+        self._buf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
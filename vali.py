@@ -1,14 +1,17 @@
-import os
-import hashlib
 import boto3
 import pandas as pd
 from decimal import Decimal
 from datetime import datetime
 
-from date import extract_date_from_text
-from total import extract_total, extract_text_full
-from invoice import extract_invoice, check_known_invoice_in_text
+from invoice import check_known_invoice_in_text
+from fields import extract_fields
+from refine import refine_fields
+from layout import roi_fields
+from incremental import incremental_text
 from ven1 import get_vendor
+from document import DocumentContext
+from invoice_index import claimed_amounts, invoice_key
+from metrics import stage, DYNAMODB_CALLS
 
 
 # -------------------------------------------------------------
@@ -18,14 +21,6 @@ DYNAMO_REGION = "ap-south-1"
 DYNAMO_TABLE = "claimed_invoice"
 
 
-# -------------------------------------------------------------
-# FILE HASH
-# -------------------------------------------------------------
-def get_file_hash(file_path):
-    with open(file_path, "rb") as f:
-        return hashlib.md5(f.read()).hexdigest()
-
-
 # -------------------------------------------------------------
 # HELPERS
 # -------------------------------------------------------------
@@ -58,6 +53,7 @@ from botocore.exceptions import ClientError
 
 def is_duplicate_file_hash(table, file_hash):
     try:
+        DYNAMODB_CALLS.inc(operation="get_item")
         response = table.get_item(
             Key={
                 "File_Hash": file_hash
@@ -78,17 +74,9 @@ def is_duplicate_claim(table, invoice_no, extracted_total, claim_type):
     except Exception:
         return False
 
-    response = table.scan(
-        FilterExpression="Invoice_Number = :inv AND Claim_Type = :ct",
-        ExpressionAttributeValues={
-            ":inv": invoice_no,
-            ":ct": claim_type
-        }
-    )
-
-    for item in response.get("Items", []):
+    for amount in claimed_amounts(table, invoice_no, claim_type):
         try:
-            db_total = float(item.get("Total_Amount", 0))
+            db_total = float(amount if amount is not None else 0)
             if abs(db_total - extracted_total) <= 5:
                 return True
         except Exception:
@@ -97,19 +85,48 @@ def is_duplicate_claim(table, invoice_no, extracted_total, claim_type):
     return False
 
 
+# -------------------------------------------------------------
+# FIELDS
+# -------------------------------------------------------------
+def invoice_fields(ctx):
+    """
+    Date, number, vendor and total, cached per file under
+    "invoice_fields" (app.py's claim_fields has a text-guessed vendor).
+    Header/totals crops first; the full page only if they miss a field.
+    """
+    fields = ctx.cached("invoice_fields") or {}
+    if not {"invoice_date", "invoice_number", "vendor", "total"} <= fields.keys():
+        with stage("roi"):
+            fields = roi_fields(ctx)
+        if fields is None:
+            with stage("ocr"):
+                text = incremental_text(ctx)
+            with stage("extract"):
+                fields = extract_fields(text)
+            fields = refine_fields(ctx, fields)
+        with stage("vendor_ocr"):
+            fields["vendor"] = get_vendor(ctx)  # image-based, better than the text guess
+        ctx.remember(invoice_fields=fields)
+    return fields
+
+
 # -------------------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------------------
 def process_invoice(file_path, known_date, known_total, claim_type,emp_code):
     table = get_dynamo_table()
 
-    file_name = os.path.basename(file_path)
-    file_hash = get_file_hash(file_path)
+    # file_path may also be an already-open DocumentContext (in-memory upload)
+    ctx = file_path if isinstance(file_path, DocumentContext) else DocumentContext.from_path(file_path)
+    file_name = ctx.name
+    file_hash = ctx.md5
 
     # -------------------------------------------------
     # HARD DUPLICATE (File Hash)
     # -------------------------------------------------
-    if is_duplicate_file_hash(table, file_hash):
+    with stage("dedupe"):
+        duplicate_file = is_duplicate_file_hash(table, file_hash)
+    if duplicate_file:
         return {
             "status": "DUPLICATE_CLAIM",
             "reason": "File already processed",
@@ -122,24 +139,28 @@ def process_invoice(file_path, known_date, known_total, claim_type,emp_code):
         }
 
     # -------------------------------------------------
-    # OCR
+    # OCR (served from the result cache on resubmits)
     # -------------------------------------------------
-    text = extract_text_full(file_path)
-    invoice_date = extract_date_from_text(text)
-    extracted_invoice = extract_invoice(text)
-    vendor = get_vendor(file_path)
-    total = extract_total(text)
+    fields = invoice_fields(ctx)
+
+    invoice_date = fields["invoice_date"]
+    extracted_invoice = fields["invoice_number"]
+    vendor = fields["vendor"]
+    total = fields["total"]
 
     # -------------------------------------------------
     # Known invoice fallback
     # -------------------------------------------------
+    # only when no number was extracted, and then on the full text: the
+    # number may sit on a page an early exit or the crops never read
     KNOWN_INVOICE_NUMBER = "MH01CR1759"
-    known_present = check_known_invoice_in_text(text, KNOWN_INVOICE_NUMBER)
+    invoice_no = extracted_invoice
 
-    if extracted_invoice in ["NA", "Not Found", None, "", "Invoice Not Found"] and known_present:
-        invoice_no = KNOWN_INVOICE_NUMBER
-    else:
-        invoice_no = extracted_invoice
+    if extracted_invoice in ["NA", "Not Found", None, "", "Invoice Not Found"]:
+        with stage("ocr"):
+            known_present = check_known_invoice_in_text(ctx.text, KNOWN_INVOICE_NUMBER)
+        if known_present:
+            invoice_no = KNOWN_INVOICE_NUMBER
 
     # -------------------------------------------------
     # VALIDATIONS
@@ -150,12 +171,13 @@ def process_invoice(file_path, known_date, known_total, claim_type,emp_code):
     date_match = extracted_date_norm == known_date_norm
     total_match = total_within_range(total, known_total)
 
-    dynamo_duplicate = is_duplicate_claim(
-        table,
-        invoice_no,
-        total,
-        claim_type
-    )
+    with stage("dedupe"):
+        dynamo_duplicate = is_duplicate_claim(
+            table,
+            invoice_no,
+            total,
+            claim_type
+        )
 
     mismatched_fields = []
     if not date_match:
@@ -174,20 +196,33 @@ def process_invoice(file_path, known_date, known_total, claim_type,emp_code):
     # SAVE ONLY NEW CLAIM
     # -------------------------------------------------
     if status == "NEW_CLAIM":
-        table.put_item(
-            Item={
-                "File_Hash": file_hash,                  # Partition Key
-                "Invoice_Number": invoice_no,            # Sort Key (if enabled)
-                "File_Name": file_name,
-                "Invoice_Date": invoice_date,
-                "Vendor": vendor,
-                "Total_Amount":Decimal(str(float(total))) if total else None,
-                "Claim_Type": claim_type,
-                "String_Extracted": text,
-		"emp_code":emp_code,
-                "Created_At": datetime.utcnow().isoformat()
-            }
-        )
+        # String_Extracted is always the full text; when only part of the
+        # document was read it is stored as String_Extracted_Partial
+        # instead of paying for a full OCR here
+        text = ctx.known_full_text()
+        partial_text = None if text is not None else ctx.known_partial_text()
+        if text is None and partial_text is None:
+            with stage("ocr"):
+                text = ctx.text
+        extracted = {"String_Extracted": text} if text is not None else {"String_Extracted_Partial": partial_text}
+
+        with stage("persist"):
+            DYNAMODB_CALLS.inc(operation="put_item")
+            table.put_item(
+                Item={
+                    "File_Hash": file_hash,                  # Partition Key
+                    "Invoice_Number": invoice_no,            # Sort Key (if enabled)
+                    "Invoice_Key": invoice_key(invoice_no, claim_type),  # GSI for duplicate lookups
+                    "File_Name": file_name,
+                    "Invoice_Date": invoice_date,
+                    "Vendor": vendor,
+                    "Total_Amount":Decimal(str(float(total))) if total else None,
+                    "Claim_Type": claim_type,
+                    **extracted,
+		    "emp_code":emp_code,
+                    "Created_At": datetime.utcnow().isoformat()
+                }
+            )
 
         print("NEW_CLAIM inserted into DynamoDB")
 
@@ -1,199 +1,165 @@
 import pandas as pd
 import numpy as np
 import os
+import itertools
+
+from openpyxl import load_workbook
+
+from claim_store import get_store, expense_row, detect_expense_columns
+from uploads import Upload
+from metrics import stage
+
+# Uploads are read, cleaned and staged this many rows at a time, so
+# memory stays flat however long the sheet or the expense history is.
+VALIEX_BATCH_ROWS = int(os.environ.get("VALIEX_BATCH_ROWS", "2000"))
+
+
+# -------------------------
+# BATCH READERS
+# -------------------------
+def iter_xlsx_batches(source, batch_rows=VALIEX_BATCH_ROWS):
+    """DataFrames of batch_rows rows from the first sheet, via openpyxl's streaming reader."""
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+
+        width = len(columns)
+        batch = []
+        yielded = False
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(batch) >= batch_rows:
+                yield pd.DataFrame(batch, columns=columns)
+                batch, yielded = [], True
+        if batch or not yielded:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        wb.close()
+
+
+def iter_batches(source, name, batch_rows=VALIEX_BATCH_ROWS):
+    if name.endswith(".csv"):
+        for df in pd.read_csv(source, chunksize=batch_rows):
+            df.columns = [str(c).strip() for c in df.columns]
+            yield df
+    elif name.endswith(".xls"):
+        # legacy .xls has no streaming reader; read once, hand out slices
+        df = pd.read_excel(source)
+        df.columns = [str(c).strip() for c in df.columns]
+        for start in range(0, len(df), batch_rows):
+            yield df.iloc[start:start + batch_rows]
+    else:
+        yield from iter_xlsx_batches(source, batch_rows)
 
-EXCEL_DB = "expenses_database.xlsx"
 
 def process_daily_expense_excel(file_path, daily_limit, uploaded_by="SYSTEM"):
 
     # -------------------------
-
     # 1. FILE CHECK
-
     # -------------------------
+    # file_path may also be an in-memory uploads.Upload
+    if isinstance(file_path, Upload):
+        if file_path.kind != "excel":
+            return {"status": "FAILED", "reason": "UNSUPPORTED_FILE_TYPE"}
 
-    if not file_path.lower().endswith((".xls", ".xlsx")):
+        with file_path.open() as source:
+            return import_daily_expenses(source, ".xlsx", daily_limit, uploaded_by)
 
+    if not file_path.lower().endswith((".xls", ".xlsx", ".csv")):
         return {"status": "FAILED", "reason": "UNSUPPORTED_FILE_TYPE"}
 
-
-
     if not os.path.exists(file_path):
-
         return {"status": "FAILED", "reason": "FILE_NOT_FOUND"}
 
+    return import_daily_expenses(file_path, file_path.lower(), daily_limit, uploaded_by)
 
 
-    # -------------------------
-
-    # 2. READ EXCEL
+def import_daily_expenses(source, name, daily_limit, uploaded_by):
 
     # -------------------------
-
+    # 2. READ HEADER / FIRST BATCH
+    # -------------------------
     try:
-
-        df = pd.read_excel(file_path)
-
+        batches = iter_batches(source, name)
+        first = next(batches, None)
     except Exception:
-
         return {"status": "FAILED", "reason": "INVALID_EXCEL_FILE"}
 
+    if first is None:
+        return {"status": "FAILED", "reason": "INVALID_EXCEL_FILE"}
 
-
-    df.columns = [str(c).strip() for c in df.columns]
-
-
+    columns = list(first.columns)
 
     # -------------------------
-
     # 3. AUTO-DETECT COLUMNS
-
     # -------------------------
-
-    amount_col = next((c for c in df.columns if "amount" in c.lower()), None)
-
-    date_col = next((c for c in df.columns if "date" in c.lower()), None)
-
-    employee_col = next(
-
-        (c for c in df.columns if "employee" in c.lower() and "code" in c.lower()),
-
-        None
-
-    )
-
-
+    employee_col, date_col, amount_col = detect_expense_columns(columns)
 
     if not all([amount_col, date_col, employee_col]):
-
         return {
-
             "status": "FAILED",
-
             "reason": "MISSING_REQUIRED_COLUMNS",
-
-            "columns_found": list(df.columns)
-
+            "columns_found": columns
         }
 
-
-
     # -------------------------
-
-    # 4. DATA CLEANING
-
+    # 4. DATA CLEANING (per batch)
     # -------------------------
-
-    df[amount_col] = pd.to_numeric(df[amount_col], errors="coerce").fillna(0)
-
-    df[date_col] = pd.to_datetime(df[date_col], errors="coerce", dayfirst=True)
-
-
+    def cleaned_rows():
+        for df in itertools.chain([first], batches):
+            df = df.copy()
+            df[amount_col] = pd.to_numeric(df[amount_col], errors="coerce").fillna(0)
+            df[date_col] = pd.to_datetime(df[date_col], errors="coerce", dayfirst=True)
+            df["UploadedBy"] = uploaded_by
+            df["Claim Type"] = "Daily Expense"
+            yield [expense_row(rec, employee_col, date_col, amount_col) for rec in df.to_dict("records")]
 
     # -------------------------
-
-    # 5. TOTAL FILE LIMIT CHECK (FIX 🔥)
-
+    # 5-8. LIMIT + DUPLICATE CHECK, INSERT (ALL OR NOTHING)
     # -------------------------
+    # Rows are staged batch by batch and joined against the expenses
+    # (Employee_Code, Date, Amount) index; they are appended only if the
+    # file total is within the limit and nothing was already claimed.
+    def accept(stats):
+        return stats["total"] <= float(daily_limit) and stats["duplicates"] == 0
 
-    file_total = df[amount_col].sum()
-
-
-
-    if file_total > float(daily_limit):
+    try:
+        # reading, cleaning, the duplicate join and the insert all stream
+        # through this one call
+        with stage("daily_expense_import"):
+            stats = get_store().append_new_expenses(cleaned_rows(), accept)
+    except (ValueError, KeyError, OSError) as e:
+        print("Daily expense import failed:", e)
+        return {"status": "FAILED", "reason": "INVALID_EXCEL_FILE"}
 
+    if stats["total"] > float(daily_limit):
         return {
-
             "status": "FAILED",
-
             "reason": "TOTAL_LIMIT_EXCEEDED",
-
             "daily_limit": float(daily_limit),
-
-            "total_amount": float(file_total)
-
+            "total_amount": float(stats["total"])
         }
 
-
-
-    # -------------------------
-
-    # 6. LOAD DATABASE
-
-    # -------------------------
-
-    if os.path.exists(EXCEL_DB):
-
-        db_df = pd.read_excel(EXCEL_DB)
-
-        db_df.columns = [str(c).strip() for c in db_df.columns]
-
-    else:
-
-        db_df = pd.DataFrame()
-
-
-
-    # -------------------------
-
-    # 7. DUPLICATE CHECK
-
-    # -------------------------
-
-    if not db_df.empty:
-        db_amount_col = next((c for c in db_df.columns if "amount" in c.lower()), None)
-        db_date_col = next((c for c in db_df.columns if "date" in c.lower()), None)
-        db_employee_col = next(
-            (c for c in db_df.columns if "employee" in c.lower() and "code" in c.lower()),
-            None
-        )
-
-        db_df[db_date_col] = pd.to_datetime(db_df[db_date_col], errors="coerce", dayfirst=True)
-        db_df[db_amount_col] = pd.to_numeric(db_df[db_amount_col], errors="coerce").fillna(0)
-
-        duplicates = df.merge(
-            db_df[[db_employee_col, db_date_col, db_amount_col]],
-            left_on=[employee_col, date_col, amount_col],
-            right_on=[db_employee_col, db_date_col, db_amount_col],
-            how="inner"
-        )
-
-
-
-        if not duplicates.empty:
-
-            return {
-
-                "status": "FAILED",
-
-                "reason": "ALREADY_CLAIMED_FOUND",
-
-                "duplicate_records": int(len(duplicates)),
-		"total_amount" : float(file_total),
-		"total_records": len(df)
-            }
-
-    # -------------------------
-
-    # 8. FINAL INSERT (ALL OR NOTHING)
-    # -------------------------
-    df["UploadedBy"] = uploaded_by
-    df["Claim Type"] = "Daily Expense"
-
-    final_df = pd.concat([db_df, df], ignore_index=True) if not db_df.empty else df
-    final_df.to_excel(EXCEL_DB, index=False)
-
-
+    if stats["duplicates"]:
+        return {
+            "status": "FAILED",
+            "reason": "ALREADY_CLAIMED_FOUND",
+            "duplicate_records": int(stats["duplicates"]),
+            "total_amount": float(stats["total"]),
+            "total_records": stats["rows"]
+        }
 
     # -------------------------
-
     # 9. SUCCESS
-
     # -------------------------
-
     return {
         "status": "SUCCESS",
-        "total_records": int(len(df)),
-        "total_amount": float(file_total)
+        "total_records": int(stats["rows"]),
+        "total_amount": float(stats["total"])
     }
-
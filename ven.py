@@ -42,13 +42,14 @@ def extract_vendor(text):
 
 
 # Test PDF
-pdf_path = "bills_folder/rupali-medicalbill105202421167943.pdf"
-pdf = pdfplumber.open(pdf_path)
+if __name__ == "__main__":
+    pdf_path = "bills_folder/rupali-medicalbill105202421167943.pdf"
+    pdf = pdfplumber.open(pdf_path)
 
-for i, page in enumerate(pdf.pages):
-    print(f"\n===== PAGE {i+1} =====\n")
-    text = page.extract_text()
-    print(text)
+    for i, page in enumerate(pdf.pages):
+        print(f"\n===== PAGE {i+1} =====\n")
+        text = page.extract_text()
+        print(text)
 
-    vendor_name = extract_vendor(text)
-    print(f"\n>> Extracted Vendor: {vendor_name}")
+        vendor_name = extract_vendor(text)
+        print(f"\n>> Extracted Vendor: {vendor_name}")
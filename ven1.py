@@ -1,9 +1,8 @@
 import re
-import fitz  # PyMuPDF
-import easyocr
-from PIL import Image, ImageOps, ImageFilter
-import io
 from difflib import get_close_matches
+
+from document import DocumentContext
+from layout import LAYOUT_ROI, ROI_HEADER_LINES
  
 # -------------------------------
 # Known Vendors
@@ -21,28 +20,6 @@ corrections = {
     "KOKILABEN HOSPITAL": "KOKILABEN DHIRUBHAI AMBANI HOSPITAL"
 }
  
-# -------------------------------
-# Convert first page to high-quality image
-# -------------------------------
-def get_first_page_image(pdf_path):
-    doc = fitz.open(pdf_path)
-    page = doc.load_page(0)
- 
-    zoom = 300 / 72
-    mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat)
-    img_bytes = pix.tobytes("png")
-    doc.close()
- 
-    img = Image.open(io.BytesIO(img_bytes))
-    img = ImageOps.grayscale(img)
-    img = img.point(lambda x: 0 if x < 128 else 255, '1')  # binarize
-    img = img.filter(ImageFilter.SHARPEN)
- 
-    output = io.BytesIO()
-    img.save(output, format='PNG')
-    return output.getvalue()
- 
 # -------------------------------
 # Simple fuzzy match using difflib
 # -------------------------------
@@ -88,11 +65,14 @@ def detect_vendor(lines):
 # -------------------------------
 # Master function
 # -------------------------------
-def get_vendor(pdf_path):
-    img_data = get_first_page_image(pdf_path)
-    reader = easyocr.Reader(['en'])
-    lines = reader.readtext(img_data, detail=0)
-    lines = [l.strip() for l in lines if l.strip()]
+def get_vendor(source):
+    ctx = source if isinstance(source, DocumentContext) else DocumentContext.from_path(source)
+    lines = []
+    if LAYOUT_ROI:
+        # the vendor is in the header: read just that band first
+        lines = [l["text"] for l in ctx.ocr_lines(0, rows=ROI_HEADER_LINES)]
+    if not lines:
+        lines = [l["text"] for l in ctx.ocr_lines(0)]
     if not lines:
         return "Vendor Not Found"
     return detect_vendor(lines)
@@ -121,5 +101,6 @@ pdf_files = [
         # "bills_folder/ketan-medicalbill1052024211446776.pdf"
 ]
  
-for pdf in pdf_files:
-    print(pdf, "→", get_vendor(pdf))
\ No newline at end of file
+if __name__ == "__main__":
+    for pdf in pdf_files:
+        print(pdf, "→", get_vendor(pdf))
\ No newline at end of file